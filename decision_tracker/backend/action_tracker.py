@@ -0,0 +1,212 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default location of the action item database
+DEFAULT_DB_PATH = os.getenv("ACTION_ITEMS_DB_PATH", os.path.join("data", "action_items.db"))
+
+ACTION_STATUSES = ("open", "in_progress", "blocked", "done", "dropped")
+
+# Statuses that still need follow-up and are shown to the LLM
+OPEN_STATUSES = ("open", "in_progress", "blocked")
+
+
+class ActionItemTracker:
+    """
+    Persistent store of action items across the meetings of a series.
+
+    Items are keyed by a stable id (the deduplication itemId when there is
+    one, prefixed with the series when another series already uses it) and
+    carry a status. Every status change is recorded with the task
+    that caused it, so an item's history can be followed week to week.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS action_items (
+                item_id TEXT PRIMARY KEY,
+                series TEXT NOT NULL,
+                task TEXT NOT NULL,
+                assignee TEXT,
+                due_date TEXT,
+                status TEXT NOT NULL DEFAULT 'open',
+                created_task_id TEXT,
+                updated_task_id TEXT,
+                created_at REAL,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS action_items_series ON action_items (series, status);
+            CREATE TABLE IF NOT EXISTS action_item_updates (
+                item_id TEXT NOT NULL,
+                task_id TEXT,
+                old_status TEXT,
+                new_status TEXT NOT NULL,
+                note TEXT,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS action_item_updates_item ON action_item_updates (item_id);
+        """)
+        logger.info(f"Action item tracker opened at {os.path.abspath(db_path)}")
+
+    @staticmethod
+    def _row_to_item(row) -> Dict:
+        return {
+            "itemId": row[0], "series": row[1], "task": row[2], "assignee": row[3], "dueDate": row[4],
+            "status": row[5], "createdTaskId": row[6], "updatedTaskId": row[7],
+            "createdAt": row[8], "updatedAt": row[9],
+        }
+
+    def get_open_items(self, series: str) -> List[Dict]:
+        """Return the items of a series that still need follow-up, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM action_items WHERE series = ? AND status IN ({', '.join('?' for _ in OPEN_STATUSES)}) "
+                "ORDER BY created_at",
+                (series, *OPEN_STATUSES)
+            ).fetchall()
+        return [self._row_to_item(r) for r in rows]
+
+    def list_items(self, series: Optional[str] = None, status: Optional[str] = None, open_only: bool = False,
+                   limit: int = 200) -> List[Dict]:
+        """List items, optionally filtered by series and status, newest first."""
+        sql = "SELECT * FROM action_items WHERE 1 = 1"
+        params: List[Any] = []
+        if series:
+            sql += " AND series = ?"
+            params.append(series)
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        elif open_only:
+            sql += f" AND status IN ({', '.join('?' for _ in OPEN_STATUSES)})"
+            params.extend(OPEN_STATUSES)
+        sql += " ORDER BY updated_at DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_item(r) for r in rows]
+
+    def get_item(self, item_id: str) -> Optional[Dict]:
+        """Return an item together with its status history."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM action_items WHERE item_id = ?", (item_id,)).fetchone()
+            if not row:
+                return None
+            updates = self._conn.execute(
+                "SELECT task_id, old_status, new_status, note, updated_at FROM action_item_updates "
+                "WHERE item_id = ? ORDER BY updated_at",
+                (item_id,)
+            ).fetchall()
+
+        item = self._row_to_item(row)
+        item["history"] = [
+            {"taskId": u[0], "oldStatus": u[1], "newStatus": u[2], "note": u[3], "updatedAt": u[4]}
+            for u in updates
+        ]
+        return item
+
+    def _set_status(self, item_id: str, status: str, task_id: Optional[str], note: Optional[str], now: float) -> bool:
+        row = self._conn.execute("SELECT status FROM action_items WHERE item_id = ?", (item_id,)).fetchone()
+        if not row or row[0] == status:
+            return False
+        self._conn.execute(
+            "UPDATE action_items SET status = ?, updated_task_id = ?, updated_at = ? WHERE item_id = ?",
+            (status, task_id, now, item_id)
+        )
+        self._conn.execute(
+            "INSERT INTO action_item_updates VALUES (?, ?, ?, ?, ?, ?)",
+            (item_id, task_id, row[0], status, note, now)
+        )
+        return True
+
+    def update_status(self, item_id: str, status: str, note: Optional[str] = None,
+                      task_id: Optional[str] = None) -> bool:
+        """
+        Change the status of an item.
+
+        Returns:
+            True if the status changed, False if the item does not exist or
+            already had that status
+        """
+        if status not in ACTION_STATUSES:
+            raise ValueError(f"Invalid status: {status}")
+        with self._lock, self._conn:
+            return self._set_status(item_id, status, task_id, note, time.time())
+
+    def record_meeting(self, series: str, task_id: str, action_items: List[Dict],
+                       updates: List[Dict]) -> Dict[str, int]:
+        """
+        Apply one meeting's results to a series.
+
+        Args:
+            series: Series the meeting belongs to
+            task_id: ID of the meeting's task
+            action_items: New action items extracted from the meeting
+            updates: Status deltas for earlier items ({"itemId", "status", "note"})
+
+        Returns:
+            Counts of created items and applied status updates
+        """
+        now = time.time()
+        created = 0
+        applied = 0
+
+        with self._lock, self._conn:
+            for update in updates:
+                if update.get("status") in ACTION_STATUSES and self._set_status(
+                    update["itemId"], update["status"], task_id, update.get("note"), now
+                ):
+                    applied += 1
+
+            for item in action_items:
+                if not isinstance(item, dict) or not item.get("task"):
+                    continue
+                item_id = item.get("itemId") or str(uuid.uuid4())
+                existing = self._conn.execute(
+                    "SELECT series FROM action_items WHERE item_id = ?", (item_id,)
+                ).fetchone()
+                if existing and existing[0] != series:
+                    # Same wording in another series is a different commitment,
+                    # kept under an id scoped to this series so it recurs too
+                    item_id = f"{series}:{item['itemId']}"
+                    existing = self._conn.execute(
+                        "SELECT series FROM action_items WHERE item_id = ?", (item_id,)
+                    ).fetchone()
+                if existing:
+                    # Raised again: refresh its details but keep its status
+                    self._conn.execute(
+                        "UPDATE action_items SET assignee = COALESCE(NULLIF(?, ''), assignee), "
+                        "due_date = COALESCE(NULLIF(?, ''), due_date), updated_task_id = ?, updated_at = ? "
+                        "WHERE item_id = ?",
+                        (item.get("assignee"), item.get("dueDate"), task_id, now, item_id)
+                    )
+                    continue
+
+                self._conn.execute(
+                    "INSERT INTO action_items VALUES (?, ?, ?, ?, ?, 'open', ?, ?, ?, ?)",
+                    (item_id, series, item["task"], item.get("assignee"), item.get("dueDate"),
+                     task_id, task_id, now, now)
+                )
+                self._conn.execute(
+                    "INSERT INTO action_item_updates VALUES (?, ?, NULL, 'open', NULL, ?)",
+                    (item_id, task_id, now)
+                )
+                created += 1
+
+        logger.info(f"Series {series}: {created} new action items, {applied} status updates from task {task_id}")
+        return {"created": created, "updated": applied}
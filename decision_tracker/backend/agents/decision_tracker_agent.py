@@ -1,12 +1,22 @@
 import os
 import json
 import logging
+import threading
 import time
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 from dotenv import load_dotenv
 import whisper
 import groq
 
+from audio_io import SAMPLE_RATE, load_audio, quiet_split_points
+from transcript_store import compact_segments
+from diarization import DIARIZATION_ENABLED, assign_speakers, create_diarizer
+from model_policy import WHISPER_MODEL
+from languages import LANGUAGE_DETECT_MODEL, LANGUAGE_MIN_PROBABILITY
+from checkpoints import PIPELINE_CHUNK_SECONDS, TaskCheckpoint
+from onnx_whisper import WHISPER_ENGINE, WHISPER_ENGINES, load_model as load_onnx_model
+
 # Load environment variables
 load_dotenv()
 
@@ -17,6 +27,63 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Transcript returned for plain-text test files (see test_api.py)
+SAMPLE_TEST_TRANSCRIPT = """
+This is a test transcript for the decision tracker application.
+
+John: Good morning everyone. Let's get started with our Q3 roadmap planning meeting.
+
+Sarah: I think we should launch the new product by September 30th to capture the holiday market.
+
+Michael: I agree. Marketing will need an additional $50,000 budget to support this launch.
+
+John: That makes sense. Let's approve that budget increase.
+
+Sarah: I'm concerned about supply chain constraints that might delay manufacturing.
+
+John: Good point. Let's start the procurement process early.
+
+Michael: Can you have the engineering team finalize product specifications by July 15th?
+
+Sarah: Yes, and marketing team will prepare materials by August 1st.
+
+John: One question - should we include the premium feature in the initial release? It would increase development time but could justify a higher price point.
+
+Sarah: Let's discuss that in our next meeting after we get feedback from the focus group.
+
+John: Sounds good. Thanks everyone for your input.
+"""
+
+# Appended to the system prompt when the transcript carries speaker labels
+SPEAKER_LABELS_PROMPT = """
+        Each line of the transcript starts with a speaker label (S1, S2, ...) from speaker diarization.
+        Use the labels to attribute action items: if a speaker introduces themselves or is addressed by
+        name, use that name as the assignee, otherwise use the speaker label.
+        """
+
+# Appended to the system prompt, followed by the open items, when the meeting
+# belongs to a series with action items carried over from earlier meetings
+OPEN_ACTION_ITEMS_PROMPT = """
+        Action items still open from earlier meetings of this series are listed below as "ref: task (assignee)".
+        Do not repeat them in actionItems. If the transcript shows that the status of one of them changed,
+        add an "actionItemUpdates" array to the JSON with one entry per changed item:
+        {"ref": "A1", "status": "done | in_progress | blocked | dropped", "note": "string (optional)"}
+        Leave out items whose status is not discussed.
+
+        Open action items:
+        """
+
+# Appended to the system prompt for meetings that are not in English, with
+# the language name filled in
+ANALYSIS_LANGUAGE_PROMPT = """
+        The meeting was held in {language}. Write all values (summary, decisions, tasks, questions, ...)
+        in {language} so they match the wording used in the meeting. Keep the JSON keys in English exactly as shown.
+        """
+
+# "source" writes insights in the meeting's language, "en" always in English
+ANALYSIS_OUTPUT_LANGUAGE = os.getenv("ANALYSIS_OUTPUT_LANGUAGE", "source")
+
+
 class DecisionTrackerAgent:
     """
     An agent that processes meeting audio to extract key decision insights.
@@ -46,24 +113,29 @@ class DecisionTrackerAgent:
         model_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
         os.makedirs(model_dir, exist_ok=True)
         logger.info(f"Local model directory: {model_dir}")
+        self.model_dir = model_dir
         
-        # Initialize Whisper model for transcription (using "base" for faster processing)
-        # You can change to "medium" or "large" for better accuracy
-        logger.info("Loading Whisper 'base' model - this may take a moment...")
-        start_time = time.time()
+        # Whisper models are loaded on first use; the policy in model_policy.py
+        # picks a size per job, WHISPER_MODEL is loaded up front. WHISPER_ENGINE
+        # selects PyTorch or ONNX Runtime for transcription
+        if WHISPER_ENGINE not in WHISPER_ENGINES:
+            logger.warning(f"Unknown WHISPER_ENGINE '{WHISPER_ENGINE}', using PyTorch")
+        self._models: Dict[str, Any] = {}
+        self._model_locks: Dict[str, threading.Lock] = {}
+        # Guards the dicts only; each model is loaded under its own lock,
+        # so loading a large model does not block lookups of loaded ones
+        self._models_lock = threading.Lock()
+        self._loading_locks: Dict[str, threading.Lock] = {}
+        self.whisper_model = self.get_whisper_model(WHISPER_MODEL)
         
-        try:
-            # Set download directory for the model
-            os.environ["WHISPER_DOWNLOAD_ROOT"] = model_dir
-            self.whisper_model = whisper.load_model("base", download_root=model_dir)
-            logger.info(f"Model loaded successfully from {model_dir}")
-        except Exception as e:
-            logger.warning(f"Error loading model from local directory: {str(e)}")
-            logger.info("Falling back to default location")
-            self.whisper_model = whisper.load_model("base")
-            
-        load_time = time.time() - start_time
-        logger.info(f"Whisper model loaded successfully in {load_time:.2f} seconds")
+        # Optional speaker diarization, run on its own thread alongside Whisper
+        self.diarizer = None
+        if DIARIZATION_ENABLED:
+            try:
+                self.diarizer = create_diarizer()
+                self._diarization_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diarization")
+            except Exception as e:
+                logger.warning(f"Speaker diarization disabled: {str(e)}")
         
         # System prompt for decision tracking
         logger.info("Setting up system prompt for LLaMA")
@@ -123,16 +195,122 @@ class DecisionTrackerAgent:
         """
         logger.info("DecisionTrackerAgent initialization complete")
     
-    def transcribe_audio(self, audio_file_path: str) -> str:
+    @staticmethod
+    def _model_key(name: str, engine: str) -> str:
+        # Models of the configured engine are keyed by size alone
+        return name if engine == WHISPER_ENGINE else f"{engine}:{name}"
+    
+    def get_whisper_model(self, name: str, engine: str = WHISPER_ENGINE):
+        """
+        Return a Whisper model by size, loading it on first use.
+        
+        Args:
+            name: Model size ("tiny", "base", "small", "medium", "large")
+            engine: "torch", or "onnx" for an int8 ONNX Runtime export that
+                is created under the model directory on first use
+            
+        Returns:
+            The loaded Whisper model
+        """
+        key = self._model_key(name, engine)
+        with self._models_lock:
+            if key in self._models:
+                return self._models[key]
+            loading_lock = self._loading_locks.setdefault(key, threading.Lock())
+        
+        with loading_lock:
+            with self._models_lock:
+                if key in self._models:
+                    return self._models[key]
+            
+            logger.info(f"Loading Whisper '{name}' model - this may take a moment...")
+            start_time = time.time()
+            
+            model = None
+            if engine == "onnx":
+                try:
+                    model = load_onnx_model(name, self.model_dir)
+                except ImportError as e:
+                    logger.warning(f"{str(e)}; using PyTorch for Whisper '{name}'")
+            
+            if model is None:
+                try:
+                    # Set download directory for the model
+                    os.environ["WHISPER_DOWNLOAD_ROOT"] = self.model_dir
+                    model = whisper.load_model(name, download_root=self.model_dir)
+                    logger.info(f"Model loaded successfully from {self.model_dir}")
+                except Exception as e:
+                    logger.warning(f"Error loading model from local directory: {str(e)}")
+                    logger.info("Falling back to default location")
+                    model = whisper.load_model(name)
+            
+            load_time = time.time() - start_time
+            logger.info(f"Whisper model '{name}' loaded successfully in {load_time:.2f} seconds")
+            
+            # Whisper installs per-call hooks on the model while decoding (and
+            # the ONNX pipeline is not reentrant either), so one model must
+            # not run two transcriptions at the same time
+            with self._models_lock:
+                self._model_locks[key] = threading.Lock()
+                self._models[key] = model
+            return model
+    
+    def detect_language(self, audio) -> Tuple[str, float]:
         """
-        Transcribe an MP3 audio file using Whisper.
+        Detect the spoken language from the first 30 seconds with a small model.
+        
+        Detection always runs on PyTorch; it is a single encoder pass of
+        the small model, even when transcription runs on ONNX Runtime.
         
         Args:
-            audio_file_path: Path to the MP3 file
+            audio: Decoded 16 kHz mono audio
+            
+        Returns:
+            Language code and its probability
+        """
+        model = self.get_whisper_model(LANGUAGE_DETECT_MODEL, engine="torch")
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=model.dims.n_mels).to(model.device)
+        with self._model_locks[self._model_key(LANGUAGE_DETECT_MODEL, "torch")]:
+            _, probs = model.detect_language(mel)
+        language = max(probs, key=probs.get)
+        return language, float(probs[language])
+    
+    def transcribe_audio(self, audio_file_path: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Transcribe an audio file using Whisper.
+        
+        Args:
+            audio_file_path: Path to the audio file (MP3, WAV, M4A, Opus, ...)
+            options: Optional keyword arguments passed to Whisper's transcribe()
             
         Returns:
             Transcribed text
         """
+        return self.transcribe_audio_segments(audio_file_path, options)["text"]
+    
+    def transcribe_audio_segments(self, audio_file_path: str, options: Optional[Dict[str, Any]] = None,
+                                  model_name: Optional[str] = None,
+                                  checkpoint: Optional[TaskCheckpoint] = None) -> Dict[str, Any]:
+        """
+        Transcribe an audio file and keep Whisper's segment timing.
+        
+        Args:
+            audio_file_path: Path to the audio file (MP3, WAV, M4A, Opus, ...)
+            options: Optional keyword arguments passed to Whisper's transcribe()
+            model_name: Whisper model size to use (defaults to WHISPER_MODEL)
+            checkpoint: Checkpoints of the task; language detection,
+                diarization and (for long recordings) every transcribed
+                chunk are saved there and reused when the task runs again
+            
+        Without a "language" option, the language is detected first with
+        LANGUAGE_DETECT_MODEL so the (larger) transcription model does not
+        spend its first pass on detection.
+            
+        Returns:
+            Dict with the transcript "text", detected "language" and the
+            compact "segments" table (start, end, text, avg_logprob, words);
+            "languageDetection" holds the fast detection result if one ran
+        """
         logger.info(f"Starting transcription of audio file: {audio_file_path}")
         logger.info(f"File size: {os.path.getsize(audio_file_path) / (1024 * 1024):.2f} MB")
         
@@ -148,31 +326,7 @@ class DecisionTrackerAgent:
                     
                     if content.startswith("This is a test transcript"):
                         logger.info("Test transcript content detected. Using sample transcript.")
-                        return """
-                        This is a test transcript for the decision tracker application.
-                        
-                        John: Good morning everyone. Let's get started with our Q3 roadmap planning meeting.
-                        
-                        Sarah: I think we should launch the new product by September 30th to capture the holiday market.
-                        
-                        Michael: I agree. Marketing will need an additional $50,000 budget to support this launch.
-                        
-                        John: That makes sense. Let's approve that budget increase.
-                        
-                        Sarah: I'm concerned about supply chain constraints that might delay manufacturing.
-                        
-                        John: Good point. Let's start the procurement process early.
-                        
-                        Michael: Can you have the engineering team finalize product specifications by July 15th?
-                        
-                        Sarah: Yes, and marketing team will prepare materials by August 1st.
-                        
-                        John: One question - should we include the premium feature in the initial release? It would increase development time but could justify a higher price point.
-                        
-                        Sarah: Let's discuss that in our next meeting after we get feedback from the focus group.
-                        
-                        John: Sounds good. Thanks everyone for your input.
-                        """
+                        return {"text": SAMPLE_TEST_TRANSCRIPT, "language": "en", "segments": []}
             except Exception as e:
                 logger.warning(f"Error reading test file content: {str(e)}. Will try normal transcription.")
         
@@ -181,8 +335,43 @@ class DecisionTrackerAgent:
             logger.info("Processing audio through Whisper model...")
             start_time = time.time()
             
-            logger.info("Whisper is analyzing the audio...")
-            result = self.whisper_model.transcribe(audio_file_path)
+            # Decode in-process into a 16 kHz float32 buffer so Whisper does not
+            # spawn its own ffmpeg subprocess for every file
+            decode_start = time.time()
+            audio = load_audio(audio_file_path)
+            logger.info(f"Decoded {len(audio) / SAMPLE_RATE:.1f} seconds of audio in {time.time() - decode_start:.2f} seconds")
+            
+            # Diarize the same decoded buffer while Whisper runs
+            diarization_future = None
+            turns = checkpoint.get("diarization") if checkpoint is not None else None
+            if self.diarizer and turns is None:
+                diarization_future = self._diarization_executor.submit(self.diarizer.diarize, audio)
+            
+            model_name = model_name or WHISPER_MODEL
+            options = dict(options or {})
+            detection = checkpoint.get("language_detection") if checkpoint is not None else None
+            if detection is None and not options.get("language") and model_name != LANGUAGE_DETECT_MODEL:
+                try:
+                    detect_start = time.time()
+                    language, probability = self.detect_language(audio)
+                    detection = {"language": language, "probability": probability, "model": LANGUAGE_DETECT_MODEL}
+                    logger.info(f"Detected language {language} (p={probability:.2f}) in {time.time() - detect_start:.2f} seconds")
+                    if checkpoint is not None:
+                        checkpoint.put("language_detection", detection)
+                except Exception as e:
+                    logger.warning(f"Fast language detection failed, leaving it to Whisper: {str(e)}")
+            if detection and not options.get("language") and detection["probability"] >= LANGUAGE_MIN_PROBABILITY:
+                options["language"] = detection["language"]
+            
+            if checkpoint is not None and PIPELINE_CHUNK_SECONDS and len(audio) > PIPELINE_CHUNK_SECONDS * SAMPLE_RATE * 1.5:
+                result = self._transcribe_chunks(audio, options, model_name, checkpoint)
+                segments = result["segments"]
+            else:
+                model = self.get_whisper_model(model_name)
+                logger.info(f"Whisper '{model_name}' is analyzing the audio...")
+                with self._model_locks[model_name]:
+                    result = model.transcribe(audio, **options)
+                segments = compact_segments(result.get("segments", []))
             
             transcript = result["text"]
             transcription_time = time.time() - start_time
@@ -190,19 +379,97 @@ class DecisionTrackerAgent:
             logger.info(f"Transcription completed in {transcription_time:.2f} seconds")
             logger.info(f"Transcript length: {len(transcript)} characters")
             logger.debug(f"Transcript excerpt (first 150 chars): {transcript[:150]}...")
+            logger.info(f"Transcript has {len(segments)} segments")
             
-            return transcript
+            if diarization_future or turns:
+                try:
+                    if diarization_future:
+                        turns = diarization_future.result()
+                        if checkpoint is not None:
+                            checkpoint.put("diarization", turns)
+                    assign_speakers(segments, turns)
+                    speakers = {turn["speaker"] for turn in turns}
+                    logger.info(f"Diarization found {len(speakers)} speakers in {len(turns)} turns")
+                except Exception as e:
+                    logger.warning(f"Speaker diarization failed, continuing without speakers: {str(e)}")
+            
+            return {
+                "text": transcript,
+                "language": result.get("language"),
+                "segments": segments,
+                "model": model_name,
+                "languageDetection": detection
+            }
             
         except Exception as e:
             logger.error(f"Error transcribing audio: {str(e)}", exc_info=True)
             raise
     
-    def analyze_transcript(self, transcript: str) -> Dict[str, Any]:
+    def _transcribe_chunks(self, audio, options: Dict[str, Any], model_name: str,
+                           checkpoint: TaskCheckpoint) -> Dict[str, Any]:
+        """
+        Transcribe a long recording in chunks cut at quiet points.
+        
+        Every chunk is checkpointed as soon as it is done, so a task that is
+        interrupted and run again only transcribes the chunks it had not
+        finished. The chunk boundaries are checkpointed too, so they never
+        shift between runs.
+        
+        Returns:
+            Dict with the joined "text", the "language" and the "segments"
+            with timestamps relative to the whole recording
+        """
+        bounds = checkpoint.get("chunk_bounds")
+        if bounds is None:
+            bounds = quiet_split_points(audio, PIPELINE_CHUNK_SECONDS)
+            checkpoint.put("chunk_bounds", bounds)
+        
+        model = self.get_whisper_model(model_name)
+        language = options.get("language")
+        texts, segments = [], []
+        for i, (start, end) in enumerate(zip(bounds, bounds[1:])):
+            chunk = checkpoint.get(f"chunk:{i}")
+            if chunk is None:
+                chunk_options = dict(options, language=language)
+                # Carry the end of the previous chunk over as context, as
+                # Whisper does between its own 30-second windows
+                if texts and options.get("condition_on_previous_text", True) and not options.get("initial_prompt"):
+                    chunk_options["initial_prompt"] = texts[-1][-200:]
+                logger.info(f"Whisper '{model_name}' is analyzing chunk {i + 1}/{len(bounds) - 1} "
+                            f"({start / SAMPLE_RATE:.0f}-{end / SAMPLE_RATE:.0f} s)...")
+                with self._model_locks[model_name]:
+                    result = model.transcribe(audio[start:end], **chunk_options)
+                chunk = {
+                    "text": result["text"].strip(),
+                    "language": result.get("language"),
+                    "segments": compact_segments(result.get("segments", []), offset=start / SAMPLE_RATE),
+                }
+                checkpoint.put(f"chunk:{i}", chunk)
+            else:
+                logger.info(f"Chunk {i + 1}/{len(bounds) - 1} restored from checkpoint")
+            # Later chunks keep the language of the first one
+            language = language or chunk["language"]
+            texts.append(chunk["text"])
+            segments.extend(chunk["segments"])
+        
+        return {"text": " ".join(text for text in texts if text), "language": language, "segments": segments}
+    
+    def analyze_transcript(self, transcript: str, speaker_labels: bool = False,
+                           open_action_items: Optional[List[Dict]] = None,
+                           language: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze the transcript using LLaMA 70B via Groq API.
         
         Args:
             transcript: The text transcript from the audio
+            speaker_labels: Whether each line of the transcript starts with
+                a speaker label ("S1: ...") from diarization
+            open_action_items: Open items of the meeting series; when given,
+                the result also has "actionItemUpdates" with status deltas
+                as {"itemId", "status", "note"}
+            language: Language code of the meeting; for languages other
+                than English the insights are written in that language
+                (unless ANALYSIS_OUTPUT_LANGUAGE is "en")
             
         Returns:
             Structured insights about the meeting
@@ -278,13 +545,29 @@ class DecisionTrackerAgent:
             logger.info("Preparing request to Groq API with LLaMA model...")
             logger.info("Using model: llama3-70b-8192")
             
+            system_prompt = self.system_prompt
+            if speaker_labels:
+                system_prompt += SPEAKER_LABELS_PROMPT
+            if language and language != "en" and ANALYSIS_OUTPUT_LANGUAGE == "source":
+                language_name = whisper.tokenizer.LANGUAGES.get(language, language).title()
+                system_prompt += ANALYSIS_LANGUAGE_PROMPT.format(language=language_name)
+            
+            # Items are referred to by short refs (A1, A2, ...) rather than
+            # their ids to keep the prompt small
+            item_refs = {f"A{i + 1}": item["itemId"] for i, item in enumerate(open_action_items or [])}
+            if item_refs:
+                system_prompt += OPEN_ACTION_ITEMS_PROMPT + "\n".join(
+                    f"        {ref}: {item['task']} ({item.get('assignee') or 'Unassigned'})"
+                    for ref, item in zip(item_refs, open_action_items)
+                )
+            
             start_time = time.time()
             logger.info("Sending request to Groq API...")
             
             response = self.groq_client.chat.completions.create(
                 model="llama3-70b-8192",  # Use LLaMA 70B model
                 messages=[
-                    {"role": "system", "content": self.system_prompt},
+                    {"role": "system", "content": system_prompt},
                     {"role": "user", "content": f"Here is the meeting transcript to analyze:\n\n{transcript}"}
                 ],
                 temperature=0.2,  # Lower temperature for more focused, deterministic output
@@ -502,6 +785,19 @@ class DecisionTrackerAgent:
                     validated_questions.append(valid_item)
             validated_insights["unresolvedQuestions"] = validated_questions
             
+            # Map status deltas for open items back to their item ids
+            if open_action_items is not None:
+                validated_updates = []
+                updates = insights.get("actionItemUpdates")
+                for item in updates if isinstance(updates, list) else []:
+                    if isinstance(item, dict) and item.get("ref") in item_refs:
+                        update = {"itemId": item_refs[item["ref"]], "status": str(item.get("status", "")).lower()}
+                        if item.get("note"):
+                            update["note"] = str(item["note"])
+                        validated_updates.append(update)
+                validated_insights["actionItemUpdates"] = validated_updates
+                logger.info(f"Action Item Updates: {len(validated_updates)}")
+            
             logger.info("Transcript analysis completed successfully")
             return validated_insights
             
@@ -0,0 +1,285 @@
+import glob
+import logging
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Root of the partitioned Parquet tables
+DEFAULT_ANALYTICS_DIR = os.getenv("ANALYTICS_DIR", os.path.join("data", "analytics"))
+
+# Append completed meetings to the Parquet tables (needs pyarrow)
+ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED", "true").lower() == "true"
+
+# Allow ad-hoc read-only SQL through POST /analytics/query
+ANALYTICS_ALLOW_SQL = os.getenv("ANALYTICS_ALLOW_SQL", "false").lower() == "true"
+
+# A month partition holding more files than this is merged into one file
+ANALYTICS_COMPACT_FILES = int(os.getenv("ANALYTICS_COMPACT_FILES", "64"))
+
+# Rows returned by a query at most
+ANALYTICS_MAX_ROWS = int(os.getenv("ANALYTICS_MAX_ROWS", "10000"))
+
+# Tables, the insights section they are filled from, and their own columns
+# mapped to the item fields they come from
+ANALYTICS_TABLES = {
+    "decisions": ("decisionPoints", {"text": "decision", "timeline": "timeline", "rationale": "rationale"}),
+    "risks": ("risksConcernsRaised", {"text": "description", "severity": "severity", "mitigation": "mitigation"}),
+    "action_items": ("actionItems", {"text": "task", "assignee": "assignee", "due_date": "dueDate"}),
+    "questions": ("unresolvedQuestions", {"text": "question", "context": "context"}),
+}
+
+# Predefined dashboard queries; each takes the start of the period as its only parameter
+ANALYTICS_REPORTS = {
+    "decisions_per_week": """
+        SELECT COALESCE(tenant, series, 'unassigned') AS team, week, COUNT(*) AS decisions,
+               COUNT(DISTINCT task_id) AS meetings
+        FROM decisions WHERE meeting_time >= ? GROUP BY team, week ORDER BY week, team
+    """,
+    "risk_severity_trend": """
+        SELECT week, COALESCE(NULLIF(LOWER(TRIM(severity)), ''), 'unspecified') AS severity, COUNT(*) AS risks
+        FROM risks WHERE meeting_time >= ? GROUP BY week, severity ORDER BY week, severity
+    """,
+    "action_items_per_assignee": """
+        SELECT COALESCE(NULLIF(assignee, ''), 'Unassigned') AS assignee, COUNT(*) AS action_items,
+               COUNT(DISTINCT task_id) AS meetings
+        FROM action_items WHERE meeting_time >= ? GROUP BY assignee ORDER BY action_items DESC
+    """,
+    "open_action_items": """
+        SELECT COALESCE(series, 'unassigned') AS series, COALESCE(NULLIF(assignee, ''), 'Unassigned') AS assignee,
+               status, COUNT(*) AS action_items, MIN(to_timestamp(createdAt)) AS oldest
+        FROM action_status
+        WHERE status IN ('open', 'in_progress', 'blocked') AND createdAt >= epoch(?::TIMESTAMPTZ)
+        GROUP BY series, assignee, status ORDER BY action_items DESC
+    """,
+    "questions_per_week": """
+        SELECT COALESCE(tenant, series, 'unassigned') AS team, week, COUNT(*) AS questions
+        FROM questions WHERE meeting_time >= ? GROUP BY team, week ORDER BY week, team
+    """,
+}
+
+
+class AnalyticsUnavailable(RuntimeError):
+    """Raised when pyarrow or duckdb is not installed."""
+
+
+def _require(module: str):
+    try:
+        return __import__(module)
+    except ImportError:
+        raise AnalyticsUnavailable(f"Analytics needs the '{module}' package (pip install {module})")
+
+
+def _item_columns(item: Any, columns: Dict[str, str]) -> Dict[str, Optional[str]]:
+    if not isinstance(item, dict):
+        # Plain strings (older or fallback insights) only have the text
+        return {column: str(item) if column == "text" else None for column in columns}
+    return {
+        column: str(item[field]) if item.get(field) not in (None, "") else None
+        for column, field in columns.items()
+    }
+
+
+def _schema(table: str):
+    pa = _require("pyarrow")
+    columns = [
+        ("task_id", pa.string()), ("meeting_time", pa.timestamp("s", tz="UTC")), ("week", pa.date32()),
+        ("tenant", pa.string()), ("series", pa.string()), ("filename", pa.string()), ("position", pa.int32()),
+    ]
+    columns += [(column, pa.string()) for column in ANALYTICS_TABLES[table][1]]
+    return pa.schema(columns)
+
+
+class AnalyticsStore:
+    """
+    Columnar copy of the insights of all meetings, for dashboards.
+
+    Each completed meeting appends its decisions, risks, action items and
+    questions to one Parquet table per kind, partitioned by month
+    (<table>/month=YYYY-MM/<file>.parquet). Writes happen on a background
+    worker; once a month holds ANALYTICS_COMPACT_FILES files they are
+    merged so scans stay fast.
+
+    Queries run on an in-memory DuckDB connection that exposes every table
+    as a view over its Parquet files, plus the live action item statuses as
+    "action_status".
+    """
+
+    def __init__(self, root: str = DEFAULT_ANALYTICS_DIR,
+                 live_tables: Optional[Callable[[], Dict[str, List[Dict]]]] = None):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.live_tables = live_tables
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analytics-write")
+        self._readers = ThreadPoolExecutor(max_workers=2, thread_name_prefix="analytics-query")
+        self._partition_lock = threading.Lock()
+
+    # Writing
+
+    @staticmethod
+    def meeting_rows(task_id: str, insights: Dict[str, Any], meeting_time: float, tenant: Optional[str] = None,
+                     series: Optional[str] = None, filename: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """Flatten the insights of one meeting into rows per table."""
+        when = datetime.fromtimestamp(meeting_time, tz=timezone.utc)
+        week = (when - timedelta(days=when.weekday())).date()
+        rows: Dict[str, List[Dict]] = {}
+        for table, (section, columns) in ANALYTICS_TABLES.items():
+            rows[table] = [
+                {
+                    "task_id": task_id, "meeting_time": when, "week": week, "tenant": tenant, "series": series,
+                    "filename": filename, "position": position,
+                    **_item_columns(item, columns),
+                }
+                for position, item in enumerate(insights.get(section) or [])
+            ]
+        return rows
+
+    def export_meeting(self, task_id: str, insights: Dict[str, Any], meeting_time: float,
+                       tenant: Optional[str] = None, series: Optional[str] = None,
+                       filename: Optional[str] = None) -> Future:
+        """Append a completed meeting to the tables in the background."""
+        rows = self.meeting_rows(task_id, insights, meeting_time, tenant, series, filename)
+        future = self._writer.submit(self._write, task_id, rows, meeting_time)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future: Future):
+        if future.exception():
+            logger.warning(f"Failed to export meeting for analytics: {future.exception()}")
+
+    def _partition_dir(self, table: str, meeting_time: float) -> str:
+        month = datetime.fromtimestamp(meeting_time, tz=timezone.utc).strftime("%Y-%m")
+        return os.path.join(self.root, table, f"month={month}")
+
+    def _write(self, task_id: str, rows: Dict[str, List[Dict]], meeting_time: float):
+        pa = _require("pyarrow")
+        import pyarrow.parquet as pq
+
+        for table, table_rows in rows.items():
+            if not table_rows:
+                continue
+            directory = self._partition_dir(table, meeting_time)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{task_id}.parquet")
+            temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            pq.write_table(pa.Table.from_pylist(table_rows, schema=_schema(table)), temp_path, compression="zstd")
+            os.replace(temp_path, path)
+            self._compact_if_needed(table, directory)
+
+    def _compact_if_needed(self, table: str, directory: str):
+        files = sorted(glob.glob(os.path.join(directory, "*.parquet")))
+        if len(files) <= ANALYTICS_COMPACT_FILES:
+            return
+        import pyarrow.parquet as pq
+
+        with self._partition_lock:
+            merged = pq.ParquetDataset(files, schema=_schema(table)).read()
+            path = os.path.join(directory, f"part-{uuid.uuid4().hex}.parquet")
+            temp_path = f"{path}.tmp"
+            pq.write_table(merged, temp_path, compression="zstd")
+            os.replace(temp_path, path)
+            for file in files:
+                os.remove(file)
+        logger.info(f"Merged {len(files)} files of {directory} ({merged.num_rows} rows)")
+
+    def rebuild(self, meetings: Iterable[Tuple[str, Dict[str, Any], Dict[str, Any]]]) -> int:
+        """
+        Replace all tables with the given meetings.
+
+        Args:
+            meetings: (task_id, insights, meta) with meta holding meeting_time
+                and optionally tenant, series and filename
+
+        Returns:
+            Number of meetings exported
+        """
+        for table in ANALYTICS_TABLES:
+            shutil.rmtree(os.path.join(self.root, table), ignore_errors=True)
+        count = 0
+        for task_id, insights, meta in meetings:
+            self._write(task_id, self.meeting_rows(
+                task_id, insights, meta["meeting_time"], meta.get("tenant"), meta.get("series"), meta.get("filename")
+            ), meta["meeting_time"])
+            count += 1
+        return count
+
+    # Querying
+
+    def _connect(self, sql: str):
+        duckdb = _require("duckdb")
+        pa = _require("pyarrow")
+
+        con = duckdb.connect(":memory:")
+        for table in ANALYTICS_TABLES:
+            pattern = os.path.join(self.root, table, "*", "*.parquet")
+            if glob.glob(pattern):
+                con.execute(
+                    f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{pattern}', hive_partitioning = true, "
+                    f"union_by_name = true)"
+                )
+            else:
+                con.register(table, _schema(table).empty_table())
+        if self.live_tables is not None:
+            for name, rows in self.live_tables().items():
+                if name in sql:
+                    con.register(name, pa.Table.from_pylist(rows))
+        return con
+
+    def _run(self, sql: str, params: List[Any]) -> Dict[str, Any]:
+        con = self._connect(sql)
+        try:
+            cursor = con.execute(sql, params)
+            columns = [d[0] for d in cursor.description]
+            rows = cursor.fetchmany(ANALYTICS_MAX_ROWS + 1)
+        finally:
+            con.close()
+        return {
+            "columns": columns,
+            "rows": [[v.isoformat() if hasattr(v, "isoformat") else v for v in row] for row in rows[:ANALYTICS_MAX_ROWS]],
+            "truncated": len(rows) > ANALYTICS_MAX_ROWS,
+        }
+
+    def report(self, name: str, since: datetime) -> Future:
+        """Run a predefined report over meetings since a point in time."""
+        return self._readers.submit(self._run, ANALYTICS_REPORTS[name], [since])
+
+    def query(self, sql: str) -> Future:
+        """
+        Run ad-hoc SQL.
+
+        Only a single SELECT (or WITH ... SELECT) statement is accepted, but
+        DuckDB table functions can still read any file the server can, which
+        is why the endpoint is off unless ANALYTICS_ALLOW_SQL is set.
+        """
+        statement = sql.strip().rstrip(";")
+        if ";" in statement or statement.split(None, 1)[0].lower() not in ("select", "with"):
+            raise ValueError("Only a single SELECT statement is allowed")
+        return self._readers.submit(self._run, statement, [])
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {}
+        for table in ANALYTICS_TABLES:
+            files = glob.glob(os.path.join(self.root, table, "*", "*.parquet"))
+            stats[table] = {"files": len(files), "bytes": sum(os.path.getsize(f) for f in files)}
+        return stats
+
+
+if __name__ == "__main__":
+    # Rebuild the tables from the insight store:
+    #   python analytics.py
+    from insight_store import InsightStore
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    insight_store = InsightStore()
+    meetings = (
+        (meta["task_id"], insight_store.get(meta["task_id"]),
+         {**meta, "meeting_time": meta["meeting_time"] or meta["stored_at"]})
+        for meta in insight_store.list_meetings(limit=insight_store.count())
+    )
+    print(f"Exported {AnalyticsStore().rebuild(meetings)} meetings")
@@ -1,8 +1,12 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, Response
 import os
 import time
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import NamedTemporaryFile
 import uuid
 from typing import Dict, List, Optional
@@ -10,14 +14,31 @@ import json
 import logging
 from dotenv import load_dotenv
 from pydantic import BaseModel
-import subprocess
-import sys
-import signal
-import atexit
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Import our agent
 from agents.decision_tracker_agent import DecisionTrackerAgent
+from audio_io import MEDIA_FORMATS, SNIFF_BYTES, audio_duration, extract_audio_stream, sniff_file, sniff_format
+from transcript_store import TranscriptStore, map_insights_to_segments
+from diarization import format_speaker_transcript
+from search_index import DOCUMENT_KINDS, SearchIndex
+from insight_dedup import InsightDeduplicator
+from action_tracker import ACTION_STATUSES, ActionItemTracker
+from report_export import EXPORT_FORMATS, ReportExporter, report_key
+from meet_bot import MeetBotManager
+from janitor import Janitor
+from model_policy import WHISPER_IDLE_UPGRADE, ModelPolicy
+from whisper_options import TranscribeOptions, resolve_options
+from recording_catalog import RECORDING_STATES, RECORDINGS_DIR, RecordingWatcher, file_sha256, get_recording_catalog
+from languages import LANGUAGE_MIN_PROBABILITY, LanguageStore
+from work_queue import get_work_queue
+from checkpoints import PIPELINE_CHECKPOINTS, CheckpointStore, TaskCheckpoint
+from insight_store import InsightStore
+from analytics import ANALYTICS_ALLOW_SQL, ANALYTICS_ENABLED, ANALYTICS_REPORTS, AnalyticsStore, AnalyticsUnavailable
+from idempotency import (IDEMPOTENCY_KEY_MAX_LENGTH, REQUEST_COALESCING, IdempotencyConflict, IdempotencyStore,
+                         request_fingerprint)
+import jobs
+from http_utils import CompressionMiddleware, FastJSONResponse, etag_matches, http_date, not_modified
 
 # Import the FFmpeg check function
 from setup_ffmpeg import check_ffmpeg
@@ -44,7 +65,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
-app = FastAPI(title="Decision Tracker API")
+app = FastAPI(title="Decision Tracker API", default_response_class=FastJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -53,20 +74,507 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "Idempotent-Replayed"],
 )
 
+# Compress large JSON and text responses (brotli when available, else gzip)
+app.add_middleware(CompressionMiddleware)
+
 # In-memory storage for tracking processing tasks
 processing_tasks: Dict[str, Dict] = {}
 
+# In-memory storage for batches of processing tasks
+batch_tasks: Dict[str, Dict] = {}
+
+# Worker pool that runs the processing pipeline off the event loop.
+# Transcription is serialized inside the agent, so a second worker lets the
+# Groq analysis of one file overlap with the transcription of the next.
+PROCESSING_WORKERS = int(os.getenv("PROCESSING_WORKERS", "2"))
+processing_executor = ThreadPoolExecutor(max_workers=PROCESSING_WORKERS, thread_name_prefix="processing")
+
+# Picks the Whisper model, beam size and temperature fallback for each job
+model_policy = ModelPolicy(workers=PROCESSING_WORKERS)
+
+# Durable queue feeding separate worker processes (worker.py); None runs
+# the pipeline on processing_executor
+work_queue = get_work_queue()
+
+# Seconds between checks for jobs finished by worker processes
+WORK_QUEUE_SYNC_INTERVAL = float(os.getenv("WORK_QUEUE_SYNC_INTERVAL", "2"))
+
+# Whisper options used for bulk processing: a single greedy pass without
+# temperature fallback or conditioning on previous text trades a little
+# accuracy for much more predictable throughput
+BATCH_TRANSCRIBE_OPTIONS = TranscribeOptions(preset="fast")
+
+# Ask Whisper for word-level timestamps (slower, enables word-accurate seeking)
+TRANSCRIPT_WORD_TIMESTAMPS = os.getenv("TRANSCRIPT_WORD_TIMESTAMPS", "false").lower() == "true"
+
+# Plain-text files starting with one of these markers are accepted as test
+# uploads and bypass format detection (see test_api.py)
+TEST_FILE_MARKERS = (b"TEST_FILE", b"This is a test transcript")
+
+# Directory that server-side batch ingestion is allowed to read from
+BATCH_INGEST_ROOT = os.path.abspath(
+    os.getenv("BATCH_INGEST_ROOT", RECORDINGS_DIR)
+)
+
+# Index of the recordings in RECORDINGS_DIR and the watcher keeping it current
+recording_catalog = get_recording_catalog()
+recording_watcher: Optional[RecordingWatcher] = None
+
+# Headless browser pool joining Google Meet meetings, created on first use
+_meet_bot_manager: Optional[MeetBotManager] = None
+_meet_bot_lock = threading.Lock()
+
+# Shared agent so the Whisper model is loaded once per process
+_agent: Optional[DecisionTrackerAgent] = None
+_agent_lock = threading.Lock()
+
+
+def get_agent() -> DecisionTrackerAgent:
+    """Return the shared DecisionTrackerAgent, creating it on first use."""
+    global _agent
+    with _agent_lock:
+        if _agent is None:
+            _agent = DecisionTrackerAgent()
+        return _agent
+
+
+def get_meet_bot_manager() -> MeetBotManager:
+    """Return the shared MeetBotManager, creating it on first use."""
+    global _meet_bot_manager
+    with _meet_bot_lock:
+        if _meet_bot_manager is None:
+            _meet_bot_manager = MeetBotManager(output_dir=RECORDINGS_DIR, on_recording=submit_meeting_recording)
+        return _meet_bot_manager
+
+
+def submit_job(file_path: str, filename: Optional[str] = None, source: str = "recorder",
+               only_new: bool = False, **extra) -> Optional[str]:
+    """
+    Queue a server-side audio file on the worker pool like an upload.
+
+    This is the internal submission API: recorders and meeting bots in this
+    process call it through jobs.submit_audio_job, other local processes
+    through POST /internal/jobs. The file is processed in place.
+
+    The file is claimed in the recording catalog first, so a recording that
+    is already queued is not processed twice.
+
+    Args:
+        only_new: Skip files that were processed before (used on arrival)
+
+    Returns:
+        ID of the processing task, or None if only_new skipped the file
+    """
+    task_id = str(uuid.uuid4())
+    if not recording_catalog.claim(file_path, task_id, only_new=only_new):
+        queued = recording_catalog.get(file_path)
+        if queued and queued["state"] == "queued":
+            logger.info(f"{file_path} is already queued as task {queued['taskId']}")
+            return queued["taskId"]
+        return None
+
+    processing_tasks[task_id] = {
+        "status": "processing",
+        "filename": filename or os.path.basename(file_path),
+        "file_path": file_path,
+        "start_time": time.time(),
+        "original_format": sniff_file(file_path),
+        "source": source,
+        **extra
+    }
+    _start_task(task_id, catalogued=True)
+    logger.info(f"Queued {source} job {task_id} for {file_path}")
+    return task_id
+
+
+def _start_task(task_id: str, transcribe_options: Optional[TranscribeOptions] = None, catalogued: bool = False):
+    """
+    Hand a task in processing_tasks to the local worker pool, or to the
+    work queue when worker processes run the pipeline.
+
+    Args:
+        transcribe_options: Per-request Whisper options
+        catalogued: The file was claimed in the recording catalog, which
+            is told the outcome
+    """
+    task = processing_tasks[task_id]
+    task["catalogued"] = catalogued
+    fields = {key: value for key, value in task.items() if key != "transcribe_options"}
+    options = transcribe_options.model_dump(exclude_none=True) if transcribe_options is not None else None
+
+    if work_queue is not None:
+        work_queue.enqueue(task_id, fields, options)
+        return
+
+    # The queue is durable on its own; the local pool needs the task
+    # registered to pick it up again after a restart
+    if PIPELINE_CHECKPOINTS:
+        pipeline_checkpoints.register_task(task_id, fields, options)
+    if catalogued:
+        processing_executor.submit(_run_catalogued_task, task_id, task["file_path"])
+    else:
+        processing_executor.submit(run_processing_task, task_id, task["file_path"], transcribe_options)
+
+
+def _run_catalogued_task(task_id: str, file_path: str):
+    """Run a submitted job and record its outcome in the recording catalog."""
+    try:
+        run_processing_task(task_id, file_path)
+    finally:
+        recording_catalog.finish(task_id, processing_tasks.get(task_id, {}).get("status") == "completed")
+
+
+def resume_interrupted_tasks() -> List[str]:
+    """
+    Start the tasks that were running or queued when the server stopped.
+
+    They keep their task IDs, so each resumes after its last checkpointed
+    stage.
+
+    Returns:
+        IDs of the resumed tasks
+    """
+    if not PIPELINE_CHECKPOINTS:
+        return []
+    resumed = []
+    for record in pipeline_checkpoints.unfinished():
+        task_id, task = record["task_id"], record["task"]
+        options = TranscribeOptions(**record["options"]) if record["options"] else None
+        processing_tasks[task_id] = dict(task, status="processing", transcribe_options=options)
+        _start_task(task_id, options, catalogued=task.get("catalogued", False))
+        resumed.append(task_id)
+    if resumed:
+        logger.info(f"Resuming {len(resumed)} tasks interrupted by the last shutdown")
+    return resumed
+
+
+def _apply_queue_results():
+    """Copy the outcome of jobs finished by worker processes into processing_tasks."""
+    results = work_queue.unacknowledged_results()
+    for job in results:
+        # Tasks submitted before an API restart are rebuilt from the job
+        task = processing_tasks.setdefault(job["task_id"], job["task"])
+        task.update(job["result"])
+        if task.get("catalogued"):
+            recording_catalog.finish(job["task_id"], task["status"] == "completed")
+        logger.info(f"Task {job['task_id']} {task['status']} on a worker")
+    work_queue.acknowledge([job["task_id"] for job in results])
+
+
+_queue_sync_stop = threading.Event()
+
+
+def _queue_sync_loop():
+    while not _queue_sync_stop.wait(WORK_QUEUE_SYNC_INTERVAL):
+        try:
+            _apply_queue_results()
+        except Exception as e:
+            logger.error(f"Failed to collect work queue results: {str(e)}", exc_info=True)
+
+
+@app.on_event("startup")
+def start_queue_sync():
+    """Adopt jobs queued before a restart and follow the results of worker processes."""
+    if work_queue is None:
+        return
+    for job in work_queue.pending():
+        processing_tasks.setdefault(job["task_id"], dict(job["task"], status="processing"))
+    threading.Thread(target=_queue_sync_loop, name="queue-sync", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def stop_queue_sync():
+    _queue_sync_stop.set()
+
+
+jobs.register_submitter(submit_job)
+
+
+def submit_meeting_recording(file_path: str, meeting: Dict) -> str:
+    """Queue a finished meeting recording on the worker pool like an upload."""
+    return submit_job(file_path, source="meet", meeting_id=meeting.get("meeting_id"))
+
+
+@app.on_event("startup")
+def start_recording_watcher():
+    """Catalog recordings as they land and queue the ones not processed yet."""
+    global recording_watcher
+    # Queued jobs outlive the server when worker processes run them
+    if work_queue is None:
+        resumed = resume_interrupted_tasks()
+        interrupted = recording_catalog.requeue_interrupted(keep=resumed)
+        if interrupted:
+            logger.info(f"{interrupted} recordings were queued when the server stopped, queueing them again")
+    if os.getenv("RECORDINGS_WATCH", "true").lower() == "true":
+        recording_watcher = RecordingWatcher(
+            recording_catalog, RECORDINGS_DIR,
+            on_arrival=lambda path: submit_job(path, source="watcher", only_new=True)
+        )
+        recording_watcher.start()
+
+
+@app.on_event("shutdown")
+def stop_recording_watcher():
+    if recording_watcher is not None:
+        recording_watcher.stop()
+
+
+@app.on_event("startup")
+def start_janitor():
+    janitor.start()
+
+
+@app.on_event("shutdown")
+def stop_janitor():
+    janitor.stop()
+
+
+@app.on_event("startup")
+def prewarm_meet_bots():
+    """Log in browser sessions ahead of the first meeting when an account is configured."""
+    count = int(os.getenv("MEET_BOT_PREWARM", "0"))
+    if count > 0 and os.getenv("MEET_BOT_EMAIL"):
+        threading.Thread(
+            target=get_meet_bot_manager().pool.prewarm,
+            args=(os.getenv("MEET_BOT_EMAIL"), os.getenv("MEET_BOT_PASSWORD"), count),
+            daemon=True
+        ).start()
+
+
+def detect_upload_format(header: bytes) -> Optional[str]:
+    """Detect the media format of an upload from its first bytes."""
+    if header.startswith(TEST_FILE_MARKERS):
+        return "test"
+    return sniff_format(header)
+
+
+def _parse_transcribe_options(preset: Optional[str], options_json: Optional[str]) -> Optional[TranscribeOptions]:
+    """Build per-request Whisper options from the preset and JSON options form fields."""
+    if not preset and not options_json:
+        return None
+    try:
+        options = TranscribeOptions.model_validate_json(options_json) if options_json else TranscribeOptions()
+        return options.merged(TranscribeOptions(preset=preset)) if preset else options
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid transcription options: {str(e)}")
+
+
+async def _save_upload(file: UploadFile) -> Optional[Dict]:
+    """
+    Stream an uploaded file into the uploads directory.
+
+    The format is detected from the file content rather than its name and
+    the stored file gets the matching extension.
+
+    Args:
+        file: The uploaded file
+
+    Returns:
+        Dict with "filename", "file_path", "original_format" and "sha256"
+        (of the content), or None if the format is not supported
+    """
+    header = await file.read(SNIFF_BYTES)
+    media_format = detect_upload_format(header)
+    if media_format is None:
+        return None
+
+    digest = hashlib.sha256(header)
+
+    suffix = MEDIA_FORMATS.get(media_format, {}).get("extension", ".mp3")
+    temp_file = NamedTemporaryFile(delete=False, suffix=suffix, dir="uploads")
+
+    try:
+        # Copy in chunks so large uploads are never held in memory at once
+        with temp_file:
+            temp_file.write(header)
+            while True:
+                chunk = await file.read(1024 * 1024)
+                if not chunk:
+                    break
+                temp_file.write(chunk)
+                digest.update(chunk)
+    except Exception:
+        if os.path.exists(temp_file.name):
+            os.unlink(temp_file.name)
+        raise
+
+    return {
+        "filename": file.filename, "file_path": temp_file.name, "original_format": media_format,
+        "sha256": digest.hexdigest(),
+    }
+
+
 # Ensure uploads directory exists
 os.makedirs("uploads", exist_ok=True)
 logger.info(f"Uploads directory: {os.path.abspath('uploads')}")
 
+# Audio extracted from video containers, kept apart so it can expire sooner
+DERIVED_AUDIO_DIR = os.path.join("uploads", "derived")
+os.makedirs(DERIVED_AUDIO_DIR, exist_ok=True)
+
+# Persistent segment tables and insight time ranges
+transcript_store = TranscriptStore()
+
+# Full-text index over the insights and transcripts of all meetings
+search_index = SearchIndex()
+
+# Clusters of equivalent insight items across meetings
+insight_deduplicator = InsightDeduplicator()
+
+# Status of action items across the meetings of a recurring series
+action_tracker = ActionItemTracker()
+
+# Background renderer and disk cache for PDF/Markdown/CSV/JSON reports
+report_exporter = ReportExporter()
+
+# Tenant language pins and cached language detections
+language_store = LanguageStore()
+
+# Insights of finished tasks, kept on disk instead of in the task payloads
+insight_store = InsightStore()
+
+# Stage outputs of running tasks, so interrupted tasks resume where they stopped
+pipeline_checkpoints = CheckpointStore()
+
+# Partitioned Parquet tables of all insight items, queried with DuckDB
+analytics_store = AnalyticsStore(live_tables=lambda: {"action_status": action_tracker.list_items(limit=1000000)})
+
+# Idempotency keys and fingerprints of running submissions, so retries and
+# duplicate submissions attach to the task that is already there
+idempotency_store = IdempotencyStore()
+
+
+def _store_insights(task_id: str, insights: Dict):
+    task = processing_tasks[task_id]
+    insight_store.put(task_id, insights, filename=task.get("filename"), meeting_time=task.get("start_time"))
+    if ANALYTICS_ENABLED:
+        analytics_store.export_meeting(
+            task_id, insights, task["start_time"],
+            tenant=task.get("tenant"), series=task.get("series"), filename=task.get("filename")
+        )
+
+
+def _task_insights(task_id: str, task: Dict) -> Optional[Dict]:
+    """Insights of a completed task, read from the insight store."""
+    if task.get("status") != "completed":
+        return None
+    return insight_store.get(task_id)
+
+
+def _lookup_task(task_id: str) -> Optional[Dict]:
+    """
+    A task from memory, or a completed task rebuilt from the insight store
+    (e.g. one finished before the server restarted).
+    """
+    task = processing_tasks.get(task_id)
+    if task is not None:
+        return task
+    meta = insight_store.get_meta(task_id)
+    if meta is None:
+        return None
+    return {
+        "status": "completed",
+        "filename": meta["filename"],
+        "start_time": meta["meeting_time"] or meta["stored_at"],
+        "end_time": meta["stored_at"],
+    }
+
+def _task_running(task_id: str) -> bool:
+    task = processing_tasks.get(task_id)
+    return task is not None and task["status"] == "processing"
+
+
+def _idempotency_key(request: Request, scope: str) -> Optional[str]:
+    """The Idempotency-Key header of a request, scoped to its endpoint."""
+    key = request.headers.get("Idempotency-Key")
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail="Invalid Idempotency-Key header")
+    return f"{scope}:{key}"
+
+
+def _replayed(body: Dict) -> FastJSONResponse:
+    """Response for a submission answered with an existing task."""
+    return FastJSONResponse(body, headers={"Idempotent-Replayed": "true"})
+
+
+def _task_files_in_use() -> set:
+    """Files of tasks that are still being processed."""
+    return {task.get("file_path") for task in list(processing_tasks.values()) if task["status"] == "processing"}
+
+
+def _expire_task_payloads(cutoff: float):
+    """
+    Drop finished tasks (and batches left without tasks) from memory.
+
+    Their insights stay in the insight store, which expires on its own
+    retention (stored_insights).
+    """
+    expired = [
+        task_id for task_id, task in list(processing_tasks.items())
+        if task["status"] != "processing" and (task.get("end_time") or task["start_time"]) < cutoff
+    ]
+    freed = 0
+    for task_id in expired:
+        task = processing_tasks.pop(task_id, None)
+        if task is not None:
+            freed += len(json.dumps(task, default=str))
+    freed += pipeline_checkpoints.delete_before(cutoff)[1]
+    for batch_id, batch in list(batch_tasks.items()):
+        if not any(task_id in processing_tasks for task_id in batch["task_ids"]):
+            batch_tasks.pop(batch_id, None)
+    return len(expired), freed
+
+
+# Retention and quotas for uploads, temporary files, transcripts, task payloads and stored insights
+janitor = Janitor(
+    uploads_dir="uploads",
+    derived_dir=DERIVED_AUDIO_DIR,
+    temp_patterns=[
+        os.path.join(RECORDINGS_DIR, "temp_recording_*.wav"),
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "temp_gmeet_*.py"),
+        os.path.join(report_exporter.cache_dir, "*.tmp"),
+    ],
+    in_use=_task_files_in_use,
+    expire_transcripts=transcript_store.delete_before,
+    expire_insights=_expire_task_payloads,
+    expire_stored_insights=insight_store.delete_before,
+)
+
 # Pydantic model for Google Meet connection
 class GoogleMeetRequest(BaseModel):
     email: str
     password: str
     meeting_link: str
+    audio_device: Optional[str] = None
+
+# Pydantic model for server-side batch ingestion
+class BatchManifestRequest(BaseModel):
+    directory: Optional[str] = None
+    files: List[str] = []
+    recursive: bool = False
+    tenant: Optional[str] = None
+    transcribe_options: Optional[TranscribeOptions] = None
+
+# Pydantic model for a job handed over by another local process
+class InternalJobRequest(BaseModel):
+    file_path: str
+    filename: Optional[str] = None
+    source: str = "recorder"
+
+# Pydantic model for pinning a tenant's meeting language
+class LanguagePinRequest(BaseModel):
+    language: Optional[str] = None
+
+# Pydantic model for a manual action item status change
+class ActionItemUpdateRequest(BaseModel):
+    status: str
+    note: Optional[str] = None
 
 @app.get("/")
 async def root():
@@ -75,83 +583,138 @@ async def root():
 
 
 @app.post("/upload-audio")
-async def upload_audio(background_tasks: BackgroundTasks, 
-                       file: UploadFile = File(...)):
+async def upload_audio(request: Request,
+                       file: UploadFile = File(...),
+                       series: Optional[str] = Form(None),
+                       tenant: Optional[str] = Form(None),
+                       preset: Optional[str] = Form(None),
+                       transcribe_options: Optional[str] = Form(None)):
     """
-    Upload an MP3 audio file for processing.
+    Upload an audio or video recording for processing.
+    
+    The format is detected from the file content (MP3, WAV, M4A, Opus, WebM,
+    MP4, ...). The file will be processed in the background and insights
+    extracted. Recordings of a recurring meeting can pass the same series
+    name to have open action items from earlier meetings followed up.
+    Meetings of a tenant use the tenant's pinned language, if any.
     
-    The file will be processed in the background and insights extracted.
+    Transcription can be tuned with a preset ("fast", "balanced",
+    "accurate") and/or transcribe_options, a JSON object of
+    TranscribeOptions fields (language, beam_size, temperature, ...).
+    
+    Retries sent with the same Idempotency-Key header get the task of the
+    first request. An upload of the same audio with the same options as a
+    task that is still processing attaches to that task instead of running
+    the pipeline again. Both are answered with an Idempotent-Replayed header.
     """
     start_time = time.time()
+    options = _parse_transcribe_options(preset, transcribe_options)
+    idempotency_key = _idempotency_key(request, "upload-audio")
+    series = series.strip() if series and series.strip() else None
+    tenant = tenant.strip() if tenant and tenant.strip() else None
     logger.info(f"Received upload request for file: {file.filename}")
     logger.info(f"Content type: {file.content_type}")
     
-    # Validate file type
-    if not file.filename.endswith('.mp3'):
-        logger.warning(f"Invalid file type: {file.filename}")
-        raise HTTPException(status_code=400, detail="Only MP3 files are supported")
-    
     # Generate a unique ID for this processing task
     task_id = str(uuid.uuid4())
     logger.info(f"Generated task ID: {task_id}")
-    
-    # Save the uploaded file
-    temp_file = NamedTemporaryFile(delete=False, suffix='.mp3', dir="uploads")
-    temp_file_path = temp_file.name
-    logger.info(f"Saving file to: {temp_file_path}")
+    temp_file_path = None
     
     try:
-        # Write the file content
-        with open(temp_file_path, "wb") as f:
-            logger.info("Reading file content...")
-            content = await file.read()
-            logger.info(f"File size: {len(content) / (1024 * 1024):.2f} MB")
-            f.write(content)
-            logger.info("File saved successfully")
+        # Save the uploaded file, validating its format from the content
+        logger.info("Reading file content...")
+        saved = await _save_upload(file)
+        if saved is None:
+            logger.warning(f"Unsupported file format: {file.filename}")
+            raise HTTPException(status_code=400, detail="Unsupported audio format")
+        
+        temp_file_path = saved["file_path"]
+        logger.info(f"Detected format: {saved['original_format']}")
+        logger.info(f"File saved to: {temp_file_path}")
+        logger.info(f"File size: {os.path.getsize(temp_file_path) / (1024 * 1024):.2f} MB")
+        
+        # Attach to the task of an earlier try or of the same upload still running
+        fingerprint = request_fingerprint(
+            sha256=saved["sha256"], series=series, tenant=tenant,
+            options=options.model_dump(exclude_none=True) if options is not None else None
+        )
+        try:
+            owner, claimed = idempotency_store.claim(
+                task_id, fingerprint, key=idempotency_key, coalesce=REQUEST_COALESCING, is_running=_task_running
+            )
+        except IdempotencyConflict as e:
+            os.unlink(temp_file_path)
+            raise HTTPException(status_code=422, detail=str(e))
+        if not claimed:
+            os.unlink(temp_file_path)
+            existing = _lookup_task(owner)
+            logger.info(f"Upload of {file.filename} attached to task {owner}")
+            return _replayed({"task_id": owner, "status": existing["status"] if existing else "processing"})
         
         # Store task information
         processing_tasks[task_id] = {
             "status": "processing",
             "filename": file.filename,
             "file_path": temp_file_path,
-            "insights": None,
-            "start_time": time.time()
+            "start_time": time.time(),
+            "original_format": saved["original_format"],
+            "content_type": file.content_type,
+            "source": "upload",
+            "series": series,
+            "tenant": tenant,
+            "transcribe_options": options
         }
         logger.info(f"Task {task_id} initialized and set to processing status")
         
         # Process the audio file in the background
-        logger.info(f"Adding background task to process file: {temp_file_path}")
-        background_tasks.add_task(
-            process_audio_file, 
-            task_id=task_id, 
-            file_path=temp_file_path
-        )
-        logger.info("Background task added successfully")
+        logger.info(f"Queueing processing of file: {temp_file_path}")
+        _start_task(task_id, options)
         
         processing_time = time.time() - start_time
         logger.info(f"Upload handling completed in {processing_time:.2f} seconds")
         return {"task_id": task_id, "status": "processing"}
     
+    except HTTPException:
+        raise
     except Exception as e:
         # Clean up in case of error
-        if os.path.exists(temp_file_path):
+        if temp_file_path and os.path.exists(temp_file_path):
             logger.info(f"Cleaning up temporary file: {temp_file_path}")
             os.unlink(temp_file_path)
+        idempotency_store.release(task_id)
         logger.error(f"Error processing audio upload: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error processing upload: {str(e)}")
 
 
 @app.get("/task/{task_id}")
-async def get_task_status(task_id: str):
-    """Get the status of a processing task."""
-    logger.info(f"Status request for task: {task_id}")
+async def get_task_status(task_id: str, request: Request, fields: Optional[str] = None):
+    """
+    Get the status of a processing task.
     
-    if task_id not in processing_tasks:
+    Pass fields=status (or a comma-separated list of response keys) for a
+    lightweight poll. Responses carry an ETag and Last-Modified derived from
+    the task state, so unchanged polls are answered with 304 without
+    building the payload.
+    """
+    task = _lookup_task(task_id)
+    if task is None:
         logger.warning(f"Task not found: {task_id}")
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task = processing_tasks[task_id]
+    # The response only changes when the task finishes or fails, which
+    # always sets the status and (on completion) the end time, and when the
+    # transcription model is chosen or upgraded
+    transcription = task.get("transcription") or {}
+    last_modified = transcription.get("upgradedAt") or task.get("end_time") or task["start_time"]
+    version = (f"{task_id}|{task['status']}|{last_modified}|{task.get('error', '')}|"
+               f"{transcription.get('model', '')}|{fields or ''}")
+    etag = f'W/"{hashlib.sha1(version.encode()).hexdigest()}"'
+    headers = {"ETag": etag, "Last-Modified": http_date(last_modified), "Cache-Control": "private, no-cache"}
+    if not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    
     logger.info(f"Task {task_id} status: {task['status']}")
+    wanted = {f.strip() for f in fields.split(",") if f.strip()} if fields else None
     
     # Return task status and insights if available
     response = {
@@ -160,34 +723,521 @@ async def get_task_status(task_id: str):
         "filename": task["filename"]
     }
     
-    if task["status"] == "completed" and task["insights"]:
-        logger.info(f"Returning insights for task: {task_id}")
-        response["insights"] = task["insights"]
-        
-        # Add processing time if available
-        if "end_time" in task and "start_time" in task:
-            processing_time = task["end_time"] - task["start_time"]
-            logger.info(f"Total processing time: {processing_time:.2f} seconds")
-            response["processing_time_seconds"] = round(processing_time, 2)
+    if task.get("original_format"):
+        response["original_format"] = task["original_format"]
+    
+    if transcription:
+        response["transcription"] = transcription
+    
+    if task["status"] == "completed" and (wanted is None or "insights" in wanted):
+        insights = _task_insights(task_id, task)
+        if insights:
+            response["insights"] = insights
+    
+    # Add processing time if available
+    if task["status"] == "completed" and "end_time" in task and "start_time" in task:
+        response["processing_time_seconds"] = round(task["end_time"] - task["start_time"], 2)
     
     # Include error information if task failed
     if task["status"] == "failed" and "error" in task:
         logger.info(f"Task failed with error: {task['error']}")
         response["error"] = task["error"]
     
-    return response
+    if wanted is not None:
+        response = {key: value for key, value in response.items() if key == "task_id" or key in wanted}
+    
+    return FastJSONResponse(response, headers=headers)
+
+
+@app.get("/task/{task_id}/transcript")
+async def get_task_transcript(task_id: str, start: Optional[float] = None, end: Optional[float] = None,
+                              words: bool = False):
+    """
+    Get the transcript segments of a task, optionally limited to a time range.
+
+    Only the segments overlapping [start, end) are read from the store, so
+    slices of long meetings are cheap.
+    """
+    info = transcript_store.get_transcript_info(task_id)
+    if info is None:
+        logger.warning(f"Transcript not found for task: {task_id}")
+        raise HTTPException(status_code=404, detail="Transcript not found")
+
+    if start is not None and end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end must be greater than start")
+
+    return {
+        "task_id": task_id,
+        **info,
+        "segments": transcript_store.get_segments(task_id, start, end, include_words=words)
+    }
+
+
+@app.get("/task/{task_id}/insight-spans")
+async def get_task_insight_spans(task_id: str):
+    """Get the transcript time range of each decision, risk, action item and question."""
+    if transcript_store.get_transcript_info(task_id) is None:
+        logger.warning(f"Transcript not found for task: {task_id}")
+        raise HTTPException(status_code=404, detail="Transcript not found")
+
+    return {"task_id": task_id, "spans": transcript_store.get_insight_spans(task_id)}
+
+
+@app.get("/search")
+async def search_meetings(q: str, kind: Optional[str] = None, task_id: Optional[str] = None,
+                          limit: int = 20, offset: int = 0):
+    """
+    Search decisions, risks, action items, questions, summaries and
+    transcript segments across all processed meetings.
+
+    kind takes a comma-separated list of document kinds to search in.
+    """
+    kinds = [k.strip() for k in kind.split(",") if k.strip()] if kind else None
+    unknown = [k for k in kinds or [] if k not in DOCUMENT_KINDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown kind(s): {', '.join(unknown)}")
+    if not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+
+    start_time = time.time()
+    hits = search_index.search(q, kinds=kinds, task_id=task_id, limit=limit, offset=max(offset, 0))
+    search_time = (time.time() - start_time) * 1000
+    logger.info(f"Search for '{q}' returned {len(hits)} hits in {search_time:.1f} ms")
+
+    return {"query": q, "hits": hits, "took_ms": round(search_time, 1)}
+
+
+@app.get("/meetings")
+async def list_meetings(limit: int = 50, offset: int = 0):
+    """List processed meetings, newest first, with their summary and item counts."""
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+    return {"total": insight_store.count(), "meetings": insight_store.list_meetings(limit, max(offset, 0))}
+
+
+# Pydantic model for ad-hoc analytics queries
+class AnalyticsQueryRequest(BaseModel):
+    sql: str
+
+
+async def _analytics_result(future_factory) -> Dict:
+    start_time = time.time()
+    try:
+        result = await asyncio.wrap_future(future_factory())
+    except AnalyticsUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.warning(f"Analytics query failed: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Query failed: {str(e)}")
+    return {**result, "took_ms": round((time.time() - start_time) * 1000, 1)}
+
+
+@app.get("/analytics")
+async def get_analytics_info():
+    """List the analytics tables and predefined reports."""
+    return {"enabled": ANALYTICS_ENABLED, "tables": analytics_store.get_stats(), "reports": list(ANALYTICS_REPORTS),
+            "sql": ANALYTICS_ALLOW_SQL}
+
+
+@app.get("/analytics/reports/{name}")
+async def get_analytics_report(name: str, days: int = 365):
+    """
+    Run a predefined dashboard report over the meetings of the last days.
+
+    Reports: decisions and questions per team per week, risk severity per
+    week, action items per assignee and currently open action items.
+    """
+    if name not in ANALYTICS_REPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown report. Use one of: {', '.join(ANALYTICS_REPORTS)}")
+    since = datetime.now().astimezone() - timedelta(days=max(days, 1))
+    return await _analytics_result(lambda: analytics_store.report(name, since))
+
+
+@app.post("/analytics/query")
+async def run_analytics_query(request: AnalyticsQueryRequest):
+    """Run a read-only SQL query over the analytics tables (ANALYTICS_ALLOW_SQL)."""
+    if not ANALYTICS_ALLOW_SQL:
+        raise HTTPException(status_code=403, detail="Ad-hoc analytics queries are disabled")
+    return await _analytics_result(lambda: analytics_store.query(request.sql))
+
+
+@app.get("/items/recurring")
+async def get_recurring_items(kind: Optional[str] = None, min_occurrences: int = 2, limit: int = 50):
+    """List decisions, risks, action items or questions that came up in several meetings."""
+    return {"items": insight_deduplicator.get_recurring_items(kind, max(min_occurrences, 1), min(limit, 500))}
+
+
+@app.get("/items/{item_id}")
+async def get_item_history(item_id: str):
+    """Get an insight item and every meeting it was mentioned in."""
+    history = insight_deduplicator.get_item_history(item_id)
+    if history is None:
+        logger.warning(f"Item not found: {item_id}")
+        raise HTTPException(status_code=404, detail="Item not found")
+    return history
+
+
+@app.get("/action-items")
+async def list_action_items(series: Optional[str] = None, status: Optional[str] = None,
+                            open_only: bool = False, limit: int = 200):
+    """List tracked action items, optionally only the open ones of a series."""
+    if status and status not in ACTION_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Use one of: {', '.join(ACTION_STATUSES)}")
+    return {"items": action_tracker.list_items(series, status, open_only, min(max(limit, 1), 1000))}
+
+
+@app.get("/action-items/{item_id}")
+async def get_action_item(item_id: str):
+    """Get a tracked action item and its status history."""
+    item = action_tracker.get_item(item_id)
+    if item is None:
+        logger.warning(f"Action item not found: {item_id}")
+        raise HTTPException(status_code=404, detail="Action item not found")
+    return item
+
+
+@app.patch("/action-items/{item_id}")
+async def update_action_item(item_id: str, request: ActionItemUpdateRequest):
+    """Change the status of a tracked action item by hand."""
+    if request.status not in ACTION_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Use one of: {', '.join(ACTION_STATUSES)}")
+    if action_tracker.get_item(item_id) is None:
+        raise HTTPException(status_code=404, detail="Action item not found")
+    action_tracker.update_status(item_id, request.status, request.note)
+    return action_tracker.get_item(item_id)
+
+
+async def _export_response(request: Request, meetings: List[Dict], fmt: str, name: str) -> Response:
+    """
+    Serve a report of some meetings, rendering it on the export worker.
 
+    The ETag is the hash of the report content, so a client holding the
+    current version gets a 304 without anything being rendered or read.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Use one of: {', '.join(EXPORT_FORMATS)}")
+
+    key = report_key(meetings, fmt)
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        path = await asyncio.wrap_future(report_exporter.export(meetings, fmt, key))
+    except Exception as e:
+        logger.error(f"Error rendering {fmt} report: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error rendering report: {str(e)}")
+
+    media_type, extension = EXPORT_FORMATS[fmt]
+    return FileResponse(path, media_type=media_type, filename=f"{name}.{extension}", headers=headers)
+
+
+@app.get("/task/{task_id}/export")
+async def export_task(task_id: str, request: Request, format: str = "pdf"):
+    """Download the insights of a completed task as a PDF, Markdown, CSV or JSON report."""
+    task = _lookup_task(task_id)
+    if task is None:
+        logger.warning(f"Task not found: {task_id}")
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    insights = _task_insights(task_id, task)
+    if not insights:
+        raise HTTPException(status_code=409, detail="Task has no insights yet")
+
+    meeting = {
+        "task_id": task_id,
+        "filename": task.get("filename"),
+        "meeting_time": task.get("start_time"),
+        "insights": insights
+    }
+    return await _export_response(request, [meeting], format, f"meeting-insights-{task_id[:8]}")
+
+
+@app.get("/batch/{batch_id}/export")
+async def export_batch(batch_id: str, request: Request, format: str = "pdf"):
+    """Download one report covering every completed task of a batch."""
+    if batch_id not in batch_tasks:
+        logger.warning(f"Batch not found: {batch_id}")
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    meetings = []
+    for task_id in batch_tasks[batch_id]["task_ids"]:
+        task = processing_tasks.get(task_id, {})
+        insights = _task_insights(task_id, task)
+        if insights:
+            meetings.append({
+                "task_id": task_id,
+                "filename": task.get("filename"),
+                "meeting_time": task.get("start_time"),
+                "insights": insights
+            })
+
+    if not meetings:
+        raise HTTPException(status_code=409, detail="Batch has no completed tasks yet")
+    return await _export_response(request, meetings, format, f"batch-insights-{batch_id[:8]}")
+
+
+def _create_batch(items: List[Dict], rejected: List[Dict], source: str,
+                  transcribe_options: Optional[TranscribeOptions] = None, tenant: Optional[str] = None) -> Dict:
+    """
+    Register a batch of audio files and queue them on the worker pool.
+
+    Args:
+        items: Dicts with "filename" and "file_path" for each accepted file
+        rejected: Dicts with "filename" and "error" for each rejected file
+        source: Where the files came from ("upload" or "manifest")
+        transcribe_options: Whisper options for every file (defaults to the
+            fast preset)
+        tenant: Tenant the files belong to (selects its pinned language)
+
+    Returns:
+        Summary of the created batch
+    """
+    batch_id = str(uuid.uuid4())
+    task_ids = []
+
+    for item in items:
+        task_id = str(uuid.uuid4())
+        processing_tasks[task_id] = {
+            "status": "processing",
+            "filename": item["filename"],
+            "file_path": item["file_path"],
+            "start_time": time.time(),
+            "batch_id": batch_id,
+            "original_format": item.get("original_format"),
+            "source": source,
+            "tenant": tenant
+        }
+        task_ids.append(task_id)
+
+    batch_tasks[batch_id] = {
+        "task_ids": task_ids,
+        "rejected": rejected,
+        "source": source,
+        "start_time": time.time()
+    }
+    logger.info(f"Batch {batch_id} created with {len(task_ids)} tasks ({len(rejected)} rejected)")
+
+    # Queue every item on the shared worker pool; the agent (and its Whisper
+    # model) is loaded once and reused for the whole batch
+    for task_id in task_ids:
+        _start_task(task_id, transcribe_options or BATCH_TRANSCRIBE_OPTIONS)
+
+    return {
+        "batch_id": batch_id,
+        "status": "processing",
+        "task_ids": task_ids,
+        "rejected": rejected
+    }
+
+
+def _batch_progress(batch_id: str) -> Dict:
+    """Aggregate the status of every task in a batch."""
+    batch = batch_tasks[batch_id]
+    counts = {"processing": 0, "completed": 0, "failed": 0}
+
+    for task_id in batch["task_ids"]:
+        status = processing_tasks.get(task_id, {}).get("status", "failed")
+        counts[status] = counts.get(status, 0) + 1
+
+    total = len(batch["task_ids"])
+    finished = counts["completed"] + counts["failed"]
+    progress = {
+        "batch_id": batch_id,
+        "status": "completed" if finished == total else "processing",
+        "total": total,
+        "counts": counts,
+        "progress": round(finished / total, 4) if total else 1.0,
+        "rejected": batch["rejected"]
+    }
+
+    if finished == total and total:
+        end_times = [processing_tasks[task_id].get("end_time") for task_id in batch["task_ids"]
+                     if task_id in processing_tasks]
+        end_times = [t for t in end_times if t]
+        if end_times:
+            progress["processing_time_seconds"] = round(max(end_times) - batch["start_time"], 2)
+
+    return progress
+
+
+@app.post("/upload-audio/batch")
+async def upload_audio_batch(files: List[UploadFile] = File(...),
+                             tenant: Optional[str] = Form(None),
+                             preset: Optional[str] = Form(None),
+                             transcribe_options: Optional[str] = Form(None)):
+    """
+    Upload several audio or video recordings for processing as one batch.
+
+    Each file becomes a regular processing task. Use /batch/{batch_id} to
+    follow progress and /batch/{batch_id}/results to export all insights.
+    Transcription options work as for /upload-audio.
+    """
+    logger.info(f"Received batch upload request with {len(files)} files")
+    options = _parse_transcribe_options(preset, transcribe_options)
+
+    items = []
+    rejected = []
+
+    for file in files:
+        try:
+            saved = await _save_upload(file)
+        except Exception as e:
+            logger.error(f"Error saving batch file {file.filename}: {str(e)}", exc_info=True)
+            rejected.append({"filename": file.filename, "error": f"Error saving file: {str(e)}"})
+            continue
+
+        if saved is None:
+            logger.warning(f"Unsupported file format in batch: {file.filename}")
+            rejected.append({"filename": file.filename, "error": "Unsupported audio format"})
+            continue
+
+        items.append(saved)
+
+    if not items:
+        raise HTTPException(status_code=400, detail="No supported audio files in batch")
 
-async def process_audio_file(task_id: str, file_path: str):
+    return _create_batch(items, rejected, source="upload", transcribe_options=options, tenant=tenant or None)
+
+
+@app.post("/batch/manifest")
+async def create_batch_from_manifest(request: BatchManifestRequest):
+    """
+    Create a batch from audio files that already exist on the server.
+
+    Files can be listed explicitly and/or collected from a directory. All
+    paths must be inside BATCH_INGEST_ROOT and are processed in place.
+    """
+    logger.info(f"Received batch manifest request: directory={request.directory}, files={len(request.files)}")
+
+    def resolve(path: str) -> Optional[str]:
+        full_path = os.path.abspath(os.path.join(BATCH_INGEST_ROOT, path))
+        if os.path.commonpath([full_path, BATCH_INGEST_ROOT]) != BATCH_INGEST_ROOT:
+            return None
+        return full_path
+
+    candidates = list(request.files)
+
+    if request.directory is not None:
+        directory = resolve(request.directory)
+        if not directory or not os.path.isdir(directory):
+            raise HTTPException(status_code=400, detail=f"Directory not found: {request.directory}")
+
+        if request.recursive:
+            for dirpath, _, filenames in os.walk(directory):
+                candidates.extend(os.path.join(dirpath, f) for f in sorted(filenames))
+        else:
+            with os.scandir(directory) as entries:
+                candidates.extend(sorted(entry.path for entry in entries if entry.is_file()))
+
+    items = []
+    rejected = []
+    seen = set()
+
+    for candidate in candidates:
+        full_path = resolve(candidate)
+        if not full_path:
+            rejected.append({"filename": candidate, "error": "Path is outside the ingest directory"})
+        elif not os.path.isfile(full_path):
+            rejected.append({"filename": candidate, "error": "File not found"})
+        elif full_path not in seen:
+            seen.add(full_path)
+            media_format = sniff_file(full_path)
+            if media_format is None:
+                # Directory listings may contain anything; only report explicit files
+                if candidate in request.files:
+                    rejected.append({"filename": candidate, "error": "Unsupported audio format"})
+                continue
+            items.append({
+                "filename": os.path.basename(full_path),
+                "file_path": full_path,
+                "original_format": media_format
+            })
+
+    if not items:
+        raise HTTPException(status_code=400, detail="No supported audio files found for batch")
+
+    return _create_batch(items, rejected, source="manifest", transcribe_options=request.transcribe_options,
+                         tenant=request.tenant)
+
+
+@app.get("/batch/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """Get the aggregated progress of a batch."""
+    if batch_id not in batch_tasks:
+        logger.warning(f"Batch not found: {batch_id}")
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    return _batch_progress(batch_id)
+
+
+@app.get("/batch/{batch_id}/results")
+async def get_batch_results(batch_id: str):
+    """Export the status and insights of every task in a batch."""
+    if batch_id not in batch_tasks:
+        logger.warning(f"Batch not found: {batch_id}")
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    results = []
+    for task_id in batch_tasks[batch_id]["task_ids"]:
+        task = processing_tasks.get(task_id, {})
+        result = {
+            "task_id": task_id,
+            "filename": task.get("filename"),
+            "status": task.get("status", "failed"),
+            "insights": _task_insights(task_id, task)
+        }
+        if "error" in task:
+            result["error"] = task["error"]
+        if "end_time" in task and "start_time" in task:
+            result["processing_time_seconds"] = round(task["end_time"] - task["start_time"], 2)
+        results.append(result)
+
+    return {**_batch_progress(batch_id), "results": results}
+
+
+def run_processing_task(task_id: str, file_path: str, transcribe_options: Optional[TranscribeOptions] = None):
     """
-    Process an audio file to extract insights.
+    Run the full processing pipeline for a task on the calling thread.
+    
+    With PIPELINE_CHECKPOINTS, every stage saves its output under the task
+    ID and a task that runs again (after a crash, a restart or a redelivery
+    from the work queue) skips the stages it already finished.
     
-    This function runs in the background after file upload.
+    Args:
+        task_id: ID of the task in processing_tasks
+        file_path: Path to the audio file
+        transcribe_options: Optional Whisper options for this task, applied
+            on top of the preset and global options
     """
+    checkpoint = pipeline_checkpoints.for_task(task_id) if PIPELINE_CHECKPOINTS else None
+    try:
+        _run_pipeline(task_id, file_path, transcribe_options, checkpoint)
+    finally:
+        # Only a task that never got to finish keeps its checkpoints
+        if checkpoint is not None and processing_tasks.get(task_id, {}).get("status") != "processing":
+            pipeline_checkpoints.finish(task_id)
+
+
+def _run_pipeline(task_id: str, file_path: str, transcribe_options: Optional[TranscribeOptions],
+                  checkpoint: Optional[TaskCheckpoint]):
     try:
         logger.info(f"===== STARTING PROCESSING TASK: {task_id} =====")
         logger.info(f"Processing audio file: {file_path}")
         
+        # A resumed task continues from the audio extracted by its first run
+        # (the uploaded container may already be gone)
+        extracted = checkpoint.get("extract") if checkpoint is not None else None
+        if extracted and os.path.exists(extracted["audioPath"]):
+            logger.info(f"Resuming with extracted audio {extracted['audioPath']}")
+            file_path = extracted["audioPath"]
+            processing_tasks[task_id]["file_path"] = file_path
+        else:
+            extracted = None
+        
         # Check if file exists
         if not os.path.exists(file_path):
             logger.error(f"File does not exist: {file_path}")
@@ -215,7 +1265,7 @@ async def process_audio_file(task_id: str, file_path: str):
                     }
                     
                     # Update task
-                    processing_tasks[task_id]["insights"] = insights
+                    _store_insights(task_id, insights)
                     processing_tasks[task_id]["status"] = "completed"
                     processing_tasks[task_id]["end_time"] = time.time()
                     logger.info("Test file processed successfully")
@@ -225,11 +1275,31 @@ async def process_audio_file(task_id: str, file_path: str):
             logger.info("File is binary (as expected for audio)")
         except Exception as e:
             logger.warning(f"Error checking if file is test file: {str(e)}")
-        
-        # Create decision tracker agent
+
+        # Keep only the audio stream of video containers. Packets are copied
+        # as-is, so this is cheap and the decoder never touches the video.
+        task = processing_tasks[task_id]
+        if not extracted and MEDIA_FORMATS.get(task.get("original_format"), {}).get("video"):
+            audio_path = os.path.join(DERIVED_AUDIO_DIR, f"{task_id}.mka")
+            try:
+                if extract_audio_stream(file_path, audio_path):
+                    logger.info(f"Extracted audio stream to: {audio_path}")
+                    if checkpoint is not None:
+                        checkpoint.put("extract", {"audioPath": audio_path})
+                    # Uploaded copies are ours to replace; server-side files are left alone
+                    if task.get("source") == "upload":
+                        os.remove(file_path)
+                    file_path = audio_path
+                    task["file_path"] = audio_path
+            except Exception as e:
+                logger.warning(f"Could not extract audio stream, decoding the container directly: {str(e)}")
+                if os.path.exists(audio_path):
+                    os.remove(audio_path)
+
+        # Get the shared decision tracker agent
         logger.info("Initializing DecisionTrackerAgent...")
         try:
-            agent = DecisionTrackerAgent()
+            agent = get_agent()
             logger.info("Agent initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize agent: {str(e)}", exc_info=True)
@@ -237,13 +1307,67 @@ async def process_audio_file(task_id: str, file_path: str):
             processing_tasks[task_id]["error"] = f"Agent initialization failed: {str(e)}"
             return
         
+        # Pick the model size from the audio duration and the queue; decoding
+        # is greedy unless the caller passed a slower preset or options
+        task = processing_tasks[task_id]
+        queued = max(0, sum(1 for t in list(processing_tasks.values()) if t["status"] == "processing")
+                     - PROCESSING_WORKERS)
+        duration = audio_duration(file_path) if task.get("original_format") != "test" else None
+        plan = model_policy.choose(duration, queued=queued, waited=time.time() - task["start_time"])
+        saved_plan = checkpoint.get("plan") if checkpoint is not None else None
+        if saved_plan:
+            # Keep the model and options the checkpointed stages were made with
+            plan = saved_plan["plan"]
+            options = TranscribeOptions(**saved_plan["options"])
+            audio_hash, language_source = saved_plan["audioHash"], saved_plan["languageSource"]
+        else:
+            preset, options = resolve_options(plan["preset"], transcribe_options)
+            if preset != plan["preset"]:
+                plan.update(preset=preset, beamSize=options.beam_size,
+                            temperatureFallback=isinstance(options.temperature, tuple))
+            
+            # The language comes from the request, the tenant's pin or an earlier
+            # detection of the same audio; otherwise the agent detects it with a
+            # small model before transcribing
+            audio_hash = None
+            language_source = "request" if options.language else None
+            if not options.language and task.get("original_format") != "test":
+                try:
+                    audio_hash = file_sha256(file_path)
+                    options.language, language_source = language_store.resolve(task.get("tenant"), audio_hash)
+                except Exception as e:
+                    logger.warning(f"Failed to look up the language: {str(e)}")
+            if checkpoint is not None:
+                checkpoint.put("plan", {
+                    "plan": plan, "options": options.model_dump(exclude_none=True),
+                    "audioHash": audio_hash, "languageSource": language_source,
+                })
+        task["transcription"] = {**plan, "options": options.model_dump(exclude_none=True)}
+        logger.info(f"Transcription plan: {task['transcription']}")
+        whisper_options = options.to_whisper()
+        
         # Transcribe the audio
         logger.info("Starting audio transcription...")
         transcription_start = time.time()
+        if TRANSCRIPT_WORD_TIMESTAMPS:
+            whisper_options["word_timestamps"] = True
         try:
-            transcript = agent.transcribe_audio(file_path)
-            transcription_time = time.time() - transcription_start
-            logger.info(f"Transcription completed in {transcription_time:.2f} seconds")
+            transcription = checkpoint.get("transcription") if checkpoint is not None else None
+            if transcription is not None:
+                logger.info("Transcript restored from checkpoint")
+            else:
+                with model_policy.transcribing():
+                    transcription = agent.transcribe_audio_segments(
+                        file_path, whisper_options, model_name=plan["model"], checkpoint=checkpoint
+                    )
+                # A resumed run only timed part of the audio, so it does not
+                # feed the model policy's speed estimate
+                if not saved_plan:
+                    model_policy.record(plan, time.time() - transcription_start)
+                if checkpoint is not None:
+                    checkpoint.put("transcription", transcription)
+            transcript = transcription["text"]
+            logger.info(f"Transcription completed in {time.time() - transcription_start:.2f} seconds")
             logger.info(f"Transcript length: {len(transcript)} characters")
             logger.info(f"Transcript excerpt: {transcript[:100]}...")
         except Exception as e:
@@ -252,38 +1376,130 @@ async def process_audio_file(task_id: str, file_path: str):
             processing_tasks[task_id]["error"] = f"Transcription failed: {str(e)}"
             return
         
+        detection = transcription.get("languageDetection")
+        if detection and detection["probability"] >= LANGUAGE_MIN_PROBABILITY:
+            language_source = "detected"
+            try:
+                language_store.record_detection(
+                    audio_hash, task.get("tenant"), detection["language"], detection["probability"]
+                )
+            except Exception as e:
+                logger.warning(f"Failed to cache the detected language: {str(e)}")
+        task["transcription"].update(
+            language=transcription.get("language"),
+            languageSource=language_source or "whisper"
+        )
+        
+        # Persist the segment table so time slices can be served later
+        segments = transcription["segments"]
+        try:
+            transcript_store.save_transcript(task_id, segments, transcription.get("language"))
+        except Exception as e:
+            logger.warning(f"Failed to store transcript segments: {str(e)}")
+        
+        # With diarization, send the compact speaker-tagged transcript instead
+        speaker_labels = any("speaker" in segment for segment in segments)
+        if speaker_labels:
+            transcript = format_speaker_transcript(segments)
+            logger.info(f"Using speaker-tagged transcript ({len(transcript)} characters)")
+        
+        # Meetings of a series get the open action items of earlier meetings
+        # so the analysis can report their status changes
+        series = processing_tasks[task_id].get("series")
+        open_action_items = None
+        if series:
+            try:
+                open_action_items = action_tracker.get_open_items(series)
+                logger.info(f"Series {series} has {len(open_action_items)} open action items")
+            except Exception as e:
+                logger.warning(f"Failed to load open action items: {str(e)}")
+        
         # Analyze the transcript to extract insights
         logger.info("Starting transcript analysis...")
         analysis_start = time.time()
         try:
-            insights = agent.analyze_transcript(transcript)
-            analysis_time = time.time() - analysis_start
-            logger.info(f"Analysis completed in {analysis_time:.2f} seconds")
-            
-            # Validate insights
-            if not insights:
-                logger.error("Analysis returned empty insights")
-                processing_tasks[task_id]["status"] = "failed"
-                processing_tasks[task_id]["error"] = "Analysis returned empty insights"
-                return
+            insights = checkpoint.get("insights") if checkpoint is not None else None
+            if insights is not None:
+                logger.info("Insights restored from checkpoint")
+            else:
+                insights = agent.analyze_transcript(
+                    transcript, speaker_labels=speaker_labels, open_action_items=open_action_items,
+                    language=transcription.get("language")
+                )
+                analysis_time = time.time() - analysis_start
+                logger.info(f"Analysis completed in {analysis_time:.2f} seconds")
                 
-            # Verify insights has the required fields
-            required_fields = ["executiveSummary", "decisionPoints", "risksConcernsRaised", "actionItems", "unresolvedQuestions"]
-            missing_fields = [field for field in required_fields if field not in insights]
-            
-            if missing_fields:
-                logger.error(f"Insights missing required fields: {missing_fields}")
-                processing_tasks[task_id]["status"] = "failed"
-                processing_tasks[task_id]["error"] = f"Insights missing required fields: {missing_fields}"
-                return
+                # Validate insights
+                if not insights:
+                    logger.error("Analysis returned empty insights")
+                    processing_tasks[task_id]["status"] = "failed"
+                    processing_tasks[task_id]["error"] = "Analysis returned empty insights"
+                    return
                 
-            logger.info(f"Insights structure is valid and complete")
+                # Verify insights has the required fields
+                required_fields = ["executiveSummary", "decisionPoints", "risksConcernsRaised", "actionItems", "unresolvedQuestions"]
+                missing_fields = [field for field in required_fields if field not in insights]
+                
+                if missing_fields:
+                    logger.error(f"Insights missing required fields: {missing_fields}")
+                    processing_tasks[task_id]["status"] = "failed"
+                    processing_tasks[task_id]["error"] = f"Insights missing required fields: {missing_fields}"
+                    return
+                
+                logger.info(f"Insights structure is valid and complete")
+                
+                # Merge repeated items and link them to earlier meetings
+                try:
+                    insights = insight_deduplicator.process(task_id, insights)
+                except Exception as e:
+                    logger.warning(f"Failed to deduplicate insights: {str(e)}")
+                if checkpoint is not None:
+                    checkpoint.put("insights", insights)
+            
+            # Record new action items and status changes for the series
+            # (once, since a resumed task must not record them again)
+            if series and not (checkpoint is not None and checkpoint.get("action_items")):
+                try:
+                    action_tracker.record_meeting(
+                        series, task_id, insights["actionItems"], insights.get("actionItemUpdates", [])
+                    )
+                    if checkpoint is not None:
+                        checkpoint.put("action_items", True)
+                except Exception as e:
+                    logger.warning(f"Failed to update action item tracker: {str(e)}")
+            
+            # Map insight items back to the time ranges they were said in
+            spans = []
+            if segments:
+                try:
+                    spans = map_insights_to_segments(insights, segments)
+                    transcript_store.save_insight_spans(task_id, spans)
+                    logger.info(f"Mapped {len(spans)} insight items to transcript time ranges")
+                except Exception as e:
+                    logger.warning(f"Failed to map insights to transcript: {str(e)}")
+            
+            # Make the meeting searchable alongside all earlier ones
+            try:
+                search_index.index_meeting(
+                    task_id,
+                    insights,
+                    segments=segments,
+                    spans=spans,
+                    filename=processing_tasks[task_id].get("filename"),
+                    meeting_time=processing_tasks[task_id].get("start_time")
+                )
+            except Exception as e:
+                logger.warning(f"Failed to index meeting for search: {str(e)}")
             
             # Store the insights and mark as completed
-            processing_tasks[task_id]["insights"] = insights
+            _store_insights(task_id, insights)
             processing_tasks[task_id]["status"] = "completed"
             processing_tasks[task_id]["end_time"] = time.time()
             
+            # Fast passes are redone with the most accurate settings when idle
+            if WHISPER_IDLE_UPGRADE and duration and model_policy.needs_upgrade(plan):
+                model_policy.add_upgrade_candidate(task_id, plan)
+            
             total_time = processing_tasks[task_id]["end_time"] - processing_tasks[task_id]["start_time"]
             logger.info(f"Total processing time: {total_time:.2f} seconds")
             logger.info(f"===== COMPLETED PROCESSING TASK: {task_id} =====")
@@ -300,6 +1516,106 @@ async def process_audio_file(task_id: str, file_path: str):
             processing_tasks[task_id]["error"] = f"Error processing audio file: {str(e)}"
             
 
+def run_transcription_upgrade(task_id: str):
+    """
+    Re-transcribe a completed task with the most accurate allowed settings.
+
+    The stored transcript, insight time ranges and search index are
+    replaced. The insights themselves are kept, since action items and
+    duplicate links may already refer to them.
+    """
+    task = processing_tasks.get(task_id)
+    if not task or task["status"] != "completed" or not os.path.exists(task["file_path"]):
+        return
+    
+    previous = task.get("transcription") or {}
+    plan = model_policy.upgrade_plan(previous.get("audioDuration"))
+    # Keep the request's language, prompt etc. but not a preset that would undo the upgrade
+    request_options = task.get("transcribe_options")
+    if request_options is not None:
+        request_options = request_options.model_copy(update={"preset": None})
+    _, resolved = resolve_options(plan["preset"], request_options)
+    resolved.language = resolved.language or previous.get("language")
+    options = resolved.to_whisper()
+    if TRANSCRIPT_WORD_TIMESTAMPS:
+        options["word_timestamps"] = True
+    logger.info(f"Upgrading transcript of task {task_id} from {previous.get('model')} to {plan['model']}")
+    
+    start = time.time()
+    with model_policy.transcribing():
+        transcription = get_agent().transcribe_audio_segments(task["file_path"], options, model_name=plan["model"])
+    elapsed = time.time() - start
+    model_policy.record(plan, elapsed)
+    
+    segments = transcription["segments"]
+    transcript_store.save_transcript(task_id, segments, transcription.get("language"))
+    insights = _task_insights(task_id, task)
+    spans = map_insights_to_segments(insights, segments) if segments else []
+    transcript_store.save_insight_spans(task_id, spans)
+    search_index.index_meeting(
+        task_id, insights, segments=segments, spans=spans,
+        filename=task.get("filename"), meeting_time=task.get("start_time")
+    )
+    task["transcription"] = {
+        **plan,
+        "options": resolved.model_dump(exclude_none=True),
+        "language": transcription.get("language"),
+        "languageSource": previous.get("languageSource"),
+        "upgradedFrom": previous.get("model"),
+        "upgradedAt": time.time()
+    }
+    logger.info(f"Upgraded transcript of task {task_id} in {elapsed:.2f} seconds")
+
+
+_upgrade_stop = threading.Event()
+
+
+def _idle_upgrade_loop():
+    """Run pending transcript upgrades one at a time while no task is processing."""
+    while not _upgrade_stop.wait(30):
+        if any(task["status"] == "processing" for task in list(processing_tasks.values())):
+            continue
+        task_id = model_policy.next_upgrade_candidate()
+        if task_id:
+            try:
+                run_transcription_upgrade(task_id)
+            except Exception as e:
+                logger.warning(f"Transcript upgrade of task {task_id} failed: {str(e)}")
+
+
+@app.on_event("startup")
+def start_idle_upgrades():
+    if WHISPER_IDLE_UPGRADE:
+        threading.Thread(target=_idle_upgrade_loop, name="idle-upgrade", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def stop_idle_upgrades():
+    _upgrade_stop.set()
+
+
+@app.get("/languages")
+async def list_tenant_languages():
+    """Pinned, configured and recently detected meeting languages per tenant."""
+    return {"tenants": language_store.list_tenants()}
+
+
+@app.put("/languages/{tenant}")
+async def pin_tenant_language(tenant: str, request: LanguagePinRequest):
+    """Pin a tenant's meetings to a language (e.g. "de"), or clear the pin with null."""
+    language = request.language.strip().lower() if request.language else None
+    if language is not None and not (language.isalpha() and 2 <= len(language) <= 3):
+        raise HTTPException(status_code=400, detail="Language must be a Whisper language code such as 'en' or 'de'")
+    language_store.pin(tenant, language)
+    return {"tenant": tenant, "pinnedLanguage": language}
+
+
+@app.get("/transcription-policy")
+async def get_transcription_policy():
+    """Current model range, latency SLO and measured real-time factors of the model policy."""
+    return model_policy.get_stats()
+
+
 @app.get("/test")
 async def test_agent():
     """
@@ -326,248 +1642,141 @@ async def test_agent():
 @app.post("/connect-gmeet")
 async def connect_to_gmeet(request: GoogleMeetRequest):
     """
-    Connect to a Google Meet meeting using Selenium and record audio
+    Join a Google Meet meeting with a pooled headless browser and record it.
+    
+    The bot joins in the background; follow it with /meet/{meeting_id}.
     """
     logger.info(f"Received request to connect to Google Meet: {request.meeting_link}")
     
     try:
-        # Use the existing myenv virtual environment
-        venv_path = os.path.join(os.path.dirname(__file__), "myenv")
-        
-        # Determine path to python in virtual environment
-        if sys.platform == "win32":
-            python_exec = os.path.join(venv_path, "Scripts", "python.exe")
-        else:
-            python_exec = os.path.join(venv_path, "bin", "python")
-        
-        # Get the full path to the gmeet.py script
-        gmeet_script = os.path.join(os.path.dirname(__file__), "gmeet.py")
-        
-        # Create a temporary script to run gmeet.py with the provided credentials
-        temp_script = os.path.join(os.path.dirname(__file__), f"temp_gmeet_{uuid.uuid4()}.py")
-        
-        with open(temp_script, "w") as f:
-            f.write(f"""
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-import time
-import pytz
-from datetime import datetime
-import getpass
-import sys
-import os
-import signal
-import atexit
-import traceback
-
-# Import functions from the original gmeet.py but prevent the script from running on import
-sys.path.append(os.path.dirname(__file__))
-from gmeet import Glogin, turnOffMicCam, joinNow
-
-# Import the recorder functionality
-from meet_recorder import MeetingRecorder
-
-# Your Gmail credentials from the frontend
-mail_address = "{request.email}"
-password = "{request.password}"
-meeting_link = "{request.meeting_link}"
-
-# Print the credentials for debugging
-print(f"Connecting to: {{meeting_link}}")
-print(f"Using email: {{mail_address}}")
-
-# Create a recorder instance to capture meeting audio
-# Save in the decision_tracker/audio folder
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-output_dir = os.path.join(PROJECT_ROOT, "audio")
-# Make sure the audio directory exists
-os.makedirs(output_dir, exist_ok=True)
-timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-recorder = MeetingRecorder(output_dir=output_dir, filename=f"meet_recording_{{timestamp}}.mp3")
-# Explicitly disable automatic processing
-recorder.process_after_recording = False
-
-# Track if cleanup has been performed
-cleanup_done = False
-
-def cleanup():
-    global cleanup_done
-    if cleanup_done:
-        return
-    
-    cleanup_done = True
-    print("\\nExiting... stopping recording and saving file.")
-    
-    try:
-        if recorder and recorder.recording:
-            recorder.stop_recording()
-            print(f"Recording saved to {{recorder.full_path}}")
-            
-            # No automatic processing - just inform the user
-            print("\\nRecording has been saved to the audio folder.")
-            print("To process this recording and generate insights:")
-            print("1. Go to the main page of the application")
-            print("2. Select 'Upload Audio File'")
-            print("3. Choose the saved recording file")
-            print("4. Click 'Upload and Process'")
+        meeting_id = get_meet_bot_manager().join_meeting(
+            request.meeting_link, request.email, request.password, audio_device=request.audio_device
+        )
+        return {
+            "status": "success",
+            "message": "Joining Google Meet with recording",
+            "meeting_id": meeting_id
+        }
     except Exception as e:
-        print(f"Error during cleanup: {{str(e)}}")
-        print("Traceback:", traceback.format_exc())
-
-# Register cleanup handlers for various scenarios
-atexit.register(cleanup)
-signal.signal(signal.SIGINT, lambda sig, frame: (cleanup(), sys.exit(0)))
-signal.signal(signal.SIGTERM, lambda sig, frame: (cleanup(), sys.exit(0)))
-if hasattr(signal, 'SIGABRT'):
-    signal.signal(signal.SIGABRT, lambda sig, frame: (cleanup(), sys.exit(0)))
-if hasattr(signal, 'SIGBREAK') and sys.platform == 'win32':
-    signal.signal(signal.SIGBREAK, lambda sig, frame: (cleanup(), sys.exit(0)))
-
-# Selenium setup
-opt = Options()
-opt.add_argument("--disable-blink-features=AutomationControlled")
-opt.add_argument("--start-maximized")
-opt.add_experimental_option(
-    "prefs",
-    {{
-        "profile.default_content_setting_values.media_stream_mic": 1,
-        "profile.default_content_setting_values.media_stream_camera": 1,
-        "profile.default_content_setting_values.geolocation": 0,
-        "profile.default_content_setting_values.notifications": 1,
-    }},
-)
+        logger.error(f"Error connecting to Google Meet: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error connecting to Google Meet: {str(e)}")
 
-print("Starting Chrome...")
-driver = webdriver.Chrome(options=opt)
 
-print("Logging into Google...")
-Glogin(driver, mail_address, password)
+@app.get("/meet")
+async def list_meet_sessions():
+    """List the meetings handled by the bot pool and the pool's capacity."""
+    manager = get_meet_bot_manager()
+    return {"meetings": manager.list_meetings(), "pool": manager.pool.stats()}
 
-print(f"Joining meeting: {{meeting_link}}")
-# Modified version of joinNow that doesn't block
-driver.get(meeting_link)
-turnOffMicCam(driver)
-print("Meeting started.")
 
-# Start recording after joining the meeting
-print("Starting audio recording (MP3 format)...")
-recorder.start_recording()
-print(f"Recording to: {{recorder.full_path}}")
+@app.get("/meet/{meeting_id}")
+async def get_meet_session(meeting_id: str):
+    """Get the state of a bot-joined meeting."""
+    meeting = get_meet_bot_manager().get_meeting(meeting_id)
+    if meeting is None:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    return meeting
 
-try:
-    # Keep running until manually closed or meeting ends
-    print("\\nMeeting in progress. Recording audio. Recording will automatically stop when the meeting ends.")
-    print("DO NOT CLOSE THIS WINDOW unless you want to end the recording manually.")
-    print("The recording will be saved as an MP3 file when the meeting ends or you close this window.")
-    
-    # Flag to track if we're still in the meeting
-    in_meeting = True
-    
-    while in_meeting:
-        time.sleep(5)
-        
-        # Print a status update every 60 seconds
-        if int(time.time()) % 60 == 0:
-            duration = recorder.get_status()["duration"]
-            print(f"Recording in progress... Duration: {{duration:.1f}} seconds")
-        
-        try:
-            # Check if we're still in the meeting by looking for specific elements
-            # This could be "You left the meeting", "Meeting ended", or absence of meeting UI elements
-            
-            # Method 1: Check if we got disconnected/kicked (look for "You left" text)
-            left_texts = ["You left the meeting", "Meeting ended", "You've left", 
-                         "You were removed", "Meeting is over", "Call ended"]
-            
-            for leave_text in left_texts:
-                try:
-                    xpath_expression = f"//*[contains(text(), '{{leave_text}}')]"
-                    if driver.find_element(By.XPATH, xpath_expression):
-                        print(f"Detected: {{leave_text}}")
-                        in_meeting = False
-                        break
-                except:
-                    pass
-            
-            # Method 2: Check if the URL has changed away from meet.google.com
-            current_url = driver.current_url
-            if not current_url.startswith("https://meet.google.com"):
-                print("No longer on Google Meet URL")
-                in_meeting = False
-            
-            # Method 3: Check for specific meeting elements to confirm we're still in a call
-            try:
-                # Try to find elements that should be present during an active meeting
-                meeting_elements = driver.find_elements(By.CSS_SELECTOR, 
-                                                       "div[data-meeting-title], div[role='complementary'], div[jsname='SQpL2c']")
-                if not meeting_elements:
-                    # If none of the meeting elements are found, we might have left
-                    print("Meeting elements no longer found")
-                    in_meeting = False
-            except:
-                pass
-                
-        except Exception as e:
-            # If error when checking meeting status, assume we're no longer in the meeting
-            print(f"Error checking meeting status: {{e}}")
-            in_meeting = False
-    
-    print("\\nMeeting has ended or user has left. Stopping recording...")
-            
-except KeyboardInterrupt:
-    print("\\nKeyboard interrupt received.")
-except Exception as e:
-    print(f"\\nUnexpected error: {{e}}")
-    print("Traceback:", traceback.format_exc())
-finally:
-    cleanup()
-    try:
-        driver.quit()
-    except:
-        pass
-    print("Meeting ended. Browser closed.")
-            """)
-        
-        # Run the temporary script in a separate process
-        logger.info(f"Starting Google Meet connection process with script: {temp_script}")
-        
-        # Run in background to not block API
-        process = subprocess.Popen([python_exec, temp_script], 
-                         creationflags=subprocess.CREATE_NEW_CONSOLE if sys.platform == "win32" else 0)
-        
-        logger.info(f"Process started with PID: {process.pid}")
-        
-        return {"status": "success", "message": "Google Meet connection started with recording", "process_id": process.pid}
-    
-    except Exception as e:
-        logger.error(f"Error connecting to Google Meet: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Error connecting to Google Meet: {str(e)}")
-    finally:
-        # Clean up temp script after a delay (give time for the process to start)
-        # We don't wait for it to complete since this runs in background
-        time.sleep(3)
-        try:
-            if os.path.exists(temp_script):
-                os.remove(temp_script)
-        except Exception as e:
-            logger.error(f"Error removing temporary script: {str(e)}")
+
+@app.delete("/meet/{meeting_id}")
+async def leave_meet_session(meeting_id: str):
+    """Make the bot leave a meeting; the recording is saved as usual."""
+    if not get_meet_bot_manager().leave_meeting(meeting_id):
+        raise HTTPException(status_code=404, detail="Meeting not found or already finished")
+    return {"meeting_id": meeting_id, "status": "leaving"}
+
+
+@app.post("/internal/jobs")
+async def submit_internal_job(request: Request, job: InternalJobRequest):
+    """
+    Queue an audio file written by another process on this machine.
+
+    Used by standalone recorders so their recordings land in the same task
+    store and worker pool as uploads. Only local clients are accepted, and
+    the file must be inside BATCH_INGEST_ROOT or RECORDINGS_DIR.
+    """
+    client_host = request.client.host if request.client else None
+    if client_host not in ("127.0.0.1", "::1", "localhost"):
+        raise HTTPException(status_code=403, detail="Internal jobs are only accepted from localhost")
+    if jobs.INTERNAL_API_TOKEN and request.headers.get("x-internal-token") != jobs.INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid internal token")
+
+    file_path = os.path.abspath(job.file_path)
+    if not any(os.path.commonpath([file_path, root]) == root for root in (BATCH_INGEST_ROOT, RECORDINGS_DIR)):
+        raise HTTPException(status_code=400, detail="Path is outside the ingest directory")
+    if not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    if sniff_file(file_path) is None:
+        raise HTTPException(status_code=400, detail="Unsupported audio format")
+
+    task_id = submit_job(file_path, filename=job.filename, source=job.source)
+    return {"task_id": task_id, "status": "processing"}
+
+@app.get("/recordings")
+async def list_recordings(state: Optional[str] = None, limit: int = 200):
+    """List catalogued recordings with their size, duration and processing state, newest first."""
+    if state is not None and state not in RECORDING_STATES:
+        raise HTTPException(status_code=400, detail=f"Unknown state. Use one of: {', '.join(RECORDING_STATES)}")
+    return {"recordings": recording_catalog.list_recordings(state=state, limit=max(1, min(limit, 1000)))}
+
+@app.get("/workers")
+async def get_worker_stats():
+    """Jobs per state and the worker processes of the work queue."""
+    if work_queue is None:
+        return {"mode": "local", "workers": PROCESSING_WORKERS}
+    return {"mode": "queue", **work_queue.get_stats()}
+
+
+@app.get("/janitor")
+async def get_janitor_stats():
+    """Space reclaimed by the janitor per artifact class."""
+    return janitor.get_stats()
+
+
+@app.post("/janitor/run")
+async def run_janitor():
+    """Apply retention and quotas now instead of waiting for the next scheduled run."""
+    loop = asyncio.get_running_loop()
+    reclaimed = await loop.run_in_executor(None, janitor.run_once)
+    return {"reclaimed": reclaimed}
 
 @app.get("/process-latest-recording")
-async def process_latest_recording():
+async def process_latest_recording(request: Request):
     """
     Process the most recent recording in the audio directory
+    
+    Retries sent with the same Idempotency-Key header get the task of the
+    first request. While the most recent recording is still processing,
+    further requests attach to its task instead of picking an older one.
     """
+    idempotency_key = _idempotency_key(request, "process-latest-recording")
+    fingerprint = request_fingerprint(directory=RECORDINGS_DIR)
     try:
         # Import the function to get and process the latest recording
         from meet_recorder import process_latest_recording
         
+        if idempotency_key is not None:
+            task_id = idempotency_store.lookup(idempotency_key, fingerprint)
+            if task_id:
+                logger.info(f"Replaying task {task_id} for a repeated request")
+                return _replayed({"status": "success", "message": "Processing started", "task_id": task_id})
+        
+        newest = recording_catalog.latest(RECORDINGS_DIR) if REQUEST_COALESCING else None
+        if newest and newest["state"] == "queued" and _task_running(newest["taskId"]):
+            task_id = newest["taskId"]
+            logger.info(f"Latest recording is already processing as task {task_id}")
+            if idempotency_key is not None:
+                idempotency_store.remember(idempotency_key, fingerprint, task_id)
+            return _replayed({"status": "success", "message": "Processing started", "task_id": task_id})
+        
         # Process the latest recording
         logger.info("Processing latest recording from the audio folder")
         task_id = process_latest_recording()
         
         if task_id:
             logger.info(f"Processing started with task ID: {task_id}")
+            if idempotency_key is not None:
+                idempotency_store.remember(idempotency_key, fingerprint, task_id)
             return {"status": "success", "message": "Processing started", "task_id": task_id}
         else:
             logger.warning("No recordings found to process")
@@ -0,0 +1,180 @@
+import logging
+import os
+import re
+import shutil
+import subprocess
+from typing import Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# How meeting audio is captured: "auto" (a PulseAudio/PipeWire null sink per
+# browser when pactl is available, else the default input), "pulse",
+# "device" (MEET_CAPTURE_DEVICE) or "default"
+MEET_CAPTURE_BACKEND = os.getenv("MEET_CAPTURE_BACKEND", "auto")
+
+# Input or loopback device (index or name) used by the "device" backend
+MEET_CAPTURE_DEVICE = os.getenv("MEET_CAPTURE_DEVICE")
+
+
+class AudioCaptureError(Exception):
+    """Raised when a capture source cannot be created or read."""
+
+
+def pulse_available() -> bool:
+    """Check whether a PulseAudio (or pipewire-pulse) server can be controlled."""
+    if not (shutil.which("pactl") and shutil.which("parec")):
+        return False
+    try:
+        return subprocess.run(["pactl", "info"], capture_output=True, timeout=5).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+class ParecStream:
+    """Raw 16-bit PCM read from a PulseAudio source through parec."""
+
+    def __init__(self, device: str, rate: int, channels: int):
+        self.channels = channels
+        self.process = subprocess.Popen(
+            ["parec", f"--device={device}", "--format=s16le", f"--rate={rate}",
+             f"--channels={channels}", "--latency-msec=50"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+    def read(self, frames: int) -> bytes:
+        data = self.process.stdout.read(frames * self.channels * 2)
+        if not data:
+            raise AudioCaptureError("parec stopped delivering audio")
+        return data
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class PulseSinkCapture:
+    """
+    A dedicated null sink for one browser session.
+
+    The browser is started with PULSE_SINK pointing at the sink, so
+    everything it plays ends up there, and the recorder reads the sink's
+    monitor source. Each session has its own sink, so any number of
+    meetings can be recorded in parallel without hearing each other.
+    """
+
+    def __init__(self, name: str):
+        self.sink_name = "dt_" + re.sub(r"[^\w]", "_", name)
+        self.module_id: Optional[str] = None
+
+    def create(self):
+        result = subprocess.run(
+            ["pactl", "load-module", "module-null-sink", f"sink_name={self.sink_name}",
+             f"sink_properties=device.description={self.sink_name}"],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise AudioCaptureError(f"Could not create null sink: {result.stderr.strip()}")
+        self.module_id = result.stdout.strip()
+        logger.info(f"Created null sink {self.sink_name} (module {self.module_id})")
+
+    def browser_env(self) -> Dict[str, str]:
+        """Environment variables that route a process's audio into the sink."""
+        return {"PULSE_SINK": self.sink_name}
+
+    def open_stream(self, rate: int, channels: int, chunk: int) -> ParecStream:
+        return ParecStream(f"{self.sink_name}.monitor", rate, channels)
+
+    def describe(self) -> str:
+        return f"{self.sink_name}.monitor"
+
+    def close(self):
+        if self.module_id is None:
+            return
+        subprocess.run(["pactl", "unload-module", self.module_id], capture_output=True)
+        logger.info(f"Removed null sink {self.sink_name}")
+        self.module_id = None
+
+
+class _PyAudioStream:
+    def __init__(self, audio, stream):
+        self._audio = audio
+        self._stream = stream
+
+    def read(self, frames: int) -> bytes:
+        return self._stream.read(frames, exception_on_overflow=False)
+
+    def close(self):
+        self._stream.stop_stream()
+        self._stream.close()
+        self._audio.terminate()
+
+
+class DeviceCapture:
+    """Capture from a given input or loopback device through PyAudio."""
+
+    def __init__(self, device: Union[int, str]):
+        self.device = device
+
+    def browser_env(self) -> Dict[str, str]:
+        return {}
+
+    def _device_index(self, audio) -> int:
+        if isinstance(self.device, int) or str(self.device).isdigit():
+            return int(self.device)
+        for index in range(audio.get_device_count()):
+            info = audio.get_device_info_by_index(index)
+            if info.get("maxInputChannels", 0) > 0 and str(self.device).lower() in info["name"].lower():
+                return index
+        raise AudioCaptureError(f"No input device matching '{self.device}'")
+
+    def open_stream(self, rate: int, channels: int, chunk: int) -> _PyAudioStream:
+        import pyaudio
+
+        audio = pyaudio.PyAudio()
+        try:
+            index = self._device_index(audio)
+            stream = audio.open(format=pyaudio.paInt16, channels=channels, rate=rate, input=True,
+                                input_device_index=index, frames_per_buffer=chunk)
+        except Exception:
+            audio.terminate()
+            raise
+        return _PyAudioStream(audio, stream)
+
+    def describe(self) -> str:
+        return f"device {self.device}"
+
+    def close(self):
+        pass
+
+
+def create_capture(name: str, device: Optional[Union[int, str]] = None,
+                   backend: str = MEET_CAPTURE_BACKEND):
+    """
+    Create the capture source for one browser session.
+
+    Args:
+        name: Unique name of the session (used for the sink name)
+        device: Explicit input/loopback device; overrides the backend
+        backend: One of "auto", "pulse", "device" or "default"
+
+    Returns:
+        A capture source, or None to record the host's default input
+    """
+    device = device if device is not None else (MEET_CAPTURE_DEVICE if backend == "device" else None)
+    if device is not None:
+        return DeviceCapture(device)
+
+    if backend in ("auto", "pulse"):
+        if pulse_available():
+            capture = PulseSinkCapture(name)
+            capture.create()
+            return capture
+        if backend == "pulse":
+            raise AudioCaptureError("PulseAudio/PipeWire is not available (pactl and parec are required)")
+        logger.info("PulseAudio not available, meetings are recorded from the default input device")
+
+    return None
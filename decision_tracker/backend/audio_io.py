@@ -0,0 +1,375 @@
+import logging
+import shutil
+import subprocess
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Whisper expects 16 kHz mono float32 audio
+SAMPLE_RATE = 16000
+
+# Number of samples appended to the decode buffer when the initial
+# estimate turns out to be too small (one minute at 16 kHz)
+_GROW_SAMPLES = SAMPLE_RATE * 60
+
+# Number of leading bytes needed by sniff_format
+SNIFF_BYTES = 128
+
+# Formats recognised by sniff_format. "extension" is used when storing an
+# upload and "video" marks containers that may carry a video stream.
+MEDIA_FORMATS = {
+    "mp3": {"extension": ".mp3", "video": False},
+    "aac": {"extension": ".aac", "video": False},
+    "wav": {"extension": ".wav", "video": False},
+    "aiff": {"extension": ".aiff", "video": False},
+    "flac": {"extension": ".flac", "video": False},
+    "ogg": {"extension": ".ogg", "video": False},
+    "opus": {"extension": ".opus", "video": False},
+    "amr": {"extension": ".amr", "video": False},
+    "m4a": {"extension": ".m4a", "video": False},
+    "mp4": {"extension": ".mp4", "video": True},
+    "mov": {"extension": ".mov", "video": True},
+    "webm": {"extension": ".webm", "video": True},
+    "mkv": {"extension": ".mkv", "video": True},
+    "asf": {"extension": ".asf", "video": True},
+}
+
+_ASF_GUID = bytes.fromhex("3026b2758e66cf11a6d900aa0062ce6c")
+
+
+class AudioIOError(Exception):
+    """Raised when audio cannot be decoded or encoded by any backend."""
+
+
+def sniff_format(header: bytes) -> Optional[str]:
+    """
+    Identify a media container from its leading bytes.
+
+    Args:
+        header: At least the first SNIFF_BYTES bytes of the file
+
+    Returns:
+        A key of MEDIA_FORMATS, or None if the format is not recognised
+    """
+    if header[:3] == b"ID3":
+        return "mp3"
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"FORM" and header[8:12] in (b"AIFF", b"AIFC"):
+        return "aiff"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[:4] == b"OggS":
+        return "opus" if b"OpusHead" in header[:SNIFF_BYTES] else "ogg"
+    if header[4:8] == b"ftyp":
+        brand = header[8:12]
+        if brand in (b"M4A ", b"M4B ", b"M4P "):
+            return "m4a"
+        if brand == b"qt  ":
+            return "mov"
+        return "mp4"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm" if b"webm" in header[:SNIFF_BYTES] else "mkv"
+    if header[:6] == b"#!AMR\n":
+        return "amr"
+    if header[:16] == _ASF_GUID:
+        return "asf"
+    if len(header) >= 2 and header[0] == 0xFF:
+        # ADTS AAC: 12-bit sync word followed by layer bits of 00
+        if header[1] & 0xF6 == 0xF0:
+            return "aac"
+        # MPEG audio frame: 11-bit sync word and a non-reserved layer
+        if header[1] & 0xE0 == 0xE0 and header[1] & 0x06:
+            return "mp3"
+    return None
+
+
+def sniff_file(path: str) -> Optional[str]:
+    """Identify the media container of a file on disk."""
+    with open(path, "rb") as f:
+        return sniff_format(f.read(SNIFF_BYTES))
+
+
+def audio_duration(path: str) -> Optional[float]:
+    """
+    Read the duration of a media file in seconds from its container headers.
+
+    Nothing is decoded. Returns None when the duration cannot be determined.
+    """
+    try:
+        import av
+
+        with av.open(path) as container:
+            if container.duration:
+                return container.duration / av.time_base
+            if container.streams.audio:
+                stream = container.streams.audio[0]
+                if stream.duration and stream.time_base:
+                    return float(stream.duration * stream.time_base)
+    except Exception as e:
+        logger.debug(f"PyAV could not read duration of {path}: {e}")
+
+    try:
+        import soundfile
+
+        return float(soundfile.info(path).duration)
+    except Exception as e:
+        logger.debug(f"libsndfile could not read duration of {path}: {e}")
+    return None
+
+
+def extract_audio_stream(path: str, output_path: str) -> bool:
+    """
+    Copy the first audio stream of a video container into a Matroska audio
+    file without re-encoding it.
+
+    Args:
+        path: Path to the source container
+        output_path: Path of the audio-only file to write (.mka)
+
+    Returns:
+        True if the audio was extracted, False if the source has no video
+        stream and can be used as it is
+    """
+    import av
+
+    with av.open(path) as source:
+        if not source.streams.video:
+            return False
+        if not source.streams.audio:
+            raise AudioIOError(f"No audio stream found in {path}")
+
+        in_stream = source.streams.audio[0]
+        with av.open(output_path, "w", format="matroska") as target:
+            # PyAV 14 renamed add_stream(template=...) to add_stream_from_template
+            add_from_template = getattr(target, "add_stream_from_template", None)
+            if add_from_template:
+                out_stream = add_from_template(in_stream)
+            else:
+                out_stream = target.add_stream(template=in_stream)
+
+            for packet in source.demux(in_stream):
+                # The demuxer yields an empty packet when flushing
+                if packet.dts is None:
+                    continue
+                packet.stream = out_stream
+                target.mux(packet)
+
+    return True
+
+
+class _SampleBuffer:
+    """
+    Growable float32 buffer that decoded blocks are written into.
+
+    The buffer is preallocated from the container's duration when it is
+    known, so a typical decode fills one array instead of collecting a list
+    of blocks and concatenating them at the end.
+    """
+
+    def __init__(self, expected_samples: int = 0):
+        self._data = np.empty(max(expected_samples, _GROW_SAMPLES), dtype=np.float32)
+        self._size = 0
+
+    def append(self, block: np.ndarray):
+        needed = self._size + len(block)
+        if needed > len(self._data):
+            grown = np.empty(max(needed, len(self._data) + _GROW_SAMPLES), dtype=np.float32)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = block
+        self._size = needed
+
+    def data(self) -> np.ndarray:
+        return self._data[:self._size]
+
+
+def _resample(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """Resample mono audio, using scipy's polyphase filter when available."""
+    if orig_sr == target_sr:
+        return audio
+
+    try:
+        from math import gcd
+        from scipy.signal import resample_poly
+        divisor = gcd(orig_sr, target_sr)
+        return resample_poly(audio, target_sr // divisor, orig_sr // divisor).astype(np.float32)
+    except ImportError:
+        duration = len(audio) / orig_sr
+        target_times = np.arange(int(duration * target_sr)) / target_sr
+        source_times = np.arange(len(audio)) / orig_sr
+        return np.interp(target_times, source_times, audio).astype(np.float32)
+
+
+def _decode_with_pyav(path: str, sr: int) -> np.ndarray:
+    """Decode and resample in-process with PyAV (libav)."""
+    import av
+
+    with av.open(path) as container:
+        if not container.streams.audio:
+            raise AudioIOError(f"No audio stream found in {path}")
+
+        stream = container.streams.audio[0]
+        stream.thread_type = "AUTO"
+
+        expected_samples = 0
+        if stream.duration and stream.time_base:
+            expected_samples = int(float(stream.duration * stream.time_base) * sr)
+        elif container.duration:
+            expected_samples = int(container.duration / av.time_base * sr)
+
+        resampler = av.AudioResampler(format="flt", layout="mono", rate=sr)
+        buffer = _SampleBuffer(expected_samples)
+
+        for frame in container.decode(stream):
+            for resampled in resampler.resample(frame):
+                buffer.append(resampled.to_ndarray().reshape(-1))
+
+        # Flush samples still buffered inside the resampler
+        for resampled in resampler.resample(None):
+            buffer.append(resampled.to_ndarray().reshape(-1))
+
+    return buffer.data()
+
+
+def _decode_with_soundfile(path: str, sr: int) -> np.ndarray:
+    """Decode WAV/FLAC/OGG in-process with libsndfile."""
+    import soundfile
+
+    info = soundfile.info(path)
+    buffer = _SampleBuffer(int(info.frames))
+
+    for block in soundfile.blocks(path, blocksize=65536, dtype="float32", always_2d=True):
+        buffer.append(block.mean(axis=1))
+
+    return _resample(buffer.data(), info.samplerate, sr)
+
+
+def _decode_with_ffmpeg(path: str, sr: int) -> np.ndarray:
+    """Decode by piping raw PCM out of the ffmpeg CLI."""
+    if shutil.which("ffmpeg") is None:
+        raise AudioIOError("ffmpeg is not available")
+
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", path,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr), "-"
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise AudioIOError(f"ffmpeg failed to decode audio: {e.stderr.decode(errors='ignore')}") from e
+
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+_DECODERS = [
+    ("pyav", _decode_with_pyav),
+    ("soundfile", _decode_with_soundfile),
+    ("ffmpeg", _decode_with_ffmpeg),
+]
+
+
+def load_audio(path: str, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode an audio file into a mono float32 NumPy array.
+
+    Decoding happens in-process with PyAV when it is installed, then
+    libsndfile, and only falls back to spawning the ffmpeg CLI when neither
+    library can read the file.
+
+    Args:
+        path: Path to the audio file (MP3, WAV, M4A, Opus, ...)
+        sr: Target sample rate, defaults to Whisper's 16 kHz
+
+    Returns:
+        Mono float32 samples in the range [-1, 1]
+    """
+    errors = []
+
+    for name, decoder in _DECODERS:
+        try:
+            audio = decoder(path, sr)
+            logger.debug(f"Decoded {path} with {name}: {len(audio) / sr:.1f} seconds")
+            return audio
+        except ImportError:
+            errors.append(f"{name}: not installed")
+        except Exception as e:
+            logger.debug(f"{name} could not decode {path}: {str(e)}")
+            errors.append(f"{name}: {str(e)}")
+
+    raise AudioIOError(f"Could not decode {path} ({'; '.join(errors)})")
+
+
+def quiet_split_points(audio: np.ndarray, chunk_seconds: float, search_seconds: float = 20.0,
+                       sr: int = SAMPLE_RATE) -> List[int]:
+    """
+    Cut decoded audio into chunks of about chunk_seconds.
+
+    Each cut is moved to the quietest 100 ms frame within search_seconds of
+    its nominal position, so chunks rarely end in the middle of a word.
+    Frames within 3 dB of the quietest one count as ties and the one
+    nearest the nominal position wins, so silent or uniform stretches do
+    not shorten every chunk. The last chunk absorbs a remainder shorter
+    than half a chunk.
+
+    Returns:
+        Sample offsets of the chunk boundaries, starting with 0 and ending
+        with len(audio)
+    """
+    frame = sr // 10
+    chunk = int(chunk_seconds * sr)
+    search = int(search_seconds * sr)
+    bounds = [0]
+    while len(audio) - bounds[-1] > chunk * 1.5:
+        target = bounds[-1] + chunk
+        lo, hi = max(bounds[-1] + frame, target - search), min(len(audio) - frame, target + search)
+        frames = (hi - lo) // frame
+        if frames <= 0:
+            bounds.append(target)
+            continue
+        energy = np.square(audio[lo:lo + frames * frame].reshape(frames, frame)).mean(axis=1)
+        # Frames within 3 dB of the quietest one are as good a cut
+        quiet = np.flatnonzero(energy <= 2 * energy.min() + 1e-10)
+        centers = lo + quiet * frame + frame // 2
+        bounds.append(int(centers[np.argmin(np.abs(centers - target))]))
+    bounds.append(len(audio))
+    return bounds
+
+
+def encode_pcm_to_mp3(pcm: bytes, sample_rate: int, channels: int, output_path: str,
+                      bitrate: Optional[int] = 192000):
+    """
+    Encode interleaved 16-bit PCM straight to an MP3 file in-process.
+
+    Args:
+        pcm: Raw interleaved signed 16-bit little-endian samples
+        sample_rate: Sample rate of the PCM data
+        channels: Number of interleaved channels (1 or 2)
+        output_path: Path of the MP3 file to write
+        bitrate: Target bitrate in bits per second
+    """
+    import av
+
+    layout = "mono" if channels == 1 else "stereo"
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    # One second of audio per frame; the encoder rebuffers to its frame size
+    block = sample_rate * channels
+
+    with av.open(output_path, "w", format="mp3") as container:
+        stream = container.add_stream("mp3", rate=sample_rate)
+        stream.layout = layout
+        if bitrate:
+            stream.bit_rate = bitrate
+
+        for start in range(0, len(samples), block):
+            frame = av.AudioFrame.from_ndarray(
+                samples[start:start + block].reshape(1, -1), format="s16", layout=layout
+            )
+            frame.sample_rate = sample_rate
+            for packet in stream.encode(frame):
+                container.mux(packet)
+
+        for packet in stream.encode(None):
+            container.mux(packet)
@@ -0,0 +1,95 @@
+"""
+Measure the latency of each transcription preset on a recording.
+
+Usage:
+    python benchmark_transcribe.py meeting.mp3 [--model base] [--presets fast,balanced,accurate]
+                                   [--language en] [--repeat 2]
+
+Each preset is run --repeat times on the same decoded audio with the same
+Whisper model; the best run is reported. The table shows wall time, the
+real-time factor (processing seconds per second of audio), the speedup
+over the slowest preset and how many words each preset produced, which is
+a quick hint at whether a faster preset drops speech.
+"""
+import argparse
+import logging
+import os
+import time
+
+from audio_io import SAMPLE_RATE, load_audio
+from whisper_options import TRANSCRIBE_PRESETS, TranscribeOptions
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def run_benchmark(audio_path: str, model_name: str, presets, language=None, repeat: int = 1):
+    """
+    Transcribe a recording with every preset and time it.
+
+    Returns:
+        One result dict per preset with "preset", "seconds", "rtf", "words" and "segments"
+    """
+    import whisper
+
+    model_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+    logger.info(f"Loading Whisper '{model_name}' model...")
+    model = whisper.load_model(model_name, download_root=model_dir)
+
+    audio = load_audio(audio_path)
+    duration = len(audio) / SAMPLE_RATE
+    logger.info(f"Decoded {duration:.1f} seconds of audio")
+
+    # Warm-up so the first preset does not pay for lazy initialisation
+    model.transcribe(audio[:SAMPLE_RATE * 5], **TRANSCRIBE_PRESETS["fast"].to_whisper())
+
+    results = []
+    for preset in presets:
+        options = TRANSCRIBE_PRESETS[preset].merged(TranscribeOptions(language=language)).to_whisper()
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = model.transcribe(audio, **options)
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best[0]:
+                best = (elapsed, result)
+        elapsed, result = best
+        results.append({
+            "preset": preset,
+            "seconds": elapsed,
+            "rtf": elapsed / duration if duration else 0.0,
+            "words": len(result["text"].split()),
+            "segments": len(result.get("segments", [])),
+        })
+        logger.info(f"{preset}: {elapsed:.2f}s")
+    return results
+
+
+def print_table(results, model_name: str):
+    slowest = max(r["seconds"] for r in results)
+    print(f"\nWhisper model: {model_name}")
+    print(f"{'preset':<10} {'seconds':>9} {'rtf':>7} {'speedup':>8} {'words':>7} {'segments':>9}")
+    for r in results:
+        print(f"{r['preset']:<10} {r['seconds']:>9.2f} {r['rtf']:>7.3f} {slowest / r['seconds']:>7.2f}x "
+              f"{r['words']:>7} {r['segments']:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Whisper transcription presets")
+    parser.add_argument("audio", help="Recording to transcribe")
+    parser.add_argument("--model", default=os.getenv("WHISPER_MODEL", "base"), help="Whisper model size")
+    parser.add_argument("--presets", default=",".join(TRANSCRIBE_PRESETS),
+                        help="Comma-separated presets to compare")
+    parser.add_argument("--language", default=None, help="Language hint; omit to include detection time")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per preset (best is reported)")
+    args = parser.parse_args()
+
+    presets = [p.strip() for p in args.presets.split(",") if p.strip()]
+    unknown = [p for p in presets if p not in TRANSCRIBE_PRESETS]
+    if unknown:
+        parser.error(f"Unknown presets: {', '.join(unknown)}")
+
+    print_table(run_benchmark(args.audio, args.model, presets, args.language, max(1, args.repeat)), args.model)
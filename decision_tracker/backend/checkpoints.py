@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default location of the checkpoint database
+DEFAULT_DB_PATH = os.getenv("CHECKPOINTS_DB_PATH", os.path.join("data", "checkpoints.db"))
+
+# Save the output of each pipeline stage so a restarted job resumes after
+# the last finished stage instead of starting over
+PIPELINE_CHECKPOINTS = os.getenv("PIPELINE_CHECKPOINTS", "true").lower() == "true"
+
+# Recordings longer than 1.5x this are transcribed in chunks of about this
+# many seconds, each checkpointed on its own (0 transcribes in one pass)
+PIPELINE_CHUNK_SECONDS = float(os.getenv("PIPELINE_CHUNK_SECONDS", "600"))
+
+
+class TaskCheckpoint:
+    """The checkpoints of one task, as handed to the pipeline stages."""
+
+    def __init__(self, store: "CheckpointStore", task_id: str):
+        self.store = store
+        self.task_id = task_id
+
+    def get(self, stage: str) -> Optional[Any]:
+        return self.store.load(self.task_id, stage)
+
+    def put(self, stage: str, value: Any):
+        self.store.save(self.task_id, stage, value)
+
+
+class CheckpointStore:
+    """
+    Stage outputs of running tasks.
+
+    Each stage (audio extraction, transcription plan, every transcribed
+    chunk, diarization, analysis, ...) saves its output under the task ID
+    once it finishes. A task that runs again after a crash or restart finds
+    them and skips the stages that already ran. Tasks are also registered
+    with their submission, so tasks interrupted by a restart of the server
+    can be started again. Everything about a task is dropped once it has
+    completed or failed.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                task TEXT NOT NULL,
+                options TEXT,
+                registered_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                task_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                data TEXT NOT NULL,
+                saved_at REAL,
+                PRIMARY KEY (task_id, stage)
+            );
+        """)
+        logger.info(f"Checkpoint store opened at {os.path.abspath(db_path)}")
+
+    def for_task(self, task_id: str) -> TaskCheckpoint:
+        return TaskCheckpoint(self, task_id)
+
+    def register_task(self, task_id: str, task: Dict[str, Any], options: Optional[Dict[str, Any]] = None):
+        """Remember a submitted task so it can be started again after a restart."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?)",
+                (task_id, json.dumps(task, default=str), json.dumps(options) if options is not None else None,
+                 time.time())
+            )
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Registered tasks that never completed or failed, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_id, task, options FROM tasks ORDER BY registered_at"
+            ).fetchall()
+        return [{"task_id": r[0], "task": json.loads(r[1]), "options": json.loads(r[2]) if r[2] else None}
+                for r in rows]
+
+    def save(self, task_id: str, stage: str, value: Any):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?)",
+                (task_id, stage, json.dumps(value, separators=(",", ":"), default=str), time.time())
+            )
+
+    def load(self, task_id: str, stage: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM checkpoints WHERE task_id = ? AND stage = ?", (task_id, stage)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def stages(self, task_id: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage FROM checkpoints WHERE task_id = ? ORDER BY saved_at", (task_id,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def finish(self, task_id: str):
+        """Drop the registration and checkpoints of a task that completed or failed."""
+        self.delete([task_id])
+
+    def delete(self, task_ids: List[str]):
+        if not task_ids:
+            return
+        placeholders = ", ".join("?" for _ in task_ids)
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM checkpoints WHERE task_id IN ({placeholders})", task_ids)
+            self._conn.execute(f"DELETE FROM tasks WHERE task_id IN ({placeholders})", task_ids)
+
+    def delete_before(self, cutoff: float) -> Tuple[int, int]:
+        """
+        Drop tasks registered before cutoff that were never resumed.
+
+        Returns:
+            Number of tasks and bytes of checkpoint data removed
+        """
+        with self._lock, self._conn:
+            task_ids = [r[0] for r in self._conn.execute(
+                "SELECT task_id FROM tasks WHERE registered_at < ? "
+                "UNION SELECT task_id FROM checkpoints GROUP BY task_id HAVING MAX(saved_at) < ?",
+                (cutoff, cutoff)
+            ).fetchall()]
+            if not task_ids:
+                return 0, 0
+            placeholders = ", ".join("?" for _ in task_ids)
+            freed = self._conn.execute(
+                f"SELECT COALESCE(SUM(LENGTH(data)), 0) FROM checkpoints WHERE task_id IN ({placeholders})",
+                task_ids
+            ).fetchone()[0]
+            self._conn.execute(f"DELETE FROM checkpoints WHERE task_id IN ({placeholders})", task_ids)
+            self._conn.execute(f"DELETE FROM tasks WHERE task_id IN ({placeholders})", task_ids)
+        return len(task_ids), freed
@@ -0,0 +1,250 @@
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from audio_io import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# Enable the diarization stage and choose its backend ("auto", "pyannote" or "spectral")
+DIARIZATION_ENABLED = os.getenv("DIARIZATION_ENABLED", "false").lower() == "true"
+DIARIZATION_BACKEND = os.getenv("DIARIZATION_BACKEND", "auto")
+
+
+def _relabel(turns: List[Dict]) -> List[Dict]:
+    """Rename speakers to S1, S2, ... in order of first appearance."""
+    names: Dict[str, str] = {}
+    for turn in turns:
+        if turn["speaker"] not in names:
+            names[turn["speaker"]] = f"S{len(names) + 1}"
+        turn["speaker"] = names[turn["speaker"]]
+    return turns
+
+
+def _mel_filterbank(sr: int, n_fft: int, n_mels: int) -> np.ndarray:
+    """Triangular mel filterbank matrix of shape (n_mels, n_fft // 2 + 1)."""
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    mel_points = np.linspace(hz_to_mel(60.0), hz_to_mel(sr / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mel_points) / sr).astype(int)
+    filters = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            filters[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            filters[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+
+    return filters
+
+
+class SpectralDiarizer:
+    """
+    Lightweight CPU diarizer that needs nothing beyond NumPy.
+
+    The audio is cut into fixed windows, silent windows are dropped, and each
+    voiced window is summarised by the mean and spread of its MFCCs. Windows
+    are grouped by cosine similarity into speaker clusters, which are then
+    merged, refined and smoothed into speaker turns.
+    """
+
+    def __init__(self, window: float = 1.5, similarity: float = 0.5, merge_similarity: float = 0.7,
+                 max_speakers: int = 8):
+        self.window = window
+        self.similarity = similarity
+        self.merge_similarity = merge_similarity
+        self.max_speakers = max_speakers
+        self.n_fft = 512
+        self.n_mels = 40
+        self.n_mfcc = 20
+        self._filters = _mel_filterbank(SAMPLE_RATE, self.n_fft, self.n_mels)
+        # DCT-II basis turning log mel energies into cepstral coefficients
+        k = np.arange(self.n_mfcc)[:, None]
+        n = np.arange(self.n_mels)[None, :]
+        self._dct = np.cos(np.pi * k * (2 * n + 1) / (2 * self.n_mels)).astype(np.float32)
+        self._hann = np.hanning(self.n_fft).astype(np.float32)
+
+    def _embed(self, window_audio: np.ndarray) -> np.ndarray:
+        frames = np.lib.stride_tricks.sliding_window_view(window_audio, self.n_fft)[::self.n_fft // 2]
+        power = np.abs(np.fft.rfft(frames * self._hann, axis=1)) ** 2
+        log_mel = np.log(power @ self._filters.T + 1e-10)
+        # Drop c0 (loudness) so clusters follow voice timbre, not volume
+        mfcc = (log_mel @ self._dct.T)[:, 1:]
+        return np.concatenate([mfcc.mean(axis=0), mfcc.std(axis=0)])
+
+    def diarize(self, audio: np.ndarray, sr: int = SAMPLE_RATE) -> List[Dict]:
+        """
+        Label who speaks when.
+
+        Args:
+            audio: Mono float32 samples
+            sr: Sample rate of the audio (must be SAMPLE_RATE)
+
+        Returns:
+            Speaker turns as dicts with start, end and speaker
+        """
+        size = int(self.window * sr)
+        count = len(audio) // size
+        if count == 0:
+            return []
+
+        windows = audio[:count * size].reshape(count, size)
+        rms = np.sqrt((windows ** 2).mean(axis=1))
+        voiced = np.flatnonzero(rms > max(1e-4, 0.5 * np.median(rms)))
+        if len(voiced) == 0:
+            return []
+
+        embeddings = np.stack([self._embed(windows[i]) for i in voiced])
+        embeddings = (embeddings - embeddings.mean(axis=0)) / (embeddings.std(axis=0) + 1e-8)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-8
+
+        # Leader clustering: join the most similar cluster or start a new one
+        centroids: List[np.ndarray] = []
+        members: List[List[int]] = []
+        for i, embedding in enumerate(embeddings):
+            if centroids:
+                sims = np.array([c @ embedding for c in centroids])
+                best = int(sims.argmax())
+                if sims[best] >= self.similarity or len(centroids) >= self.max_speakers * 2:
+                    members[best].append(i)
+                    centroid = embeddings[members[best]].mean(axis=0)
+                    centroids[best] = centroid / (np.linalg.norm(centroid) + 1e-8)
+                    continue
+            centroids.append(embedding)
+            members.append([i])
+
+        # Merge clusters that describe the same voice
+        while len(centroids) > 1:
+            matrix = np.stack(centroids)
+            sims = matrix @ matrix.T
+            np.fill_diagonal(sims, -1.0)
+            a, b = np.unravel_index(sims.argmax(), sims.shape)
+            if sims[a, b] < self.merge_similarity and len(centroids) <= self.max_speakers:
+                break
+            members[a].extend(members[b])
+            centroid = embeddings[members[a]].mean(axis=0)
+            centroids[a] = centroid / (np.linalg.norm(centroid) + 1e-8)
+            del centroids[b], members[b]
+
+        # Reassign every window to its closest final speaker and smooth
+        # single-window flips with a majority vote over neighbours
+        labels = (embeddings @ np.stack(centroids).T).argmax(axis=1)
+        smoothed = labels.copy()
+        for i in range(1, len(labels) - 1):
+            if labels[i - 1] == labels[i + 1] != labels[i]:
+                smoothed[i] = labels[i - 1]
+
+        turns: List[Dict] = []
+        for label, index in zip(smoothed, voiced):
+            start, end = index * self.window, (index + 1) * self.window
+            speaker = f"cluster_{label}"
+            if turns and turns[-1]["speaker"] == speaker and start - turns[-1]["end"] <= self.window:
+                turns[-1]["end"] = end
+            else:
+                turns.append({"start": start, "end": end, "speaker": speaker})
+
+        return _relabel(turns)
+
+
+class PyannoteDiarizer:
+    """Diarizer backed by the pyannote.audio pipeline, pinned to the CPU."""
+
+    def __init__(self, auth_token: Optional[str] = None):
+        import torch
+        from pyannote.audio import Pipeline
+
+        self.pipeline = Pipeline.from_pretrained(
+            "pyannote/speaker-diarization-3.1", use_auth_token=auth_token
+        )
+        self.pipeline.to(torch.device("cpu"))
+
+    def diarize(self, audio: np.ndarray, sr: int = SAMPLE_RATE) -> List[Dict]:
+        import torch
+
+        annotation = self.pipeline({"waveform": torch.from_numpy(audio).unsqueeze(0), "sample_rate": sr})
+        turns = [
+            {"start": round(turn.start, 2), "end": round(turn.end, 2), "speaker": label}
+            for turn, _, label in annotation.itertracks(yield_label=True)
+        ]
+        return _relabel(turns)
+
+
+def create_diarizer(backend: str = DIARIZATION_BACKEND):
+    """
+    Create the configured diarizer.
+
+    "auto" uses pyannote.audio when it is installed and a Hugging Face token
+    is configured, and the built-in spectral diarizer otherwise.
+    """
+    if backend in ("auto", "pyannote"):
+        token = os.getenv("PYANNOTE_AUTH_TOKEN") or os.getenv("HF_TOKEN")
+        if token or backend == "pyannote":
+            try:
+                diarizer = PyannoteDiarizer(token)
+                logger.info("Using pyannote.audio diarization")
+                return diarizer
+            except Exception as e:
+                if backend == "pyannote":
+                    raise
+                logger.warning(f"pyannote.audio unavailable, using spectral diarization: {str(e)}")
+
+    logger.info("Using built-in spectral diarization")
+    return SpectralDiarizer()
+
+
+def assign_speakers(segments: List[Dict], turns: List[Dict]) -> List[Dict]:
+    """
+    Label each transcript segment with the speaker it overlaps most.
+
+    Args:
+        segments: Compact transcript segments (modified in place)
+        turns: Speaker turns from a diarizer
+
+    Returns:
+        The same segments with a "speaker" key where a turn overlaps
+    """
+    turn_index = 0
+    for segment in segments:
+        # Turns and segments are both ordered by time, so skip turns that
+        # ended before this segment started
+        while turn_index < len(turns) and turns[turn_index]["end"] <= segment["start"]:
+            turn_index += 1
+
+        overlaps: Dict[str, float] = {}
+        i = turn_index
+        while i < len(turns) and turns[i]["start"] < segment["end"]:
+            overlap = min(turns[i]["end"], segment["end"]) - max(turns[i]["start"], segment["start"])
+            if overlap > 0:
+                overlaps[turns[i]["speaker"]] = overlaps.get(turns[i]["speaker"], 0.0) + overlap
+            i += 1
+
+        if overlaps:
+            segment["speaker"] = max(overlaps, key=overlaps.get)
+
+    return segments
+
+
+def format_speaker_transcript(segments: List[Dict]) -> str:
+    """
+    Render segments as a compact speaker-tagged transcript.
+
+    Consecutive segments of the same speaker are joined into one line, e.g.
+    "S1: Let's ship in September.\\nS2: Marketing needs budget."
+    """
+    lines: List[str] = []
+    current = None
+    for segment in segments:
+        speaker = segment.get("speaker", "?")
+        if lines and speaker == current:
+            lines[-1] += " " + segment["text"]
+        else:
+            lines.append(f"{speaker}: {segment['text']}")
+            current = speaker
+    return "\n".join(lines)
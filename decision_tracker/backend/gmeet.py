@@ -6,6 +6,8 @@ import pytz
 from datetime import datetime
 import getpass
 
+from meet_bot import wait_for_meeting_end
+
 
 def Glogin(driver, mail_address, password):
     driver.get(
@@ -70,13 +72,15 @@ def joinNow(driver, meeting_link):
     turnOffMicCam(driver)
     print("Meeting started.")
     
-    # Keep the script running until manually interrupted
+    # Stay until the page reports that the meeting is over or the script
+    # is interrupted
     try:
-        while True:
-            time.sleep(60)  # Check every minute
+        reason = wait_for_meeting_end(driver)
+        print(f"{reason}.")
     except KeyboardInterrupt:
-        driver.quit()
-        print("Meeting ended. Chrome tab closed.")
+        pass
+    driver.quit()
+    print("Meeting ended. Chrome tab closed.")
 
 # Only run this code if the script is executed directly (not imported)
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default location of the idempotency key database
+DEFAULT_DB_PATH = os.getenv("IDEMPOTENCY_DB_PATH", os.path.join("data", "idempotency.db"))
+
+# How long a request with an Idempotency-Key header is answered with the
+# task it created
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
+# Attach submissions of the same audio with the same options to the task
+# that is already processing it instead of starting another one
+REQUEST_COALESCING = os.getenv("REQUEST_COALESCING", "true").lower() == "true"
+
+# Longest Idempotency-Key header accepted
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class IdempotencyConflict(ValueError):
+    """Raised when an Idempotency-Key is reused for a different request."""
+
+
+def request_fingerprint(**fields: Any) -> str:
+    """Hash of the fields that make two submissions the same request."""
+    canonical = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Maps submissions to the task they started.
+
+    Two kinds of entries share one table:
+
+    - Idempotency keys sent by clients, scoped by endpoint. A retry with the
+      same key gets the original task for IDEMPOTENCY_KEY_TTL_HOURS; the
+      same key with a different request is a conflict.
+    - Content fingerprints (audio hash plus options) of submissions. They
+      only count while their task is still running, so concurrent identical
+      uploads share one run but a later upload of the same file runs again.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, key_ttl_hours: float = IDEMPOTENCY_KEY_TTL_HOURS):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self.key_ttl = key_ttl_hours * 3600
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS requests (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS requests_created ON requests (created_at);
+        """)
+        logger.info(f"Idempotency store opened at {os.path.abspath(db_path)}")
+
+    def _find_key(self, key: str, fingerprint: str) -> Optional[str]:
+        # Caller holds the lock
+        row = self._conn.execute(
+            "SELECT fingerprint, task_id FROM requests WHERE key = ? AND created_at >= ?",
+            (f"key:{key}", time.time() - self.key_ttl)
+        ).fetchone()
+        if row and row[0] != fingerprint:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+        return row[1] if row else None
+
+    def lookup(self, key: str, fingerprint: str) -> Optional[str]:
+        """
+        Return the task created for an idempotency key, or None if it is new.
+
+        Raises:
+            IdempotencyConflict: The key belongs to a request with another fingerprint
+        """
+        with self._lock:
+            return self._find_key(key, fingerprint)
+
+    def remember(self, key: str, fingerprint: str, task_id: str):
+        """Record the task created for an idempotency key."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO requests VALUES (?, ?, ?, ?)", (f"key:{key}", fingerprint, task_id, time.time())
+            )
+
+    def claim(self, task_id: str, fingerprint: str, key: Optional[str] = None, coalesce: bool = False,
+              is_running: Optional[Callable[[str], bool]] = None) -> Tuple[str, bool]:
+        """
+        Decide which task serves a submission, in one transaction.
+
+        Args:
+            task_id: ID the submission would get if it starts a new task
+            fingerprint: request_fingerprint of the submission
+            key: Scoped Idempotency-Key, if the client sent one
+            coalesce: Attach to a running task with the same fingerprint
+            is_running: Tells whether a task is still being processed
+
+        Returns:
+            The ID of the task serving the submission, and whether it is
+            task_id, i.e. the caller has to start it
+
+        Raises:
+            IdempotencyConflict: The key belongs to a request with another fingerprint
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM requests WHERE created_at < ?", (now - self.key_ttl,))
+            if key is not None:
+                existing = self._find_key(key, fingerprint)
+                if existing is not None:
+                    return existing, False
+
+            owner = task_id
+            if coalesce:
+                row = self._conn.execute(
+                    "SELECT task_id FROM requests WHERE key = ?", (f"content:{fingerprint}",)
+                ).fetchone()
+                if row and (is_running is None or is_running(row[0])):
+                    owner = row[0]
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO requests VALUES (?, ?, ?, ?)",
+                        (f"content:{fingerprint}", fingerprint, task_id, now)
+                    )
+
+            if key is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO requests VALUES (?, ?, ?, ?)", (f"key:{key}", fingerprint, owner, now)
+                )
+        return owner, owner == task_id
+
+    def release(self, task_id: str):
+        """Forget a task that could not be started, so a retry starts it again."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM requests WHERE task_id = ?", (task_id,))
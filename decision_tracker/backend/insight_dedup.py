@@ -0,0 +1,345 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Default location of the item history database
+DEFAULT_DB_PATH = os.getenv("INSIGHTS_DB_PATH", os.path.join("data", "insights.db"))
+
+# Sentence-transformers model used when the package is installed
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+# Insights sections that are deduplicated, with the field holding the
+# item's main text and the kind its clusters are stored under
+DEDUP_SECTIONS = {
+    "decisionPoints": ("decision", "decision"),
+    "risksConcernsRaised": ("description", "risk"),
+    "actionItems": ("task", "action"),
+    "unresolvedQuestions": ("question", "question"),
+}
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbedder:
+    """
+    Dependency-free text embedder based on feature hashing.
+
+    Word unigrams, word bigrams and character trigrams are hashed into a
+    fixed number of dimensions with sublinear term weighting. It captures
+    lexical rather than semantic similarity, so its threshold is lower.
+    """
+
+    name = "hashing-1024"
+    duplicate_threshold = 0.6
+
+    def __init__(self, dimensions: int = 1024):
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> List[str]:
+        words = _WORD_RE.findall(text.lower())
+        features = list(words)
+        features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                vectors[row, zlib.crc32(feature.encode("utf-8")) % self.dimensions] += 1.0
+        vectors = np.log1p(vectors)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-8
+        return vectors
+
+
+class SentenceTransformerEmbedder:
+    """Semantic embedder running a small sentence-transformers model on the CPU."""
+
+    duplicate_threshold = 0.82
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def create_embedder():
+    """Use sentence-transformers when installed, feature hashing otherwise."""
+    try:
+        embedder = SentenceTransformerEmbedder()
+        logger.info(f"Using sentence-transformers embeddings ({embedder.name})")
+        return embedder
+    except Exception as e:
+        logger.info(f"sentence-transformers unavailable, using hashing embeddings: {str(e)}")
+        return HashingEmbedder()
+
+
+class VectorIndex:
+    """
+    Exact nearest-neighbour index over unit vectors.
+
+    A query scores every stored vector with one matrix-vector product.
+    Even tens of thousands of items of a kind take only milliseconds, and
+    unlike hashing-based approximate search no duplicate above the
+    threshold is ever missed.
+    """
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        # Over-allocated matrix of stored vectors; only the first len(self) rows are used
+        self._vectors = np.zeros((64, dimensions), dtype=np.float32)
+        self._ids: List[str] = []
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, item_id: str, vector: np.ndarray):
+        row = len(self._ids)
+        if row == len(self._vectors):
+            self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+        self._vectors[row] = vector
+        self._ids.append(item_id)
+
+    def nearest(self, vector: np.ndarray) -> Optional[Tuple[str, float]]:
+        """Return the most similar stored id and its cosine similarity."""
+        if not self._ids:
+            return None
+        sims = self._vectors[:len(self._ids)] @ vector
+        best = int(sims.argmax())
+        return self._ids[best], float(sims[best])
+
+
+class InsightDeduplicator:
+    """
+    Clusters equivalent insight items within and across meetings.
+
+    Every decision, risk, action item and question is embedded and matched
+    against the known items of the same kind. A match above the embedder's
+    threshold joins that item's cluster, anything else starts a new one.
+    Items get a stable "itemId" (their cluster) and the history of every
+    cluster across meetings is kept in SQLite. Several processes (the API
+    and queue workers) can share one database: each meeting is matched in
+    a write transaction after loading the clusters other processes added.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, embedder=None):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.embedder = embedder or create_embedder()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS clusters (
+                cluster_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                canonical_text TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                embedder TEXT NOT NULL,
+                first_task_id TEXT,
+                first_seen REAL,
+                last_task_id TEXT,
+                last_seen REAL,
+                occurrences INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS occurrences (
+                cluster_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                item_index INTEGER,
+                text TEXT NOT NULL,
+                seen_at REAL,
+                PRIMARY KEY (cluster_id, task_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS occurrences_task ON occurrences (task_id);
+        """)
+        self._indexes: Dict[str, VectorIndex] = {}
+        # Highest cluster rowid already in the indexes
+        self._loaded_rowid = 0
+        with self._lock, self._conn:
+            count = self._load_clusters()
+        logger.info(f"Loaded {count} insight clusters")
+
+    def _index(self, kind: str) -> VectorIndex:
+        if kind not in self._indexes:
+            dimensions = len(self.embedder.embed(["dimension probe"])[0])
+            self._indexes[kind] = VectorIndex(dimensions)
+        return self._indexes[kind]
+
+    def _load_clusters(self) -> int:
+        """
+        Add clusters stored since the last load to the indexes. Caller holds
+        the lock and commits.
+        """
+        rows = self._conn.execute(
+            "SELECT rowid, cluster_id, kind, canonical_text, embedding, embedder FROM clusters "
+            "WHERE rowid > ? ORDER BY rowid",
+            (self._loaded_rowid,)
+        ).fetchall()
+        if not rows:
+            return 0
+        self._loaded_rowid = rows[-1][0]
+        rows = [r[1:] for r in rows]
+
+        # Clusters embedded by a different model are re-embedded so every
+        # vector in an index lives in the same space
+        stale = [r for r in rows if r[4] != self.embedder.name]
+        if stale:
+            logger.info(f"Re-embedding {len(stale)} insight clusters for {self.embedder.name}")
+            vectors = self.embedder.embed([r[2] for r in stale])
+            self._conn.executemany(
+                "UPDATE clusters SET embedding = ?, embedder = ? WHERE cluster_id = ?",
+                [(v.tobytes(), self.embedder.name, r[0]) for r, v in zip(stale, vectors)]
+            )
+            refreshed = {r[0]: v.tobytes() for r, v in zip(stale, vectors)}
+            rows = [(r[0], r[1], r[2], refreshed.get(r[0], r[3]), r[4]) for r in rows]
+
+        for cluster_id, kind, _, embedding, _ in rows:
+            self._index(kind).add(cluster_id, np.frombuffer(embedding, dtype=np.float32))
+        return len(rows)
+
+    def process(self, task_id: str, insights: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Deduplicate the items of one meeting and record them in the history.
+
+        Items of the same meeting that fall into the same cluster are merged
+        into the first one. Every remaining item gets "itemId", "recurring"
+        and "occurrences" fields.
+
+        Args:
+            task_id: ID of the task the insights belong to
+            insights: Validated insights returned by the agent
+
+        Returns:
+            The insights with duplicate items removed and items annotated
+        """
+        now = time.time()
+        result = dict(insights)
+        last_rowid = None
+
+        with self._lock, self._conn:
+            # Hold the write lock while matching, so a cluster another
+            # process creates meanwhile is seen instead of duplicated
+            self._conn.execute("BEGIN IMMEDIATE")
+            loaded = self._load_clusters()
+            if loaded:
+                logger.info(f"Loaded {loaded} insight clusters added by other processes")
+
+            for section, (field, kind) in DEDUP_SECTIONS.items():
+                items = [item for item in insights.get(section) or [] if isinstance(item, dict) and item.get(field)]
+                if not items:
+                    continue
+
+                vectors = self.embedder.embed([item[field] for item in items])
+                index = self._index(kind)
+                kept: Dict[str, Dict] = {}
+
+                for item_index, (item, vector) in enumerate(zip(items, vectors)):
+                    match = index.nearest(vector)
+                    if match and match[1] >= self.embedder.duplicate_threshold:
+                        cluster_id = match[0]
+                    else:
+                        cluster_id = str(uuid.uuid4())
+                        index.add(cluster_id, vector)
+                        last_rowid = self._conn.execute(
+                            "INSERT INTO clusters (cluster_id, kind, canonical_text, embedding, embedder, "
+                            "first_task_id, first_seen) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (cluster_id, kind, item[field], vector.tobytes(), self.embedder.name, task_id, now)
+                        ).lastrowid
+
+                    if cluster_id in kept:
+                        # Same item repeated within the meeting: fill in fields
+                        # the first mention left empty and drop the repeat
+                        for key, value in item.items():
+                            if value and not kept[cluster_id].get(key):
+                                kept[cluster_id][key] = value
+                        continue
+
+                    inserted = self._conn.execute(
+                        "INSERT OR IGNORE INTO occurrences VALUES (?, ?, ?, ?, ?)",
+                        (cluster_id, task_id, item_index, item[field], now)
+                    ).rowcount
+                    if inserted:
+                        self._conn.execute(
+                            "UPDATE clusters SET occurrences = occurrences + 1, last_task_id = ?, last_seen = ? "
+                            "WHERE cluster_id = ?",
+                            (task_id, now, cluster_id)
+                        )
+                    occurrences = self._conn.execute(
+                        "SELECT occurrences FROM clusters WHERE cluster_id = ?", (cluster_id,)
+                    ).fetchone()[0]
+
+                    kept[cluster_id] = {**item, "itemId": cluster_id, "recurring": occurrences > 1,
+                                        "occurrences": occurrences}
+
+                result[section] = list(kept.values())
+                if len(kept) < len(items):
+                    logger.info(f"Merged {len(items) - len(kept)} duplicate {kind} items in task {task_id}")
+
+        # Only skip this meeting's own clusters on the next load once they are committed
+        if last_rowid is not None:
+            self._loaded_rowid = max(self._loaded_rowid, last_rowid)
+        return result
+
+    def get_item_history(self, cluster_id: str) -> Optional[Dict]:
+        """Return a cluster and every meeting it was mentioned in."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, canonical_text, first_task_id, first_seen, last_task_id, last_seen, occurrences "
+                "FROM clusters WHERE cluster_id = ?",
+                (cluster_id,)
+            ).fetchone()
+            if not row:
+                return None
+            history = self._conn.execute(
+                "SELECT task_id, item_index, text, seen_at FROM occurrences WHERE cluster_id = ? ORDER BY seen_at",
+                (cluster_id,)
+            ).fetchall()
+
+        return {
+            "itemId": cluster_id,
+            "kind": row[0],
+            "text": row[1],
+            "firstTaskId": row[2],
+            "firstSeen": row[3],
+            "lastTaskId": row[4],
+            "lastSeen": row[5],
+            "occurrences": row[6],
+            "history": [{"taskId": h[0], "index": h[1], "text": h[2], "seenAt": h[3]} for h in history],
+        }
+
+    def get_recurring_items(self, kind: Optional[str] = None, min_occurrences: int = 2,
+                            limit: int = 50) -> List[Dict]:
+        """Return the clusters mentioned in at least min_occurrences meetings."""
+        sql = ("SELECT cluster_id, kind, canonical_text, occurrences, first_seen, last_seen "
+               "FROM clusters WHERE occurrences >= ?")
+        params: List[Any] = [min_occurrences]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        sql += " ORDER BY occurrences DESC, last_seen DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {"itemId": r[0], "kind": r[1], "text": r[2], "occurrences": r[3], "firstSeen": r[4], "lastSeen": r[5]}
+            for r in rows
+        ]
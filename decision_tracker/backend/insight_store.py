@@ -0,0 +1,349 @@
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process locking on Windows; use one process per store there
+    fcntl = None
+
+# Directory holding the record file and its index
+DEFAULT_STORE_DIR = os.getenv("INSIGHT_STORE_DIR", os.path.join("data", "insights"))
+
+# Rewrite the record file once this share of it belongs to deleted records
+INSIGHT_STORE_COMPACT_RATIO = float(os.getenv("INSIGHT_STORE_COMPACT_RATIO", "0.5"))
+
+_MAGIC = b"DTINS1\n\x00"
+_RECORD_HEADER = struct.Struct("<IB")
+
+_CODEC_MSGPACK = 1
+_CODEC_JSON = 2
+
+# Sections counted in the index so meetings can be listed without decoding them
+_COUNTED_SECTIONS = {
+    "decisionPoints": "decisions",
+    "actionItems": "action_items",
+    "risksConcernsRaised": "risks",
+    "unresolvedQuestions": "questions",
+}
+
+
+def _encode(value: Any):
+    if msgpack is not None:
+        return _CODEC_MSGPACK, msgpack.packb(value, use_bin_type=True)
+    return _CODEC_JSON, json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _decode(codec: int, payload: bytes) -> Any:
+    if codec == _CODEC_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("Insight record was written with MessagePack, which is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+
+class InsightStore:
+    """
+    Append-only binary store for the insights of finished tasks.
+
+    Each record is a length-prefixed MessagePack blob (compact JSON when
+    msgpack is not installed) in one file that is read through mmap. A
+    SQLite index keeps each record's offset next to the fields needed to
+    list meetings (filename, time, summary, item counts), so listing never
+    decodes a record and the task store only keeps a reference instead of
+    the insights themselves.
+
+    Replaced and deleted records are left in place until their share of
+    the file passes INSIGHT_STORE_COMPACT_RATIO, then the live records are
+    copied to a new file. The new offsets and the name of the new file are
+    committed to the index in one transaction, so a crash at any point
+    leaves the index pointing at a complete file. Appends and rewrites hold
+    a file lock, and readers switch files when another process has
+    compacted the store, so the API and worker processes can share one
+    store.
+    """
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR):
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self._lock = threading.Lock()
+        self._lock_file = open(os.path.join(store_dir, "insights.lock"), "a+b")
+
+        self._conn = sqlite3.connect(os.path.join(store_dir, "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS records (
+                task_id TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                codec INTEGER NOT NULL,
+                filename TEXT,
+                meeting_time REAL,
+                stored_at REAL,
+                summary TEXT,
+                decisions INTEGER,
+                action_items INTEGER,
+                risks INTEGER,
+                questions INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS records_time ON records (meeting_time);
+            CREATE INDEX IF NOT EXISTS records_stored ON records (stored_at);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+
+        with self._file_lock():
+            self.data_path = os.path.join(store_dir, self._data_file())
+            if not os.path.exists(self.data_path) or os.path.getsize(self.data_path) == 0:
+                with open(self.data_path, "wb") as f:
+                    f.write(_MAGIC)
+            self._remove_stale_files()
+        self._file = open(self.data_path, "r+b")
+        if self._file.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{self.data_path} is not an insight store file")
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        logger.info(f"Insight store opened at {os.path.abspath(store_dir)} "
+                    f"({'MessagePack' if msgpack else 'compact JSON'} records)")
+
+    @contextmanager
+    def _file_lock(self, shared: bool = False):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _data_file(self) -> str:
+        """Name of the current record file, as committed to the index."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'data_file'").fetchone()
+        return row[0] if row else "insights.bin"
+
+    def _remove_stale_files(self):
+        """Drop record files left by a compaction that crashed. Caller holds the file lock."""
+        current = os.path.basename(self.data_path)
+        for filename in os.listdir(self.store_dir):
+            if filename.startswith("insights") and filename.endswith(".bin") and filename != current:
+                os.remove(os.path.join(self.store_dir, filename))
+                logger.info(f"Removed stale insight record file {filename}")
+
+    def _reopen_if_replaced(self):
+        """Follow a compaction done by another process. Caller holds the lock."""
+        data_path = os.path.join(self.store_dir, self._data_file())
+        if data_path == self.data_path:
+            return
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+        self.data_path = data_path
+        self._file = open(self.data_path, "r+b")
+        self._remap()
+
+    def _remap(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        self._mapped_size = size
+
+    def put(self, task_id: str, insights: Dict[str, Any], filename: Optional[str] = None,
+            meeting_time: Optional[float] = None):
+        """Store (or replace) the insights of a task."""
+        codec, payload = _encode(insights)
+        counts = {column: len(insights.get(section) or []) for section, column in _COUNTED_SECTIONS.items()}
+        summary = insights.get("executiveSummary")
+        summary = summary[:300] if isinstance(summary, str) else None
+
+        with self._lock, self._file_lock():
+            self._reopen_if_replaced()
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell() + _RECORD_HEADER.size
+            self._file.write(_RECORD_HEADER.pack(len(payload), codec) + payload)
+            self._file.flush()
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (task_id, offset, len(payload), codec, filename, meeting_time, time.time(), summary,
+                     counts["decisions"], counts["action_items"], counts["risks"], counts["questions"])
+                )
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Return the insights of a task, or None if none are stored."""
+        with self._lock, self._file_lock(shared=True):
+            row = self._conn.execute(
+                "SELECT offset, length, codec FROM records WHERE task_id = ?", (task_id,)
+            ).fetchone()
+            if not row:
+                return None
+            offset, length, codec = row
+            self._reopen_if_replaced()
+            if offset + length > self._mapped_size:
+                self._remap()
+            payload = self._map[offset:offset + length]
+        return _decode(codec, payload)
+
+    def get_meta(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Return the indexed fields of a task's record without decoding it."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT task_id, filename, meeting_time, stored_at, summary, decisions, action_items, risks, "
+                "questions FROM records WHERE task_id = ?", (task_id,)
+            ).fetchone()
+        return self._row_to_meta(row) if row else None
+
+    @staticmethod
+    def _row_to_meta(row) -> Dict[str, Any]:
+        return {
+            "task_id": row[0], "filename": row[1], "meeting_time": row[2], "stored_at": row[3],
+            "summary": row[4],
+            "counts": {"decisions": row[5], "actionItems": row[6], "risks": row[7], "questions": row[8]},
+        }
+
+    def list_meetings(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """List stored meetings, newest first, from the index alone."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_id, filename, meeting_time, stored_at, summary, decisions, action_items, risks, "
+                "questions FROM records ORDER BY meeting_time DESC LIMIT ? OFFSET ?",
+                (limit, offset)
+            ).fetchall()
+        return [self._row_to_meta(r) for r in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def delete(self, task_ids: List[str]) -> int:
+        """
+        Delete the insights of tasks.
+
+        Returns:
+            Bytes of record data released
+        """
+        if not task_ids:
+            return 0
+        with self._lock, self._file_lock():
+            self._reopen_if_replaced()
+            placeholders = ", ".join("?" for _ in task_ids)
+            freed = self._conn.execute(
+                f"SELECT COALESCE(SUM(length), 0) FROM records WHERE task_id IN ({placeholders})", task_ids
+            ).fetchone()[0]
+            with self._conn:
+                self._conn.execute(f"DELETE FROM records WHERE task_id IN ({placeholders})", task_ids)
+            self._compact_if_needed()
+        return freed
+
+    def delete_before(self, cutoff: float) -> Tuple[int, int]:
+        """
+        Delete the insights of tasks stored before a timestamp.
+
+        Returns:
+            Number of tasks deleted and bytes of record data released
+        """
+        with self._lock:
+            task_ids = [r[0] for r in self._conn.execute(
+                "SELECT task_id FROM records WHERE stored_at < ?", (cutoff,)
+            ).fetchall()]
+        freed = self.delete(task_ids)
+        if task_ids:
+            logger.info(f"Deleted the insights of {len(task_ids)} meetings stored before {cutoff:.0f}")
+        return len(task_ids), freed
+
+    def _compact_if_needed(self):
+        total = os.fstat(self._file.fileno()).st_size - len(_MAGIC)
+        live = self._conn.execute(
+            f"SELECT COALESCE(SUM(length), 0) + COUNT(*) * {_RECORD_HEADER.size} FROM records"
+        ).fetchone()[0]
+        if total > 0 and (total - live) / total >= INSIGHT_STORE_COMPACT_RATIO:
+            self._compact()
+
+    def _compact(self):
+        """Copy the live records to a new record file. Caller holds the lock."""
+        rows = self._conn.execute("SELECT task_id, offset, length, codec FROM records ORDER BY offset").fetchall()
+        if self._mapped_size < os.fstat(self._file.fileno()).st_size:
+            self._remap()
+
+        new_file = f"insights-{uuid.uuid4().hex[:12]}.bin"
+        new_path = os.path.join(self.store_dir, new_file)
+        new_offsets = []
+        with open(new_path, "wb") as out:
+            out.write(_MAGIC)
+            for task_id, offset, length, codec in rows:
+                new_offsets.append((out.tell() + _RECORD_HEADER.size, task_id))
+                out.write(_RECORD_HEADER.pack(length, codec))
+                out.write(self._map[offset:offset + length])
+            out.flush()
+            os.fsync(out.fileno())
+
+        # The new file only becomes current together with its offsets
+        with self._conn:
+            self._conn.executemany("UPDATE records SET offset = ? WHERE task_id = ?", new_offsets)
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('data_file', ?)", (new_file,))
+
+        before = os.fstat(self._file.fileno()).st_size
+        old_path = self.data_path
+        self._map.close()
+        self._map = None
+        self._file.close()
+        os.remove(old_path)
+        self.data_path = new_path
+        self._file = open(self.data_path, "r+b")
+        self._remap()
+        logger.info(f"Compacted insight store from {before} to {self._mapped_size} bytes ({len(rows)} records)")
+
+    def import_insights_file(self, path: str) -> str:
+        """
+        Load a saved insights JSON file into the store.
+
+        Returns:
+            The task ID the file was stored under
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        insights = data.get("insights", data)
+        task_id = data.get("task_id") or os.path.splitext(os.path.basename(path))[0]
+        meeting_time = os.path.getmtime(path)
+        if data.get("timestamp"):
+            try:
+                from datetime import datetime
+                meeting_time = datetime.fromisoformat(data["timestamp"]).timestamp()
+            except ValueError:
+                pass
+
+        self.put(task_id, insights, filename=data.get("filename"), meeting_time=meeting_time)
+        return task_id
+
+
+if __name__ == "__main__":
+    # Import exported insight files, e.g.
+    #   python insight_store.py ../../meeting_insights_*.json ../../latest_insights.json
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = InsightStore()
+    for path in sys.argv[1:]:
+        logger.info(f"Imported {path} as {store.import_insights_file(path)}")
+    logger.info(f"Insight store holds {store.count()} meetings")
@@ -0,0 +1,205 @@
+import glob
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How often the janitor runs
+JANITOR_INTERVAL = float(os.getenv("JANITOR_INTERVAL", "600"))
+
+# How long each class of artifact is kept, in hours (0 keeps it forever):
+#   raw_audio        uploaded files in uploads/
+#   derived_audio    audio extracted from video uploads (uploads/derived/)
+#   temp             leftovers of interrupted recordings, scripts and renders
+#   transcripts      segment tables in the transcript store
+#   insights         finished task payloads kept in memory, and the
+#                    checkpoints of tasks that never finished
+#   stored_insights  insights in the insight store, by the time they were
+#                    stored; search and action items point at them, so
+#                    they are kept unless this is set
+RETENTION_HOURS = {
+    "raw_audio": float(os.getenv("RETENTION_RAW_AUDIO_HOURS", "24")),
+    "derived_audio": float(os.getenv("RETENTION_DERIVED_AUDIO_HOURS", "1")),
+    "temp": float(os.getenv("RETENTION_TEMP_HOURS", "6")),
+    "transcripts": float(os.getenv("RETENTION_TRANSCRIPTS_HOURS", "0")),
+    "insights": float(os.getenv("RETENTION_INSIGHTS_HOURS", "168")),
+    "stored_insights": float(os.getenv("RETENTION_STORED_INSIGHTS_HOURS", "0")),
+}
+
+ARTIFACT_CLASSES = tuple(RETENTION_HOURS)
+
+# Upper bound on the size of uploads/; least recently used files beyond it
+# are evicted even before their retention expires (0 disables the quota)
+UPLOADS_QUOTA_MB = float(os.getenv("UPLOADS_QUOTA_MB", "0"))
+
+
+def _empty_stats() -> Dict[str, Dict[str, int]]:
+    return {cls: {"removed": 0, "bytes": 0} for cls in ARTIFACT_CLASSES + ("quota",)}
+
+
+class Janitor:
+    """
+    Background garbage collector for files and payloads the pipeline leaves behind.
+
+    Each artifact class has its own retention. On top of that, uploads/ can
+    be given a size quota, enforced by evicting the least recently used
+    files. Files of tasks still being processed are never touched.
+
+    Artifacts that do not live in plain directories are expired through
+    callbacks taking a cutoff timestamp and returning (removed, bytes).
+    """
+
+    def __init__(self, uploads_dir: str, derived_dir: str, temp_patterns: List[str],
+                 in_use: Optional[Callable[[], Set[str]]] = None,
+                 expire_transcripts: Optional[Callable[[float], Tuple[int, int]]] = None,
+                 expire_insights: Optional[Callable[[float], Tuple[int, int]]] = None,
+                 expire_stored_insights: Optional[Callable[[float], Tuple[int, int]]] = None,
+                 retention_hours: Optional[Dict[str, float]] = None,
+                 uploads_quota_mb: float = UPLOADS_QUOTA_MB,
+                 interval: float = JANITOR_INTERVAL):
+        self.uploads_dir = os.path.abspath(uploads_dir)
+        self.derived_dir = os.path.abspath(derived_dir)
+        self.temp_patterns = temp_patterns
+        self.in_use = in_use or (lambda: set())
+        self.expire_transcripts = expire_transcripts
+        self.expire_insights = expire_insights
+        self.expire_stored_insights = expire_stored_insights
+        self.retention_hours = {**RETENTION_HOURS, **(retention_hours or {})}
+        self.uploads_quota_bytes = int(uploads_quota_mb * 1024 * 1024)
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.totals = _empty_stats()
+        self.last_run: Optional[Dict] = None
+        self.runs = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="janitor", daemon=True)
+        self._thread.start()
+        logger.info(f"Janitor running every {self.interval:.0f}s with retention {self.retention_hours}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Janitor run failed: {e}", exc_info=True)
+
+    def _cutoff(self, cls: str, now: float) -> Optional[float]:
+        hours = self.retention_hours.get(cls, 0)
+        return now - hours * 3600 if hours > 0 else None
+
+    def _classify(self, path: str) -> str:
+        return "derived_audio" if os.path.dirname(path) == self.derived_dir else "raw_audio"
+
+    def _upload_files(self, protected: Set[str]) -> List[Tuple[str, os.stat_result]]:
+        files = []
+        for directory in (self.uploads_dir, self.derived_dir):
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.path not in protected:
+                        try:
+                            files.append((entry.path, entry.stat()))
+                        except OSError:
+                            pass
+        return files
+
+    @staticmethod
+    def _remove(path: str, size: int, stats: Dict[str, int]):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"Janitor could not remove {path}: {e}")
+            return
+        stats["removed"] += 1
+        stats["bytes"] += size
+
+    def run_once(self) -> Dict:
+        """
+        Apply retention and quotas once.
+
+        Returns:
+            What was reclaimed in this run, per artifact class
+        """
+        with self._lock:
+            now = time.time()
+            stats = _empty_stats()
+            protected = {os.path.abspath(p) for p in self.in_use() if p}
+
+            # Raw and derived audio by age
+            remaining = []
+            for path, stat in self._upload_files(protected):
+                cls = self._classify(path)
+                cutoff = self._cutoff(cls, now)
+                if cutoff is not None and stat.st_mtime < cutoff:
+                    self._remove(path, stat.st_size, stats[cls])
+                else:
+                    remaining.append((path, stat))
+
+            # Quota on what is left, least recently used first
+            if self.uploads_quota_bytes > 0:
+                total = sum(stat.st_size for _, stat in remaining)
+                if total > self.uploads_quota_bytes:
+                    remaining.sort(key=lambda item: max(item[1].st_atime, item[1].st_mtime))
+                    for path, stat in remaining:
+                        if total <= self.uploads_quota_bytes:
+                            break
+                        self._remove(path, stat.st_size, stats["quota"])
+                        total -= stat.st_size
+
+            # Leftover temporary files
+            cutoff = self._cutoff("temp", now)
+            if cutoff is not None:
+                for pattern in self.temp_patterns:
+                    for path in glob.glob(pattern):
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        if os.path.abspath(path) not in protected and stat.st_mtime < cutoff:
+                            self._remove(path, stat.st_size, stats["temp"])
+
+            for cls, expire in (("transcripts", self.expire_transcripts), ("insights", self.expire_insights),
+                                ("stored_insights", self.expire_stored_insights)):
+                cutoff = self._cutoff(cls, now)
+                if expire is not None and cutoff is not None:
+                    removed, size = expire(cutoff)
+                    stats[cls]["removed"] += removed
+                    stats[cls]["bytes"] += size
+
+            for cls, counts in stats.items():
+                self.totals[cls]["removed"] += counts["removed"]
+                self.totals[cls]["bytes"] += counts["bytes"]
+            self.runs += 1
+            self.last_run = {"time": now, "duration": time.time() - now, "reclaimed": stats}
+
+        reclaimed = sum(counts["bytes"] for counts in stats.values())
+        removed = sum(counts["removed"] for counts in stats.values())
+        if removed:
+            logger.info(f"Janitor removed {removed} artifacts, reclaiming {reclaimed / (1024 * 1024):.1f} MB")
+        return stats
+
+    def get_stats(self) -> Dict:
+        """Reclaimed space per artifact class since startup and for the last run."""
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "retentionHours": dict(self.retention_hours),
+                "uploadsQuotaBytes": self.uploads_quota_bytes,
+                "totals": {cls: dict(counts) for cls, counts in self.totals.items()},
+                "lastRun": self.last_run,
+            }
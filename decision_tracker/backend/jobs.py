@@ -0,0 +1,68 @@
+import json
+import logging
+import os
+import urllib.error
+import urllib.request
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Backend that standalone processes (e.g. a recorder run from the command
+# line) hand their jobs to
+DECISION_TRACKER_API_URL = os.getenv("DECISION_TRACKER_API_URL", "http://127.0.0.1:8000")
+
+# Shared secret for /internal/jobs; optional since the endpoint only accepts local clients
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+_submitter: Optional[Callable[..., str]] = None
+
+
+class JobSubmissionError(Exception):
+    """Raised when a job cannot be handed to the backend."""
+
+
+def register_submitter(submitter: Callable[..., str]):
+    """
+    Register the in-process job submitter.
+
+    The API server registers its task store here at import, so code running
+    inside the server queues work directly instead of over HTTP.
+    """
+    global _submitter
+    _submitter = submitter
+
+
+def submit_audio_job(file_path: str, filename: Optional[str] = None, source: str = "recorder") -> str:
+    """
+    Queue an audio file for processing by the backend.
+
+    Inside the API server the job goes straight onto its worker pool;
+    anywhere else it is posted to the running server's /internal/jobs.
+
+    Args:
+        file_path: Path of the audio file
+        filename: Name to show for the task (defaults to the file name)
+        source: What produced the file
+
+    Returns:
+        ID of the processing task
+    """
+    file_path = os.path.abspath(file_path)
+    filename = filename or os.path.basename(file_path)
+
+    if _submitter is not None:
+        return _submitter(file_path, filename=filename, source=source)
+
+    payload = json.dumps({"file_path": file_path, "filename": filename, "source": source}).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if INTERNAL_API_TOKEN:
+        headers["X-Internal-Token"] = INTERNAL_API_TOKEN
+
+    request = urllib.request.Request(f"{DECISION_TRACKER_API_URL}/internal/jobs", data=payload, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.loads(response.read())["task_id"]
+    except urllib.error.HTTPError as e:
+        raise JobSubmissionError(f"Backend rejected job ({e.code}): {e.read().decode('utf-8', 'replace')}")
+    except (urllib.error.URLError, OSError) as e:
+        raise JobSubmissionError(f"Backend not reachable at {DECISION_TRACKER_API_URL}: {e}")
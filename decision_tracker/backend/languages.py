@@ -0,0 +1,142 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default location of the language database
+DEFAULT_DB_PATH = os.getenv("LANGUAGES_DB_PATH", os.path.join("data", "languages.db"))
+
+# Languages pinned from configuration, e.g. "acme=de,globex=fr"
+LANGUAGE_PINS = {
+    tenant.strip(): language.strip()
+    for tenant, _, language in (pin.partition("=") for pin in os.getenv("LANGUAGE_PINS", "").split(","))
+    if tenant.strip() and language.strip()
+}
+
+# Small Whisper model used for the detection pass; the job's own model then
+# decodes with the language fixed instead of detecting it again
+LANGUAGE_DETECT_MODEL = os.getenv("LANGUAGE_DETECT_MODEL", "tiny")
+
+# Detections less certain than this are left to the job's model
+LANGUAGE_MIN_PROBABILITY = float(os.getenv("LANGUAGE_MIN_PROBABILITY", "0.6"))
+
+# A tenant whose last N meetings were all detected as the same language is
+# treated as pinned to it (0 disables)
+LANGUAGE_AUTO_PIN_AFTER = int(os.getenv("LANGUAGE_AUTO_PIN_AFTER", "3"))
+
+
+class LanguageStore:
+    """
+    Pinned tenant languages and cached detection results.
+
+    A job's language is taken, in order, from the request, the tenant's
+    pin (configured, set through the API, or learned from consistent
+    detections), or an earlier detection of the same audio content. Only
+    when none applies does the job need a detection pass.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS detections (
+                audio_hash TEXT PRIMARY KEY,
+                language TEXT NOT NULL,
+                probability REAL,
+                detected_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS tenants (
+                tenant TEXT PRIMARY KEY,
+                pinned_language TEXT,
+                last_language TEXT,
+                streak INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL
+            );
+        """)
+        logger.info(f"Language store opened at {os.path.abspath(db_path)}")
+
+    def resolve(self, tenant: Optional[str], audio_hash: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Find the language of a job without running detection.
+
+        Returns:
+            The language and where it came from ("config", "pinned",
+            "learned" or "cache"), or (None, None)
+        """
+        with self._lock:
+            if tenant:
+                row = self._conn.execute(
+                    "SELECT pinned_language, last_language, streak FROM tenants WHERE tenant = ?", (tenant,)
+                ).fetchone()
+                if row and row[0]:
+                    return row[0], "pinned"
+                if tenant in LANGUAGE_PINS:
+                    return LANGUAGE_PINS[tenant], "config"
+                if row and LANGUAGE_AUTO_PIN_AFTER and row[2] >= LANGUAGE_AUTO_PIN_AFTER:
+                    return row[1], "learned"
+            if audio_hash:
+                row = self._conn.execute(
+                    "SELECT language FROM detections WHERE audio_hash = ?", (audio_hash,)
+                ).fetchone()
+                if row:
+                    return row[0], "cache"
+        return None, None
+
+    def record_detection(self, audio_hash: Optional[str], tenant: Optional[str], language: str,
+                         probability: Optional[float]):
+        """Cache a detection and update the tenant's run of identical detections."""
+        now = time.time()
+        with self._lock, self._conn:
+            if audio_hash:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO detections VALUES (?, ?, ?, ?)",
+                    (audio_hash, language, probability, now)
+                )
+            if tenant:
+                self._conn.execute(
+                    """
+                    INSERT INTO tenants (tenant, last_language, streak, updated_at) VALUES (?, ?, 1, ?)
+                    ON CONFLICT(tenant) DO UPDATE SET
+                        streak = CASE WHEN last_language = excluded.last_language THEN streak + 1 ELSE 1 END,
+                        last_language = excluded.last_language,
+                        updated_at = excluded.updated_at
+                    """,
+                    (tenant, language, now)
+                )
+
+    def pin(self, tenant: str, language: Optional[str]):
+        """Pin a tenant to a language, or remove the pin with None."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO tenants (tenant, pinned_language, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(tenant) DO UPDATE SET
+                    pinned_language = excluded.pinned_language, updated_at = excluded.updated_at
+                """,
+                (tenant, language, time.time())
+            )
+
+    def list_tenants(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT tenant, pinned_language, last_language, streak, updated_at FROM tenants ORDER BY tenant"
+            ).fetchall()
+        tenants = {
+            r[0]: {"tenant": r[0], "pinnedLanguage": r[1], "lastDetected": r[2], "streak": r[3], "updatedAt": r[4]}
+            for r in rows
+        }
+        for tenant, language in LANGUAGE_PINS.items():
+            tenants.setdefault(tenant, {"tenant": tenant, "pinnedLanguage": None, "lastDetected": None,
+                                        "streak": 0, "updatedAt": None})
+            tenants[tenant]["configuredLanguage"] = language
+        return sorted(tenants.values(), key=lambda t: t["tenant"])
@@ -0,0 +1,759 @@
+import argparse
+import hashlib
+import hmac
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from audio_capture import DeviceCapture, create_capture
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of browser sessions (and so concurrent meetings) per host
+MEET_BOT_POOL_SIZE = int(os.getenv("MEET_BOT_POOL_SIZE", "4"))
+
+# Run Chrome without a window
+MEET_BOT_HEADLESS = os.getenv("MEET_BOT_HEADLESS", "true").lower() == "true"
+
+# Chrome profiles are kept here so cookies survive restarts and logins are reused
+MEET_BOT_PROFILE_DIR = os.getenv("MEET_BOT_PROFILE_DIR", os.path.join("data", "meet_profiles"))
+
+# File in each profile holding a salted hash of the password that logged it
+# in; a stored login is only reused by callers presenting the same password
+CREDENTIALS_FILE = "meet_bot_credentials"
+
+# Seconds to wait for a page element before giving up
+MEET_BOT_WAIT_TIMEOUT = float(os.getenv("MEET_BOT_WAIT_TIMEOUT", "20"))
+
+# Seconds to wait for the host to admit the bot after "Ask to join"
+MEET_BOT_ADMIT_TIMEOUT = float(os.getenv("MEET_BOT_ADMIT_TIMEOUT", "300"))
+
+# Longest a single wait for a page event blocks, which bounds how quickly a
+# leave request or silence is noticed
+MEET_BOT_CHECK_INTERVAL = float(os.getenv("MEET_BOT_CHECK_INTERVAL", "5"))
+
+# Leave once the bot has been alone in the call this many seconds
+MEET_BOT_ALONE_TIMEOUT = float(os.getenv("MEET_BOT_ALONE_TIMEOUT", "30"))
+
+# Leave once the recording has been silent this many seconds (0 disables)
+MEET_BOT_SILENCE_TIMEOUT = float(os.getenv("MEET_BOT_SILENCE_TIMEOUT", "300"))
+
+# CSS selector of the element showing the number of participants
+PARTICIPANT_COUNT_SELECTOR = os.getenv("MEET_BOT_PARTICIPANT_SELECTOR", "[data-participant-count]")
+
+# XPaths of the Meet controls the bot uses. The local stand-in page
+# (meet_standin.html) renders the same controls.
+SELECTORS = {
+    "mic_off": "//*[@aria-label='Turn off microphone']",
+    "camera_off": "//*[@aria-label='Turn off camera']",
+    "join": "//span[text()='Join now' or text()='Ask to join']",
+    "in_call": "//*[@aria-label='Leave call']",
+}
+
+# Texts Meet shows once the bot is no longer in the call
+LEFT_TEXTS = ["You left the meeting", "Meeting ended", "You've left", "You were removed",
+              "Meeting is over", "Call ended"]
+
+
+# Installed in the meeting page after joining. A MutationObserver re-checks
+# the page (debounced) whenever the DOM changes and wakes up any waiter as
+# soon as the meeting ends or the participant count changes.
+MEETING_MONITOR_JS = """
+(function (leftTexts, inCallXPath, participantSelector) {
+  if (window.__meetBot) return;
+  const state = window.__meetBot = {ended: null, participants: null, aloneSince: null, waiters: [], pending: false};
+
+  const notify = () => state.waiters.splice(0).forEach(cb => cb());
+  const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+
+  function check() {
+    state.pending = false;
+    if (state.ended) return;
+
+    const text = document.body ? document.body.innerText : '';
+    let reason = leftTexts.find(t => text.includes(t)) || null;
+    if (!reason) {
+      const controls = document.evaluate(inCallXPath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+      let inCall = false;
+      for (let i = 0; i < controls.snapshotLength; i++) inCall = inCall || visible(controls.snapshotItem(i));
+      if (!inCall) reason = 'Meeting controls disappeared';
+    }
+
+    const counter = document.querySelector(participantSelector);
+    const count = counter ? parseInt(counter.textContent, 10) : NaN;
+    if (!isNaN(count) && count !== state.participants) {
+      state.participants = count;
+      state.aloneSince = count <= 1 ? Date.now() : null;
+      notify();
+    }
+
+    if (reason) {
+      state.ended = reason;
+      notify();
+    }
+  }
+
+  new MutationObserver(() => {
+    if (!state.pending) {
+      state.pending = true;
+      setTimeout(check, 250);
+    }
+  }).observe(document.documentElement, {childList: true, subtree: true, characterData: true, attributes: true});
+  check();
+})(arguments[0], arguments[1], arguments[2]);
+"""
+
+# Resolves as soon as the monitor reports an event, or after the timeout
+MEETING_WAIT_JS = """
+const done = arguments[arguments.length - 1];
+const state = window.__meetBot;
+if (!state) return done(null);
+const report = () => done({
+  ended: state.ended,
+  participants: state.participants,
+  alone_for: state.aloneSince ? (Date.now() - state.aloneSince) / 1000 : 0
+});
+if (state.ended) return report();
+const timer = setTimeout(report, arguments[0] * 1000);
+state.waiters.push(() => { clearTimeout(timer); report(); });
+"""
+
+
+def install_meeting_monitor(driver):
+    """Install the meeting-end monitor in the page the driver shows."""
+    driver.execute_script(MEETING_MONITOR_JS, LEFT_TEXTS, SELECTORS["in_call"], PARTICIPANT_COUNT_SELECTOR)
+
+
+def wait_for_meeting_event(driver, meeting_host: str, timeout: float) -> Dict:
+    """
+    Block until the meeting ends, the participant count changes or the
+    timeout passes, whichever comes first.
+
+    Returns:
+        Dict with "ended" (reason or None), "participants" and "alone_for"
+    """
+    if urlparse(driver.current_url).netloc != meeting_host:
+        return {"ended": "Navigated away from the meeting", "participants": None, "alone_for": 0}
+
+    driver.set_script_timeout(timeout + 10)
+    state = driver.execute_async_script(MEETING_WAIT_JS, timeout)
+    if state is None:
+        # The page was reloaded, which drops the monitor
+        install_meeting_monitor(driver)
+        return {"ended": None, "participants": None, "alone_for": 0}
+    return state
+
+
+def wait_for_meeting_end(driver, timeout: Optional[float] = None,
+                         alone_timeout: float = MEET_BOT_ALONE_TIMEOUT) -> Optional[str]:
+    """
+    Wait until the meeting shown by the driver is over.
+
+    Args:
+        driver: WebDriver that has joined the meeting
+        timeout: Give up after this many seconds (None waits indefinitely)
+        alone_timeout: Treat the meeting as over once nobody else has been
+            in it for this many seconds
+
+    Returns:
+        Why the meeting ended, or None if the timeout passed first
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    # The bot may still be in the lobby waiting to be let in
+    try:
+        WebDriverWait(driver, MEET_BOT_ADMIT_TIMEOUT, poll_frequency=0.5).until(
+            EC.visibility_of_element_located((By.XPATH, SELECTORS["in_call"]))
+        )
+    except TimeoutException:
+        return "Not admitted to the meeting"
+
+    meeting_host = urlparse(driver.current_url).netloc
+    deadline = time.time() + timeout if timeout is not None else None
+    install_meeting_monitor(driver)
+
+    while deadline is None or time.time() < deadline:
+        wait = MEET_BOT_CHECK_INTERVAL if deadline is None else min(MEET_BOT_CHECK_INTERVAL, deadline - time.time())
+        state = wait_for_meeting_event(driver, meeting_host, max(wait, 0.1))
+        if state["ended"]:
+            return state["ended"]
+        if state["alone_for"] >= alone_timeout:
+            return "Everyone else left"
+    return None
+
+
+class MeetBotError(Exception):
+    """Raised when a bot cannot log in or join a meeting."""
+
+
+def _account_key(email: Optional[str]) -> str:
+    return (email or "anonymous").strip().lower()
+
+
+def _hash_password(password: str, salt: bytes) -> bytes:
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=2 ** 14, r=8, p=1)
+
+
+def make_verifier(password: str) -> str:
+    """Salted hash of a password, to check later callers against."""
+    salt = os.urandom(16)
+    return f"{salt.hex()}:{_hash_password(password, salt).hex()}"
+
+
+def check_verifier(verifier: Optional[str], password: Optional[str]) -> bool:
+    """Whether a password matches a verifier from make_verifier."""
+    if not verifier or not password:
+        return False
+    salt, _, digest = verifier.partition(":")
+    try:
+        return hmac.compare_digest(_hash_password(password, bytes.fromhex(salt)).hex(), digest)
+    except ValueError:
+        return False
+
+
+class BrowserSession:
+    """
+    One Chrome instance with its own persistent profile.
+
+    A session logs in once and then joins meeting after meeting; between
+    meetings it idles on a blank page so the next join skips browser start
+    and login. All page interaction uses explicit waits.
+    """
+
+    def __init__(self, account: str, slot: int, headless: bool = MEET_BOT_HEADLESS):
+        self.account = account
+        self.slot = slot
+        self.headless = headless
+        self.profile_dir = os.path.abspath(
+            os.path.join(MEET_BOT_PROFILE_DIR, re.sub(r"[^\w.@-]", "_", account), f"slot{slot}")
+        )
+        self.credentials_path = os.path.join(self.profile_dir, CREDENTIALS_FILE)
+        self.driver = None
+        self.logged_in = False
+        self.meeting_host = None
+        self.capture = None
+
+    def start(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+
+        # Give the browser its own audio sink so its meetings can be recorded
+        # separately from every other session on the host
+        self.capture = create_capture(f"{os.getpid()}_{self.slot}_{self.account}")
+        env = {**os.environ, **(self.capture.browser_env() if self.capture else {})}
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        opt = Options()
+        if self.headless:
+            opt.add_argument("--headless=new")
+        opt.add_argument(f"--user-data-dir={self.profile_dir}")
+        opt.add_argument("--disable-blink-features=AutomationControlled")
+        opt.add_argument("--use-fake-ui-for-media-stream")
+        opt.add_argument("--autoplay-policy=no-user-gesture-required")
+        opt.add_argument("--window-size=1280,800")
+        opt.add_argument("--no-sandbox")
+        opt.add_argument("--disable-dev-shm-usage")
+        opt.add_experimental_option(
+            "prefs",
+            {
+                "profile.default_content_setting_values.media_stream_mic": 1,
+                "profile.default_content_setting_values.media_stream_camera": 1,
+                "profile.default_content_setting_values.geolocation": 0,
+                "profile.default_content_setting_values.notifications": 1,
+            },
+        )
+
+        start_time = time.time()
+        self.driver = webdriver.Chrome(options=opt, service=Service(env=env))
+        logger.info(f"Started browser session {self.account}/slot{self.slot} in {time.time() - start_time:.1f}s")
+
+    def is_alive(self) -> bool:
+        try:
+            return self.driver is not None and self.driver.current_url is not None
+        except Exception:
+            return False
+
+    def _wait(self, timeout: float = MEET_BOT_WAIT_TIMEOUT):
+        from selenium.webdriver.support.ui import WebDriverWait
+        return WebDriverWait(self.driver, timeout, poll_frequency=0.2)
+
+    def accepts(self, email: Optional[str], password: Optional[str]) -> bool:
+        """
+        Whether a caller may use the login stored in this session's profile.
+
+        Guest sessions take anyone; a logged-in profile only takes the
+        password it was logged in with.
+        """
+        if not email:
+            return True
+        try:
+            with open(self.credentials_path) as f:
+                verifier = f.read().strip()
+        except OSError:
+            return False
+        return check_verifier(verifier, password)
+
+    def _check_credentials(self, email: Optional[str], password: Optional[str]):
+        if not self.accepts(email, password):
+            raise MeetBotError(f"Credentials do not match the stored login of {self.account}")
+
+    def ensure_logged_in(self, email: Optional[str], password: Optional[str]):
+        """
+        Log in to Google unless the profile already holds a session.
+
+        Without an email the session stays anonymous and joins as a guest.
+        A stored login is only reused with the password that created it
+        (see accepts).
+
+        Raises:
+            MeetBotError: If the login fails or the credentials do not match
+                the stored login
+        """
+        if not email:
+            return
+        if self.logged_in:
+            self._check_credentials(email, password)
+            return
+
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+
+        driver = self.driver
+        driver.get("https://accounts.google.com/ServiceLogin?hl=en&continue=https://myaccount.google.com/")
+
+        # A persisted profile is redirected straight to My Account
+        wait = self._wait()
+        wait.until(lambda d: "myaccount.google.com" in d.current_url or d.find_elements(By.ID, "identifierId"))
+        if "myaccount.google.com" in driver.current_url:
+            # Profiles from before credentials were recorded have no verifier
+            # and cannot be reused; remove them to log in again
+            self._check_credentials(email, password)
+            logger.info(f"Session {self.account}/slot{self.slot} reused stored login")
+            self.logged_in = True
+            return
+
+        if not password:
+            raise MeetBotError("Password required to log in")
+
+        email_input = wait.until(EC.element_to_be_clickable((By.ID, "identifierId")))
+        email_input.clear()
+        email_input.send_keys(email)
+        wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#identifierNext button, #identifierNext"))).click()
+
+        password_input = wait.until(EC.element_to_be_clickable((By.NAME, "Passwd")))
+        password_input.send_keys(password)
+        wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#passwordNext button, #passwordNext"))).click()
+
+        try:
+            self._wait().until(lambda d: "myaccount.google.com" in d.current_url)
+        except Exception:
+            raise MeetBotError(f"Login did not complete, stopped at {driver.current_url}")
+
+        with open(self.credentials_path, "w") as f:
+            f.write(make_verifier(password))
+        os.chmod(self.credentials_path, 0o600)
+        logger.info(f"Session {self.account}/slot{self.slot} logged in")
+        self.logged_in = True
+
+    def join(self, meeting_link: str):
+        """Open a meeting, turn off mic and camera and join it."""
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+
+        driver = self.driver
+        self.meeting_host = urlparse(meeting_link).netloc
+        driver.get(meeting_link)
+
+        try:
+            self._wait().until(EC.element_to_be_clickable((By.XPATH, SELECTORS["join"])))
+        except TimeoutException:
+            raise MeetBotError("Join button did not appear")
+
+        for key in ("mic_off", "camera_off"):
+            for button in driver.find_elements(By.XPATH, SELECTORS[key]):
+                try:
+                    button.click()
+                except Exception:
+                    pass
+
+        # The toggles may re-render the lobby, so look the button up again
+        join_button = self._wait().until(EC.element_to_be_clickable((By.XPATH, SELECTORS["join"])))
+        asked = join_button.text.strip() == "Ask to join"
+        join_button.click()
+
+        try:
+            self._wait(MEET_BOT_ADMIT_TIMEOUT if asked else MEET_BOT_WAIT_TIMEOUT).until(
+                EC.visibility_of_element_located((By.XPATH, SELECTORS["in_call"]))
+            )
+        except TimeoutException:
+            raise MeetBotError("Not admitted to the meeting" if asked else "Meeting did not start after joining")
+
+        install_meeting_monitor(driver)
+
+    def wait_for_event(self, timeout: float) -> Dict:
+        """Block until the meeting page reports an event or the timeout passes."""
+        return wait_for_meeting_event(self.driver, self.meeting_host, timeout)
+
+    def leave(self):
+        """Leave the current meeting and park the browser on a blank page."""
+        from selenium.webdriver.common.by import By
+
+        try:
+            for button in self.driver.find_elements(By.XPATH, SELECTORS["in_call"]):
+                button.click()
+        except Exception:
+            pass
+        self.driver.get("about:blank")
+        self.meeting_host = None
+
+    def quit(self):
+        try:
+            if self.driver:
+                self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error closing browser session: {str(e)}")
+        self.driver = None
+        if self.capture:
+            self.capture.close()
+            self.capture = None
+
+
+class MeetBotPool:
+    """
+    Pool of pre-warmed browser sessions shared by all meetings on a host.
+
+    Idle sessions are kept per account, so a join for a known account takes
+    a logged-in browser off the shelf, provided the caller presents the
+    password the session logged in with. When the pool is full, idle
+    sessions of other accounts are closed to make room.
+    """
+
+    def __init__(self, max_sessions: int = MEET_BOT_POOL_SIZE, headless: bool = MEET_BOT_HEADLESS):
+        self.max_sessions = max_sessions
+        self.headless = headless
+        self._cond = threading.Condition()
+        self._idle: Dict[str, List[BrowserSession]] = {}
+        self._slots: Dict[str, set] = {}
+        self._size = 0
+
+    def _reserve_slot(self, account: str) -> int:
+        used = self._slots.setdefault(account, set())
+        slot = next(i for i in range(len(used) + 1) if i not in used)
+        used.add(slot)
+        self._size += 1
+        return slot
+
+    def _free_slot(self, session: BrowserSession):
+        self._slots.get(session.account, set()).discard(session.slot)
+        self._size -= 1
+        self._cond.notify_all()
+
+    def acquire(self, email: Optional[str], password: Optional[str], timeout: float = 60.0) -> BrowserSession:
+        """
+        Get a logged-in session for an account.
+
+        Raises:
+            MeetBotError: If no session becomes available within the timeout,
+                the login fails or the password does not match a stored login
+        """
+        account = _account_key(email)
+        deadline = time.time() + timeout
+        reused = None
+        slot = None
+        # Sessions to close once the lock is released
+        closing: List[BrowserSession] = []
+
+        with self._cond:
+            while True:
+                idle = self._idle.get(account)
+                if idle:
+                    session = idle.pop()
+                    if session.is_alive():
+                        reused = session
+                        break
+                    # A dead browser may still hold a driver process and audio capture
+                    self._free_slot(session)
+                    closing.append(session)
+                    continue
+
+                if self._size < self.max_sessions:
+                    slot = self._reserve_slot(account)
+                    break
+
+                # Make room by closing an idle session of another account
+                other = next((sessions for sessions in self._idle.values() if sessions), None)
+                if other:
+                    evicted = other.pop()
+                    self._free_slot(evicted)
+                    closing.append(evicted)
+                    slot = self._reserve_slot(account)
+                    break
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+        for stale in closing:
+            stale.quit()
+        if reused is not None:
+            if not reused.accepts(email, password):
+                with self._cond:
+                    self._idle.setdefault(account, []).append(reused)
+                    self._cond.notify_all()
+                raise MeetBotError(f"Credentials do not match the stored login of {account}")
+            return reused
+        if slot is None:
+            raise MeetBotError("All browser sessions are busy")
+
+        session = BrowserSession(account, slot, self.headless)
+        try:
+            session.start()
+            session.ensure_logged_in(email, password)
+        except Exception:
+            session.quit()
+            with self._cond:
+                self._free_slot(session)
+            raise
+        return session
+
+    def release(self, session: BrowserSession):
+        """Return a session to the pool once its meeting is over."""
+        try:
+            session.leave()
+        except Exception as e:
+            logger.warning(f"Discarding browser session that failed to reset: {str(e)}")
+            self.discard(session)
+            return
+
+        with self._cond:
+            self._idle.setdefault(session.account, []).append(session)
+            self._cond.notify_all()
+
+    def discard(self, session: BrowserSession):
+        """Close a session instead of returning it to the pool."""
+        session.quit()
+        with self._cond:
+            self._free_slot(session)
+
+    def prewarm(self, email: Optional[str], password: Optional[str], count: int):
+        """Start and log in sessions ahead of time so the next joins are fast."""
+        sessions = []
+        for _ in range(count):
+            try:
+                sessions.append(self.acquire(email, password, timeout=0))
+            except Exception as e:
+                logger.warning(f"Stopped pre-warming browser sessions: {str(e)}")
+                break
+        for session in sessions:
+            self.release(session)
+        logger.info(f"Pre-warmed {len(sessions)} browser sessions for {_account_key(email)}")
+
+    def shutdown(self):
+        with self._cond:
+            sessions = [s for idle in self._idle.values() for s in idle]
+            self._idle.clear()
+        for session in sessions:
+            self.discard(session)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            idle = sum(len(s) for s in self._idle.values())
+            return {"max_sessions": self.max_sessions, "sessions": self._size, "idle": idle,
+                    "busy": self._size - idle}
+
+
+class MeetBotManager:
+    """
+    Joins meetings on demand with sessions from a MeetBotPool.
+
+    Each meeting runs on its own worker thread: take a session, join,
+    record until the meeting ends or a leave is requested, then hand the
+    session back to the pool.
+    """
+
+    def __init__(self, output_dir: str, pool: Optional[MeetBotPool] = None,
+                 on_recording: Optional[Callable[[str, Dict], Optional[str]]] = None):
+        """
+        Args:
+            output_dir: Directory recordings are saved to
+            pool: Browser pool to use (a new one by default)
+            on_recording: Called with the recording path and the meeting as
+                soon as a recording is saved; returns the processing task ID
+        """
+        self.output_dir = output_dir
+        self.pool = pool or MeetBotPool()
+        self.on_recording = on_recording
+        self.meetings: Dict[str, Dict] = {}
+        self._leave_events: Dict[str, threading.Event] = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.pool.max_sessions, thread_name_prefix="meet-bot")
+
+    def join_meeting(self, meeting_link: str, email: Optional[str] = None, password: Optional[str] = None,
+                     record: bool = True, audio_device: Optional[str] = None) -> str:
+        """
+        Start joining a meeting in the background.
+
+        Args:
+            meeting_link: Link of the meeting to join
+            email: Google account to join with (None joins as a guest)
+            password: Password of the account; a stored login is only
+                reused with the password it was made with
+            record: Whether to record the meeting
+            audio_device: Input or loopback device to record from instead
+                of the session's own audio sink
+
+        Returns:
+            ID of the meeting, to follow with get_meeting()
+        """
+        meeting_id = str(uuid.uuid4())
+        self.meetings[meeting_id] = {
+            "meeting_id": meeting_id,
+            "meeting_link": meeting_link,
+            "account": _account_key(email),
+            "status": "joining",
+            "requested_at": time.time(),
+        }
+        self._leave_events[meeting_id] = threading.Event()
+        self._executor.submit(self._run_meeting, meeting_id, meeting_link, email, password, record, audio_device)
+        logger.info(f"Meeting {meeting_id} queued for {meeting_link}")
+        return meeting_id
+
+    def leave_meeting(self, meeting_id: str) -> bool:
+        """Ask the bot in a meeting to leave. Returns False for unknown meetings."""
+        event = self._leave_events.get(meeting_id)
+        if event is None:
+            return False
+        event.set()
+        return True
+
+    def get_meeting(self, meeting_id: str) -> Optional[Dict]:
+        meeting = self.meetings.get(meeting_id)
+        return dict(meeting) if meeting else None
+
+    def list_meetings(self) -> List[Dict]:
+        return [dict(m) for m in self.meetings.values()]
+
+    def _run_meeting(self, meeting_id: str, meeting_link: str, email: Optional[str], password: Optional[str],
+                     record: bool, audio_device: Optional[str]):
+        meeting = self.meetings[meeting_id]
+        leave_event = self._leave_events[meeting_id]
+        session = None
+        recorder = None
+        healthy = True
+
+        try:
+            session = self.pool.acquire(email, password)
+            session.join(meeting_link)
+            meeting["status"] = "in_call"
+            meeting["joined_at"] = time.time()
+            meeting["join_seconds"] = round(meeting["joined_at"] - meeting["requested_at"], 2)
+            logger.info(f"Meeting {meeting_id} joined in {meeting['join_seconds']}s")
+
+            if record:
+                from meet_recorder import MeetingRecorder
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                capture = DeviceCapture(audio_device) if audio_device else session.capture
+                recorder = MeetingRecorder(output_dir=self.output_dir,
+                                           filename=f"meet_recording_{timestamp}_{meeting_id[:8]}.mp3",
+                                           capture=capture)
+                recorder.start_recording()
+                meeting["recording_path"] = recorder.full_path
+                meeting["capture_source"] = capture.describe() if capture else "default input device"
+
+            meeting["end_reason"] = self._wait_for_end(session, recorder, leave_event, meeting)
+
+            meeting["status"] = "ended"
+        except Exception as e:
+            logger.error(f"Meeting {meeting_id} failed: {str(e)}", exc_info=not isinstance(e, MeetBotError))
+            meeting["status"] = "failed"
+            meeting["error"] = str(e)
+            healthy = session is not None and session.is_alive()
+        finally:
+            if recorder and recorder.recording:
+                recorder.stop_recording()
+                meeting["recording_path"] = recorder.full_path
+            meeting["ended_at"] = time.time()
+            self._submit_recording(meeting)
+            self._leave_events.pop(meeting_id, None)
+            if session:
+                if healthy:
+                    self.pool.release(session)
+                else:
+                    self.pool.discard(session)
+            logger.info(f"Meeting {meeting_id} finished: {meeting.get('end_reason') or meeting.get('error')}")
+
+    def _wait_for_end(self, session: BrowserSession, recorder, leave_event: threading.Event, meeting: Dict) -> str:
+        """
+        Wait for the first sign that the meeting is over: the page showing it
+        ended, everyone else leaving, a long silence or a leave request.
+        """
+        while not leave_event.is_set():
+            state = session.wait_for_event(MEET_BOT_CHECK_INTERVAL)
+            if state["participants"] is not None:
+                meeting["participants"] = state["participants"]
+            if state["ended"]:
+                return state["ended"]
+            if state["alone_for"] >= MEET_BOT_ALONE_TIMEOUT:
+                return "Everyone else left"
+            if recorder and MEET_BOT_SILENCE_TIMEOUT and recorder.silent_for() >= MEET_BOT_SILENCE_TIMEOUT:
+                return "No audio for too long"
+        return "Left on request"
+
+    def _submit_recording(self, meeting: Dict):
+        """Hand a finished recording to processing."""
+        path = meeting.get("recording_path")
+        if not self.on_recording or not path or not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        try:
+            meeting["task_id"] = self.on_recording(path, dict(meeting))
+            logger.info(f"Meeting {meeting['meeting_id']} recording queued as task {meeting['task_id']}")
+        except Exception as e:
+            logger.error(f"Failed to queue recording {path}: {str(e)}", exc_info=True)
+
+    def shutdown(self):
+        for event in list(self._leave_events.values()):
+            event.set()
+        self._executor.shutdown(wait=True)
+        self.pool.shutdown()
+
+
+if __name__ == "__main__":
+    # Join a meeting (or the local stand-in page) without the API server:
+    #   python meet_bot.py meet_standin.html --no-record --visible
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Join a meeting with a pooled headless browser")
+    parser.add_argument("meeting", help="Meeting link, or a path to a local stand-in page")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    parser.add_argument("--joins", type=int, default=2, help="Join this many times to show session reuse")
+    parser.add_argument("--no-record", action="store_true")
+    parser.add_argument("--visible", action="store_true", help="Show the browser window")
+    args = parser.parse_args()
+
+    link = args.meeting
+    if os.path.exists(link):
+        link = "file://" + os.path.abspath(link) + "?end_after=3000"
+
+    manager = MeetBotManager(output_dir=os.path.abspath("recordings"),
+                             pool=MeetBotPool(max_sessions=1, headless=not args.visible))
+    try:
+        for _ in range(args.joins):
+            meeting_id = manager.join_meeting(link, args.email, args.password, record=not args.no_record)
+            while manager.get_meeting(meeting_id)["status"] in ("joining", "in_call"):
+                time.sleep(0.5)
+            print(manager.get_meeting(meeting_id))
+    finally:
+        manager.shutdown()
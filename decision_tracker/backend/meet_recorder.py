@@ -7,25 +7,31 @@ from datetime import datetime
 import logging
 import subprocess
 import shutil
-import asyncio
-import sys
-import importlib.util
-import re
+
+import numpy as np
+
+import audio_io
+import jobs
+from recording_catalog import RECORDINGS_DIR, get_recording_catalog
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("MeetRecorder")
 
 class MeetingRecorder:
-    def __init__(self, output_dir="D:/DecisionTracker/decision_tracker/audio", filename=None):
+    def __init__(self, output_dir=RECORDINGS_DIR, filename=None, capture=None):
         """
         Initialize the recording functionality
         
         Args:
-            output_dir: Directory to save recordings, defaults to D:/DecisionTracker/decision_tracker/audio
+            output_dir: Directory to save recordings, defaults to RECORDINGS_DIR
             filename: Optional filename, defaults to timestamp-based name
+            capture: Optional capture source from audio_capture (a per-session
+                null sink or a loopback device); defaults to the host's
+                default input device
         """
         self.output_dir = output_dir
+        self.capture = capture
         # Use mp3 extension instead of wav
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         self.filename = filename or f"meet_recording_{timestamp}.mp3"
@@ -49,6 +55,10 @@ class MeetingRecorder:
         self.frames = []
         self.recorder_thread = None
         
+        # Chunks quieter than this RMS level (16-bit samples) count as silence
+        self.silence_threshold = float(os.getenv("RECORDER_SILENCE_RMS", "300"))
+        self.last_sound_time = time.time()
+        
         # Processing flag - default to False to disable automatic processing
         self.process_after_recording = False
 
@@ -100,68 +110,15 @@ class MeetingRecorder:
         return True
     
     def process_recording(self):
-        """Process the recording using the same pipeline as audio uploads"""
+        """Queue the recording on the backend's worker pool, like an audio upload"""
         try:
-            # Import app.py dynamically to avoid circular imports
-            app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
-            spec = importlib.util.spec_from_file_location("app_module", app_path)
-            app_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(app_module)
-            
-            # Extract timestamp from the filename if it matches the pattern, otherwise use current time
-            filename = os.path.basename(self.full_path)
-            timestamp_match = re.search(r'(\d{8}_\d{6})', filename)
-            
-            if timestamp_match:
-                # Use the timestamp from the filename
-                timestamp = timestamp_match.group(1)
-                task_id = f"meet_recording_{timestamp}"
-                logger.info(f"Using timestamp from filename: {timestamp}")
-            else:
-                # Fallback to current time if filename doesn't contain a timestamp
-                task_id = f"meet_recording_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                logger.info("Using current timestamp for task ID")
-            
-            # Add the recording to the processing tasks
-            app_module.processing_tasks[task_id] = {
-                "status": "processing",
-                "filename": os.path.basename(self.full_path),
-                "file_path": self.full_path,
-                "insights": None,
-                "start_time": time.time()
-            }
-            
-            logger.info(f"Created processing task with ID: {task_id}")
-            
-            # Start processing in a background thread to not block
-            processing_thread = threading.Thread(
-                target=self._run_processing, 
-                args=(app_module.process_audio_file, task_id, self.full_path)
-            )
-            processing_thread.start()
-            
-            logger.info(f"Started processing thread for recording: {self.full_path}")
+            task_id = jobs.submit_audio_job(self.full_path, source="recorder")
+            logger.info(f"Queued recording {self.full_path} as task {task_id}")
             return task_id
-            
         except Exception as e:
             logger.error(f"Error starting processing: {str(e)}")
             return None
     
-    def _run_processing(self, process_func, task_id, file_path):
-        """Run the processing function in a separate thread"""
-        try:
-            # Create an event loop for the thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            # Run the processing function
-            loop.run_until_complete(process_func(task_id, file_path))
-            loop.close()
-            
-            logger.info(f"Processing completed for task: {task_id}")
-        except Exception as e:
-            logger.error(f"Error during processing: {str(e)}")
-    
     def _convert_wav_to_mp3(self, wav_path, mp3_path):
         """Convert WAV to MP3 using FFmpeg"""
         try:
@@ -196,32 +153,53 @@ class MeetingRecorder:
     def _record(self):
         """Internal recording function that runs in a thread"""
         try:
-            # Find the default input device index
-            default_device_info = self.audio.get_default_input_device_info()
-            default_device_index = default_device_info["index"]
-            logger.info(f"Using default input device: {default_device_info['name']}")
-            
-            # Open audio stream
-            stream = self.audio.open(
-                format=self.format,
-                channels=self.channels,
-                rate=self.rate,
-                input=True,
-                input_device_index=default_device_index,
-                frames_per_buffer=self.chunk
-            )
+            if self.capture is not None:
+                # Dedicated source for this meeting
+                logger.info(f"Using capture source: {self.capture.describe()}")
+                stream = self.capture.open_stream(self.rate, self.channels, self.chunk)
+                read_chunk = stream.read
+                close_stream = stream.close
+            else:
+                # Find the default input device index
+                default_device_info = self.audio.get_default_input_device_info()
+                default_device_index = default_device_info["index"]
+                logger.info(f"Using default input device: {default_device_info['name']}")
+                
+                # Open audio stream
+                stream = self.audio.open(
+                    format=self.format,
+                    channels=self.channels,
+                    rate=self.rate,
+                    input=True,
+                    input_device_index=default_device_index,
+                    frames_per_buffer=self.chunk
+                )
+                read_chunk = lambda frames: stream.read(frames, exception_on_overflow=False)
+                close_stream = lambda: (stream.stop_stream(), stream.close())
             
             logger.info("Recording started...")
             self.frames = []
             
             # Record until stopped
+            self.last_sound_time = time.time()
             while self.recording:
-                data = stream.read(self.chunk, exception_on_overflow=False)
+                data = read_chunk(self.chunk)
                 self.frames.append(data)
+                samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+                if samples.size and np.sqrt(np.mean(samples ** 2)) > self.silence_threshold:
+                    self.last_sound_time = time.time()
             
             # Stop and close the stream
-            stream.stop_stream()
-            stream.close()
+            close_stream()
+            
+            # Encode the captured PCM straight to MP3 in-process
+            try:
+                logger.info("Encoding MP3 in-process...")
+                audio_io.encode_pcm_to_mp3(b''.join(self.frames), self.rate, self.channels, self.full_path)
+                logger.info(f"MP3 file saved to {self.full_path}")
+                return
+            except Exception as e:
+                logger.warning(f"In-process MP3 encoding failed ({e}), falling back to WAV conversion")
             
             # Save the recorded data first as a WAV file
             logger.info("Saving temporary WAV file...")
@@ -251,12 +229,17 @@ class MeetingRecorder:
             logger.error(f"Error during recording: {str(e)}")
             self.recording = False
     
+    def silent_for(self):
+        """Seconds since the recording last contained sound"""
+        return time.time() - self.last_sound_time
+    
     def get_status(self):
         """Get current recording status"""
         return {
             "recording": self.recording,
             "output_file": self.full_path if self.recording else None,
-            "duration": len(self.frames) * self.chunk / self.rate if self.frames else 0
+            "duration": len(self.frames) * self.chunk / self.rate if self.frames else 0,
+            "silent_for": self.silent_for() if self.recording else 0
         }
     
     def __del__(self):
@@ -267,12 +250,12 @@ class MeetingRecorder:
 
 
 # Function to be called from the temporary script
-def start_recording_from_meet(output_dir="D:/DecisionTracker/decision_tracker/audio"):
+def start_recording_from_meet(output_dir=RECORDINGS_DIR):
     """
     Start recording from Google Meet
     
     Args:
-        output_dir: Directory to save the recording, defaults to D:/DecisionTracker/decision_tracker/audio
+        output_dir: Directory to save the recording, defaults to RECORDINGS_DIR
     
     Returns:
         recorder: The recorder instance
@@ -287,44 +270,41 @@ def start_recording_from_meet(output_dir="D:/DecisionTracker/decision_tracker/au
         return None
 
 
-def get_latest_recording(audio_dir="D:/DecisionTracker/decision_tracker/audio"):
+def get_latest_recording(audio_dir=RECORDINGS_DIR):
     """
-    Get the most recently created MP3 file in the audio directory
+    Get the most recent recording in the audio directory that was not processed yet
+    
+    The lookup is served from the recording catalog. The directory is only
+    synced when the catalog has nothing for it, e.g. when no watcher runs.
     
     Args:
         audio_dir: Directory to look for recordings
         
     Returns:
-        path: Full path to the most recent MP3 file, or None if not found
+        path: Full path to the most recent unprocessed recording, or None if not found
     """
     try:
-        # Ensure the directory exists
-        if not os.path.exists(audio_dir):
-            logger.warning(f"Audio directory {audio_dir} does not exist")
-            return None
-            
-        # Get all MP3 files
-        mp3_files = [os.path.join(audio_dir, f) for f in os.listdir(audio_dir) 
-                    if f.lower().endswith('.mp3')]
+        catalog = get_recording_catalog()
+        latest = catalog.latest_unprocessed(audio_dir)
+        if latest is None:
+            catalog.sync_directory(audio_dir)
+            latest = catalog.latest_unprocessed(audio_dir)
         
-        if not mp3_files:
-            logger.warning(f"No MP3 files found in {audio_dir}")
+        if latest is None:
+            logger.warning(f"No unprocessed recordings found in {audio_dir}")
             return None
-            
-        # Get the most recent file by modification time
-        latest_file = max(mp3_files, key=os.path.getmtime)
-        logger.info(f"Found most recent MP3 file: {latest_file}")
         
-        return latest_file
+        logger.info(f"Found most recent unprocessed recording: {latest['path']}")
+        return latest["path"]
         
     except Exception as e:
         logger.error(f"Error finding latest recording: {str(e)}")
         return None
 
 
-def process_latest_recording(audio_dir="D:/DecisionTracker/decision_tracker/audio"):
+def process_latest_recording(audio_dir=RECORDINGS_DIR):
     """
-    Process the most recent recording in the audio directory
+    Process the most recent unprocessed recording in the audio directory
     
     Args:
         audio_dir: Directory to look for recordings
@@ -338,14 +318,8 @@ def process_latest_recording(audio_dir="D:/DecisionTracker/decision_tracker/audi
         if not latest_file:
             logger.warning("No recordings found to process")
             return None
-            
-        # Create a recorder instance just for processing
-        recorder = MeetingRecorder(output_dir=audio_dir)
-        recorder.full_path = latest_file
         
-        # Process the recording
-        task_id = recorder.process_recording()
-        return task_id
+        return jobs.submit_audio_job(latest_file, source="recorder")
         
     except Exception as e:
         logger.error(f"Error processing latest recording: {str(e)}")
@@ -0,0 +1,182 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from whisper_options import TRANSCRIBE_PRESETS
+
+logger = logging.getLogger(__name__)
+
+# Whisper model sizes from fastest to most accurate
+WHISPER_MODELS = ("tiny", "base", "small", "medium", "large")
+
+# Model used when the policy is disabled or the audio duration is unknown
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+
+# Range of models the policy may pick from; larger models than
+# WHISPER_MODEL cost memory and time, so operators opt into them
+WHISPER_MIN_MODEL = os.getenv("WHISPER_MIN_MODEL", "tiny")
+WHISPER_MAX_MODEL = os.getenv("WHISPER_MAX_MODEL", WHISPER_MODEL)
+
+# Pick the model per job from duration and load instead of always using WHISPER_MODEL
+WHISPER_ADAPTIVE = os.getenv("WHISPER_ADAPTIVE", "true").lower() == "true"
+
+# Target time from submission to finished transcript
+TRANSCRIBE_SLO_SECONDS = float(os.getenv("TRANSCRIBE_SLO_SECONDS", "600"))
+
+# Re-transcribe jobs that got a fast pass with WHISPER_MAX_MODEL once the server is idle
+WHISPER_IDLE_UPGRADE = os.getenv("WHISPER_IDLE_UPGRADE", "false").lower() == "true"
+
+# Rough initial guesses of seconds of processing per second of audio for a
+# greedy pass on CPU (not measured here); refined from the jobs that actually run
+DEFAULT_REALTIME_FACTORS = {"tiny": 0.04, "base": 0.08, "small": 0.25, "medium": 0.7, "large": 1.4}
+
+# Assumed extra cost of beam search with temperature fallback over greedy
+# decoding, used for idle-time upgrades (measure with benchmark_transcribe.py)
+BEAM_COST_FACTOR = 1.8
+
+# Weight of a new measurement in the real-time factor estimate
+_EWMA_WEIGHT = 0.2
+
+# Finished jobs remembered for an idle-time upgrade
+_MAX_UPGRADE_CANDIDATES = 100
+
+
+class ModelPolicy:
+    """
+    Chooses the Whisper model for each job.
+
+    A job gets the largest model whose predicted transcription time fits
+    its share of the latency SLO. The budget is whatever is left of the SLO
+    after the time the job already waited, divided by how many jobs per
+    worker are queued behind it. Long recordings and busy queues therefore
+    get smaller models. Decoding is always the greedy "fast" preset; beam
+    search and temperature fallback are only used when the caller asks for
+    a slower preset, or for idle-time upgrades.
+
+    Predictions use a real-time factor per model that starts from
+    DEFAULT_REALTIME_FACTORS and follows the measured transcription times.
+    """
+
+    def __init__(self, workers: int, slo_seconds: float = TRANSCRIBE_SLO_SECONDS,
+                 min_model: str = WHISPER_MIN_MODEL, max_model: str = WHISPER_MAX_MODEL,
+                 default_model: str = WHISPER_MODEL, adaptive: bool = WHISPER_ADAPTIVE):
+        self.workers = max(1, workers)
+        self.slo_seconds = slo_seconds
+        self.default_model = default_model
+        self.adaptive = adaptive
+        lo, hi = WHISPER_MODELS.index(min_model), WHISPER_MODELS.index(max_model)
+        self.models: List[str] = list(WHISPER_MODELS[min(lo, hi):hi + 1])
+        self.realtime_factors = dict(DEFAULT_REALTIME_FACTORS)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._upgrades: "OrderedDict[str, Dict]" = OrderedDict()
+
+    @staticmethod
+    def _plan(model: str, accurate: bool, duration: Optional[float], predicted: Optional[float],
+              reason: str, **extra) -> Dict[str, Any]:
+        preset = "accurate" if accurate else "fast"
+        return {
+            "model": model,
+            "preset": preset,
+            "beamSize": TRANSCRIBE_PRESETS[preset].beam_size,
+            "temperatureFallback": accurate,
+            "audioDuration": duration,
+            "predictedSeconds": round(predicted, 1) if predicted is not None else None,
+            "reason": reason,
+            **extra
+        }
+
+    def _cost(self, model: str, accurate: bool, duration: float) -> float:
+        return duration * self.realtime_factors[model] * (BEAM_COST_FACTOR if accurate else 1.0)
+
+    def choose(self, duration: Optional[float], queued: int = 0, waited: float = 0.0) -> Dict[str, Any]:
+        """
+        Pick the model for a job that is about to run.
+
+        Args:
+            duration: Length of the audio in seconds (None if unknown)
+            queued: Jobs still waiting behind this one
+            waited: Seconds the job already spent in the queue
+
+        Returns:
+            The plan: "model", decoding "preset" (see whisper_options),
+            "beamSize", "temperatureFallback" and the inputs and
+            prediction behind the choice
+        """
+        if not self.adaptive or not duration:
+            return self._plan(self.default_model, False, duration, None,
+                              "fixed" if not self.adaptive else "unknown_duration", queued=queued)
+
+        budget = max(0.0, self.slo_seconds - waited) / (1 + queued / self.workers)
+        for model in reversed(self.models):
+            cost = self._cost(model, False, duration)
+            if cost <= budget:
+                return self._plan(model, False, duration, cost, "fits_slo",
+                                  queued=queued, budgetSeconds=round(budget, 1))
+
+        model = self.models[0]
+        return self._plan(model, False, duration, self._cost(model, False, duration), "over_slo",
+                          queued=queued, budgetSeconds=round(budget, 1))
+
+    @contextmanager
+    def transcribing(self):
+        """Count a job as transcribing for as long as the block runs."""
+        with self._lock:
+            self._running += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def record(self, plan: Dict[str, Any], elapsed: Optional[float]):
+        """
+        Report how long a planned job took to transcribe.
+
+        Args:
+            plan: The plan returned by choose()
+            elapsed: Transcription time in seconds (None if the job failed)
+        """
+        with self._lock:
+            duration = plan.get("audioDuration")
+            if elapsed and duration and plan["model"] in self.realtime_factors:
+                observed = elapsed / duration / (BEAM_COST_FACTOR if plan["temperatureFallback"] else 1.0)
+                current = self.realtime_factors[plan["model"]]
+                self.realtime_factors[plan["model"]] = (1 - _EWMA_WEIGHT) * current + _EWMA_WEIGHT * observed
+
+    def upgrade_plan(self, duration: Optional[float]) -> Dict[str, Any]:
+        """Plan for an idle-time pass with the most accurate allowed settings."""
+        model = self.models[-1]
+        predicted = self._cost(model, True, duration) if duration else None
+        return self._plan(model, True, duration, predicted, "idle_upgrade")
+
+    def needs_upgrade(self, plan: Dict[str, Any]) -> bool:
+        return plan["model"] != self.models[-1] or not plan["temperatureFallback"]
+
+    def add_upgrade_candidate(self, task_id: str, plan: Dict[str, Any]):
+        with self._lock:
+            self._upgrades[task_id] = plan
+            while len(self._upgrades) > _MAX_UPGRADE_CANDIDATES:
+                self._upgrades.popitem(last=False)
+
+    def next_upgrade_candidate(self) -> Optional[str]:
+        """Most recent job waiting for an upgrade, if nothing else is running."""
+        with self._lock:
+            if self._running or not self._upgrades:
+                return None
+            task_id, _ = self._upgrades.popitem(last=True)
+            return task_id
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "adaptive": self.adaptive,
+                "models": list(self.models),
+                "sloSeconds": self.slo_seconds,
+                "running": self._running,
+                "realtimeFactors": {m: round(self.realtime_factors[m], 3) for m in self.models},
+                "upgradeCandidates": len(self._upgrades),
+            }
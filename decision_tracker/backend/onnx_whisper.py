@@ -0,0 +1,237 @@
+import logging
+import os
+import shutil
+from typing import Any, Dict
+
+from audio_io import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# "torch" runs Whisper with PyTorch, "onnx" with ONNX Runtime on the CPU
+WHISPER_ENGINE = os.getenv("WHISPER_ENGINE", "torch").lower()
+
+WHISPER_ENGINES = ("torch", "onnx")
+
+# Quantize the weights of the exported model to int8 (about 4x smaller and
+# faster on CPUs with VNNI/AVX-512, at a small cost in accuracy)
+WHISPER_ONNX_INT8 = os.getenv("WHISPER_ONNX_INT8", "true").lower() == "true"
+
+# Threads one session uses inside an operator; 0 splits the CPUs of the
+# process between the PROCESSING_WORKERS that transcribe at the same time
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+
+# Threads running independent operators in parallel; Whisper's graphs are
+# mostly a chain, so more than one rarely helps
+ONNX_INTER_OP_THREADS = int(os.getenv("ONNX_INTER_OP_THREADS", "1"))
+
+# Let idle threads spin waiting for work: slightly lower latency, but the
+# spinning burns CPU that other workers on the node could use
+ONNX_ALLOW_SPINNING = os.getenv("ONNX_ALLOW_SPINNING", "false").lower() == "true"
+
+# Default cache of exported models (the agent's model directory)
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+# Hugging Face checkpoints the Whisper sizes are exported from
+HF_WHISPER_MODELS = {
+    "tiny": "openai/whisper-tiny",
+    "base": "openai/whisper-base",
+    "small": "openai/whisper-small",
+    "medium": "openai/whisper-medium",
+    "large": "openai/whisper-large-v3",
+}
+
+# Whisper decodes audio in windows of this many seconds
+_WINDOW_SECONDS = 30
+
+
+def _require_onnx():
+    try:
+        import onnxruntime  # noqa: F401
+        from optimum.onnxruntime import ORTModelForSpeechSeq2Seq  # noqa: F401
+    except ImportError:
+        raise ImportError("The ONNX Whisper engine needs onnxruntime and optimum "
+                          "(pip install onnxruntime 'optimum[exporters,onnxruntime]')")
+
+
+def onnx_model_path(name: str, model_dir: str = DEFAULT_MODEL_DIR, int8: bool = WHISPER_ONNX_INT8) -> str:
+    """Directory an exported Whisper model is cached in."""
+    return os.path.join(model_dir, "onnx", f"whisper-{name}-int8" if int8 else f"whisper-{name}")
+
+
+def _is_exported(path: str) -> bool:
+    return os.path.exists(os.path.join(path, "encoder_model.onnx"))
+
+
+def export_model(name: str, model_dir: str = DEFAULT_MODEL_DIR, int8: bool = WHISPER_ONNX_INT8) -> str:
+    """
+    Export a Whisper model to ONNX, unless it is cached already.
+
+    The encoder and decoder graphs are exported with Optimum from the
+    Hugging Face checkpoint of the model. The int8 variant is made from the
+    float32 export by dynamic quantization of the MatMul and Gemm weights;
+    the convolutions in front of the encoder stay in float32.
+
+    Args:
+        name: Model size ("tiny", "base", "small", "medium", "large")
+        model_dir: Cache directory; models go to <model_dir>/onnx/
+        int8: Also quantize the export and return the quantized model
+
+    Returns:
+        Directory of the exported model
+    """
+    if name not in HF_WHISPER_MODELS:
+        raise ValueError(f"Unknown Whisper model '{name}'. Use one of: {', '.join(HF_WHISPER_MODELS)}")
+    _require_onnx()
+
+    fp32_path = onnx_model_path(name, model_dir, int8=False)
+    if not _is_exported(fp32_path):
+        from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+        from transformers import WhisperProcessor
+
+        logger.info(f"Exporting Whisper '{name}' to ONNX - this may take a few minutes...")
+        temp_path = f"{fp32_path}.tmp"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        cache_dir = os.path.join(model_dir, "hf")
+        model = ORTModelForSpeechSeq2Seq.from_pretrained(HF_WHISPER_MODELS[name], export=True, cache_dir=cache_dir)
+        model.save_pretrained(temp_path)
+        WhisperProcessor.from_pretrained(HF_WHISPER_MODELS[name], cache_dir=cache_dir).save_pretrained(temp_path)
+        os.replace(temp_path, fp32_path)
+        logger.info(f"Exported Whisper '{name}' to {fp32_path}")
+    if not int8:
+        return fp32_path
+
+    int8_path = onnx_model_path(name, model_dir, int8=True)
+    if not _is_exported(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"Quantizing Whisper '{name}' to int8...")
+        temp_path = f"{int8_path}.tmp"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+        for filename in sorted(os.listdir(fp32_path)):
+            source = os.path.join(fp32_path, filename)
+            if filename.endswith(".onnx"):
+                quantize_dynamic(
+                    source, os.path.join(temp_path, filename),
+                    op_types_to_quantize=["MatMul", "Gemm"], weight_type=QuantType.QInt8, per_channel=True,
+                    use_external_data_format=os.path.exists(f"{source}_data")
+                )
+            elif not filename.endswith(".onnx_data"):
+                shutil.copy2(source, temp_path)
+        os.replace(temp_path, int8_path)
+        logger.info(f"Quantized Whisper '{name}' to {int8_path}")
+    return int8_path
+
+
+def session_options():
+    """ONNX Runtime session options for transcription on the CPU."""
+    import onnxruntime as ort
+
+    threads = ONNX_INTRA_OP_THREADS
+    if threads <= 0:
+        cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+        threads = max(1, cpus // max(1, int(os.getenv("PROCESSING_WORKERS", "2"))))
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = max(1, ONNX_INTER_OP_THREADS)
+    options.execution_mode = (
+        ort.ExecutionMode.ORT_PARALLEL if ONNX_INTER_OP_THREADS > 1 else ort.ExecutionMode.ORT_SEQUENTIAL
+    )
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.add_session_config_entry("session.intra_op.allow_spinning", "1" if ONNX_ALLOW_SPINNING else "0")
+    return options
+
+
+class OnnxWhisperModel:
+    """
+    Whisper on ONNX Runtime, with the transcribe() interface of a PyTorch
+    Whisper model.
+
+    Audio is decoded in 30-second windows by the Transformers speech
+    recognition pipeline. Options map onto it as far as they can: language,
+    beam_size, the first temperature of a schedule and initial_prompt are
+    used. Temperature fallback and condition_on_previous_text need
+    Whisper's sequential decoding and are ignored, as are no_speech_threshold
+    and fp16 (which does not apply on the CPU).
+    """
+
+    def __init__(self, path: str, name: str):
+        _require_onnx()
+        from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+        from transformers import WhisperProcessor, pipeline
+
+        self.name = name
+        self.path = path
+        options = session_options()
+        self.processor = WhisperProcessor.from_pretrained(path)
+        self.model = ORTModelForSpeechSeq2Seq.from_pretrained(
+            path, session_options=options, provider="CPUExecutionProvider"
+        )
+        self.pipeline = pipeline(
+            "automatic-speech-recognition", model=self.model, tokenizer=self.processor.tokenizer,
+            feature_extractor=self.processor.feature_extractor, chunk_length_s=_WINDOW_SECONDS
+        )
+        logger.info(f"ONNX Whisper '{name}' loaded from {path} ({options.intra_op_num_threads} threads)")
+
+    def _generate_kwargs(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {"task": "transcribe"}
+        if options.get("language"):
+            kwargs["language"] = options["language"]
+        if options.get("beam_size"):
+            kwargs["num_beams"] = options["beam_size"]
+
+        temperature = options.get("temperature") or 0.0
+        if isinstance(temperature, (list, tuple)):
+            temperature = temperature[0] if temperature else 0.0
+        if temperature > 0 and "num_beams" not in kwargs:
+            kwargs.update(do_sample=True, temperature=temperature)
+
+        if options.get("initial_prompt"):
+            kwargs["prompt_ids"] = self.processor.get_prompt_ids(options["initial_prompt"], return_tensors="pt")
+        return kwargs
+
+    def transcribe(self, audio, **options) -> Dict[str, Any]:
+        """
+        Transcribe decoded 16 kHz mono audio.
+
+        Returns:
+            Dict with "text", "language" and "segments" (start, end, text),
+            shaped like the result of Whisper's transcribe()
+        """
+        duration = len(audio) / SAMPLE_RATE
+        result = self.pipeline(
+            {"raw": audio, "sampling_rate": SAMPLE_RATE}, return_timestamps=True,
+            generate_kwargs=self._generate_kwargs(options)
+        )
+
+        segments = []
+        for chunk in result.get("chunks", []):
+            start, end = chunk["timestamp"]
+            start = start if start is not None else (segments[-1]["end"] if segments else 0.0)
+            # The last chunk of a recording often has no end timestamp
+            end = end if end is not None else duration
+            if chunk["text"].strip():
+                segments.append({"start": start, "end": max(start, end), "text": chunk["text"]})
+        return {"text": result["text"], "language": options.get("language"), "segments": segments}
+
+
+def load_model(name: str, model_dir: str = DEFAULT_MODEL_DIR, int8: bool = WHISPER_ONNX_INT8) -> OnnxWhisperModel:
+    """Load a Whisper model on ONNX Runtime, exporting it on first use."""
+    return OnnxWhisperModel(export_model(name, model_dir, int8), name)
+
+
+if __name__ == "__main__":
+    # Export models ahead of the first job, e.g.
+    #   python onnx_whisper.py base small [--fp32]
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Export Whisper models for the ONNX Runtime engine")
+    parser.add_argument("models", nargs="+", choices=list(HF_WHISPER_MODELS), help="Whisper model sizes")
+    parser.add_argument("--fp32", action="store_true", help="Skip the int8 quantization")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR, help="Cache directory of the models")
+    args = parser.parse_args()
+
+    for model_name in args.models:
+        print(f"{model_name}: {export_model(model_name, args.model_dir, int8=not args.fp32)}")
@@ -0,0 +1,498 @@
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from audio_io import audio_duration, sniff_file
+
+logger = logging.getLogger(__name__)
+
+# Directory meeting recordings are written to and watched
+RECORDINGS_DIR = os.path.abspath(
+    os.getenv("RECORDINGS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "audio"))
+)
+
+# Default location of the recordings catalog
+DEFAULT_DB_PATH = os.getenv("RECORDINGS_DB_PATH", os.path.join("data", "recordings.db"))
+
+# Queue recordings for processing as soon as they land
+RECORDINGS_AUTO_ENQUEUE = os.getenv("RECORDINGS_AUTO_ENQUEUE", "true").lower() == "true"
+
+# Also queue the unprocessed recordings already in the directory when the
+# watcher starts; off, they are only catalogued (and can still be processed
+# by hand), so a first deploy does not run the whole folder through Whisper
+RECORDINGS_BACKFILL = os.getenv("RECORDINGS_BACKFILL", "false").lower() == "true"
+
+# A file must keep the same size and mtime this long before it is catalogued,
+# so recordings still being written are not picked up half-way
+RECORDING_SETTLE_SECONDS = float(os.getenv("RECORDING_SETTLE_SECONDS", "2"))
+
+# Rescan interval when watchdog (inotify) is not installed
+RECORDINGS_POLL_INTERVAL = float(os.getenv("RECORDINGS_POLL_INTERVAL", "5"))
+
+# Processed recordings older than this are archived or deleted (0 keeps them)
+RECORDINGS_RETENTION_DAYS = float(os.getenv("RECORDINGS_RETENTION_DAYS", "0"))
+
+# Where expired recordings are moved; they are deleted when unset
+RECORDINGS_ARCHIVE_DIR = os.getenv("RECORDINGS_ARCHIVE_DIR")
+
+# How often the retention policy is applied
+RECORDINGS_RETENTION_INTERVAL = float(os.getenv("RECORDINGS_RETENTION_INTERVAL", "3600"))
+
+# new: not processed yet, queued: handed to the worker pool,
+# processed/failed: outcome of the last run, archived: moved by retention
+RECORDING_STATES = ("new", "queued", "processed", "failed", "archived")
+
+# Files the recorder writes while a meeting is still in progress
+_TEMP_PREFIXES = ("temp_recording_", ".")
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RecordingCatalog:
+    """
+    Persistent index of the recordings on disk.
+
+    Each file is stored with its size, duration, content hash and
+    processing state. The (directory, state, mtime) index makes "latest
+    unprocessed recording" a single index seek instead of a directory scan.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS recordings (
+                path TEXT PRIMARY KEY,
+                directory TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                size INTEGER,
+                mtime REAL,
+                duration REAL,
+                sha256 TEXT,
+                media_format TEXT,
+                state TEXT NOT NULL DEFAULT 'new',
+                task_id TEXT,
+                added_at REAL,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS recordings_latest ON recordings (directory, state, mtime);
+            CREATE INDEX IF NOT EXISTS recordings_task ON recordings (task_id);
+        """)
+        logger.info(f"Recording catalog opened at {os.path.abspath(db_path)}")
+
+    @staticmethod
+    def _row_to_recording(row) -> Dict:
+        return {
+            "path": row[0], "directory": row[1], "filename": row[2], "size": row[3], "mtime": row[4],
+            "duration": row[5], "sha256": row[6], "mediaFormat": row[7], "state": row[8], "taskId": row[9],
+            "addedAt": row[10], "updatedAt": row[11],
+        }
+
+    def get(self, path: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM recordings WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        return self._row_to_recording(row) if row else None
+
+    def latest_unprocessed(self, directory: str = RECORDINGS_DIR) -> Optional[Dict]:
+        """Return the most recent recording in a directory that was never processed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM recordings WHERE directory = ? AND state = 'new' ORDER BY mtime DESC LIMIT 1",
+                (os.path.abspath(directory),)
+            ).fetchone()
+        return self._row_to_recording(row) if row else None
+
+    def latest(self, directory: str = RECORDINGS_DIR) -> Optional[Dict]:
+        """Return the most recent recording in a directory that is still on disk, whatever its state."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM recordings WHERE directory = ? AND state != 'archived' ORDER BY mtime DESC LIMIT 1",
+                (os.path.abspath(directory),)
+            ).fetchone()
+        return self._row_to_recording(row) if row else None
+
+    def list_recordings(self, state: Optional[str] = None, limit: int = 200) -> List[Dict]:
+        """List recordings, optionally filtered by state, newest first."""
+        with self._lock:
+            if state:
+                rows = self._conn.execute(
+                    "SELECT * FROM recordings WHERE state = ? ORDER BY mtime DESC LIMIT ?", (state, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM recordings ORDER BY mtime DESC LIMIT ?", (limit,)
+                ).fetchall()
+        return [self._row_to_recording(r) for r in rows]
+
+    def add_file(self, path: str) -> Optional[Dict]:
+        """
+        Catalog a file that has finished being written.
+
+        The hash and duration are only recomputed when size or mtime
+        changed. A file whose content changed goes back to "new".
+
+        Returns:
+            The catalogued recording, or None if the file is not audio
+        """
+        path = os.path.abspath(path)
+        filename = os.path.basename(path)
+        if filename.startswith(_TEMP_PREFIXES) or not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        existing = self.get(path)
+        if existing and existing["size"] == stat.st_size and existing["mtime"] == stat.st_mtime:
+            return existing
+
+        media_format = sniff_file(path)
+        if media_format is None:
+            return None
+
+        sha256 = file_sha256(path)
+        duration = audio_duration(path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO recordings (path, directory, filename, size, mtime, duration, sha256, media_format,
+                                        state, task_id, added_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'new', NULL, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size, mtime = excluded.mtime, duration = excluded.duration,
+                    media_format = excluded.media_format, updated_at = excluded.updated_at,
+                    state = CASE WHEN recordings.sha256 IS excluded.sha256 THEN recordings.state ELSE 'new' END,
+                    task_id = CASE WHEN recordings.sha256 IS excluded.sha256 THEN recordings.task_id ELSE NULL END,
+                    sha256 = excluded.sha256
+                """,
+                (path, os.path.dirname(path), filename, stat.st_size, stat.st_mtime, duration, sha256,
+                 media_format, now, now)
+            )
+            self._conn.commit()
+        return self.get(path)
+
+    def remove(self, path: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM recordings WHERE path = ?", (os.path.abspath(path),))
+            self._conn.commit()
+
+    def sync_directory(self, directory: str = RECORDINGS_DIR) -> List[Dict]:
+        """
+        Bring the catalog in line with a directory: catalog new or changed
+        files and drop entries whose file is gone.
+
+        Returns:
+            Recordings in the directory that are still unprocessed
+        """
+        directory = os.path.abspath(directory)
+        if not os.path.isdir(directory):
+            return []
+
+        with os.scandir(directory) as entries:
+            present = {entry.path for entry in entries if entry.is_file()}
+
+        with self._lock:
+            known = {r[0] for r in self._conn.execute(
+                "SELECT path FROM recordings WHERE directory = ?", (directory,)
+            ).fetchall()}
+        for path in known - present:
+            self.remove(path)
+
+        unprocessed = []
+        for path in sorted(present):
+            try:
+                recording = self.add_file(path)
+            except OSError as e:
+                logger.warning(f"Could not catalog {path}: {e}")
+                continue
+            if recording and recording["state"] == "new":
+                unprocessed.append(recording)
+        return unprocessed
+
+    def claim(self, path: str, task_id: str, only_new: bool = False) -> bool:
+        """
+        Mark a recording as queued for a task.
+
+        Fails when the recording is already queued, or with only_new when
+        it was processed before, so a file is never in flight twice.
+        Files not catalogued yet are added on the fly.
+        """
+        path = os.path.abspath(path)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM recordings WHERE path = ?", (path,)).fetchone()
+            if row and (row[0] == "queued" or (only_new and row[0] != "new")):
+                return False
+            if row:
+                self._conn.execute(
+                    "UPDATE recordings SET state = 'queued', task_id = ?, updated_at = ? WHERE path = ?",
+                    (task_id, now, path)
+                )
+            else:
+                size = os.path.getsize(path) if os.path.exists(path) else None
+                mtime = os.path.getmtime(path) if os.path.exists(path) else None
+                self._conn.execute(
+                    "INSERT INTO recordings (path, directory, filename, size, mtime, state, task_id, added_at, "
+                    "updated_at) VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                    (path, os.path.dirname(path), os.path.basename(path), size, mtime, task_id, now, now)
+                )
+            self._conn.commit()
+        return True
+
+    def finish(self, task_id: str, succeeded: bool):
+        """Record the outcome of the task a recording was queued for."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE recordings SET state = ?, updated_at = ? WHERE task_id = ? AND state = 'queued'",
+                ("processed" if succeeded else "failed", time.time(), task_id)
+            )
+            self._conn.commit()
+
+    def requeue_interrupted(self, keep: Iterable[str] = ()) -> int:
+        """
+        Reset recordings left queued by a previous run so they are picked up again.
+
+        Args:
+            keep: Task IDs that are being resumed and stay queued
+        """
+        keep = list(keep)
+        placeholders = ", ".join("?" for _ in keep)
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE recordings SET state = 'new', task_id = NULL, updated_at = ? WHERE state = 'queued'"
+                + (f" AND task_id NOT IN ({placeholders})" if keep else ""),
+                (time.time(), *keep)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def apply_retention(self, max_age_days: float = RECORDINGS_RETENTION_DAYS,
+                        archive_dir: Optional[str] = RECORDINGS_ARCHIVE_DIR) -> Dict[str, int]:
+        """
+        Archive or delete processed recordings older than max_age_days.
+
+        Returns:
+            Number of recordings archived and deleted, and bytes freed
+        """
+        result = {"archived": 0, "deleted": 0, "bytes": 0}
+        if max_age_days <= 0:
+            return result
+
+        cutoff = time.time() - max_age_days * 86400
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size FROM recordings WHERE state = 'processed' AND mtime < ?", (cutoff,)
+            ).fetchall()
+
+        for path, size in rows:
+            try:
+                if archive_dir:
+                    os.makedirs(archive_dir, exist_ok=True)
+                    target = os.path.abspath(os.path.join(archive_dir, os.path.basename(path)))
+                    shutil.move(path, target)
+                    with self._lock:
+                        self._conn.execute(
+                            "UPDATE recordings SET path = ?, directory = ?, state = 'archived', updated_at = ? "
+                            "WHERE path = ?",
+                            (target, os.path.dirname(target), time.time(), path)
+                        )
+                        self._conn.commit()
+                    result["archived"] += 1
+                else:
+                    if os.path.exists(path):
+                        os.remove(path)
+                    self.remove(path)
+                    result["deleted"] += 1
+                result["bytes"] += size or 0
+            except OSError as e:
+                logger.warning(f"Retention could not handle {path}: {e}")
+
+        if rows:
+            logger.info(f"Recording retention: {result}")
+        return result
+
+
+class RecordingWatcher:
+    """
+    Keeps the catalog up to date as recordings land in a directory.
+
+    File system events come from watchdog (inotify on Linux) when it is
+    installed, otherwise the directory is rescanned every
+    RECORDINGS_POLL_INTERVAL seconds. Changed files are catalogued once
+    they have settled; recordings that arrive while the watcher runs are
+    passed to on_arrival. Files already there when it starts are only
+    catalogued, unless backfill is set.
+    """
+
+    def __init__(self, catalog: RecordingCatalog, directory: str = RECORDINGS_DIR,
+                 on_arrival: Optional[Callable[[str], Optional[str]]] = None,
+                 auto_enqueue: bool = RECORDINGS_AUTO_ENQUEUE,
+                 settle_seconds: float = RECORDING_SETTLE_SECONDS,
+                 backfill: bool = RECORDINGS_BACKFILL):
+        self.catalog = catalog
+        self.directory = os.path.abspath(directory)
+        self.on_arrival = on_arrival if auto_enqueue else None
+        self.backfill = backfill
+        self.settle_seconds = settle_seconds
+
+        # path -> (size, mtime, time the file was last seen changing)
+        self._pending: Dict[str, Tuple[int, float, float]] = {}
+        self._pending_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        unprocessed = self.catalog.sync_directory(self.directory)
+        if self.backfill:
+            for recording in unprocessed:
+                self._arrived(recording)
+        elif unprocessed and self.on_arrival is not None:
+            logger.info(f"{len(unprocessed)} unprocessed recordings already in {self.directory} were catalogued "
+                        f"but not queued (set RECORDINGS_BACKFILL=true to queue them)")
+
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+
+            watcher = self
+
+            class _Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    if event.is_directory:
+                        return
+                    watcher.notify(event.src_path)
+                    if getattr(event, "dest_path", None):
+                        watcher.notify(event.dest_path)
+
+            self._observer = Observer()
+            self._observer.schedule(_Handler(), self.directory, recursive=False)
+            self._observer.start()
+            logger.info(f"Watching {self.directory} for recordings")
+        except ImportError:
+            self._observer = None
+            logger.info(f"watchdog not installed, polling {self.directory} every {RECORDINGS_POLL_INTERVAL}s")
+
+        self._thread = threading.Thread(target=self._loop, name="recording-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def notify(self, path: str):
+        """Note that a file changed; it is catalogued once it has settled."""
+        try:
+            stat = os.stat(path)
+            key = (stat.st_size, stat.st_mtime)
+        except OSError:
+            key = (-1, -1.0)
+        with self._pending_lock:
+            previous = self._pending.get(path)
+            if previous is None or previous[:2] != key:
+                self._pending[path] = (*key, time.monotonic())
+
+    def _poll(self):
+        with os.scandir(self.directory) as entries:
+            present = {entry.path: entry.stat() for entry in entries if entry.is_file()}
+        known = {r["path"]: r for r in self.catalog.list_recordings(limit=-1) if r["directory"] == self.directory}
+
+        for path, stat in present.items():
+            recording = known.get(path)
+            if recording is None or recording["size"] != stat.st_size or recording["mtime"] != stat.st_mtime:
+                self.notify(path)
+        for path in known.keys() - present.keys():
+            self.notify(path)
+
+    def _check_pending(self):
+        now = time.monotonic()
+        with self._pending_lock:
+            items = list(self._pending.items())
+
+        for path, (size, mtime, changed_at) in items:
+            try:
+                stat = os.stat(path)
+                current = (stat.st_size, stat.st_mtime)
+            except OSError:
+                current = (-1, -1.0)
+
+            if current != (size, mtime):
+                self.notify(path)
+                continue
+            if now - changed_at < self.settle_seconds:
+                continue
+
+            with self._pending_lock:
+                self._pending.pop(path, None)
+
+            if current == (-1, -1.0):
+                self.catalog.remove(path)
+                continue
+            try:
+                recording = self.catalog.add_file(path)
+            except OSError as e:
+                logger.warning(f"Could not catalog {path}: {e}")
+                continue
+            if recording and recording["state"] == "new":
+                logger.info(f"New recording: {path} ({recording['duration'] or 0:.0f}s)")
+                self._arrived(recording)
+
+    def _arrived(self, recording: Dict):
+        if self.on_arrival is None:
+            return
+        try:
+            self.on_arrival(recording["path"])
+        except Exception as e:
+            logger.error(f"Could not enqueue recording {recording['path']}: {e}")
+
+    def _loop(self):
+        last_poll = 0.0
+        last_retention = 0.0
+        while not self._stop.wait(0.5):
+            try:
+                now = time.monotonic()
+                if self._observer is None and now - last_poll >= RECORDINGS_POLL_INTERVAL:
+                    last_poll = now
+                    self._poll()
+                self._check_pending()
+                if now - last_retention >= RECORDINGS_RETENTION_INTERVAL:
+                    last_retention = now
+                    self.catalog.apply_retention()
+            except Exception as e:
+                logger.error(f"Recording watcher error: {e}", exc_info=True)
+
+
+_catalog: Optional[RecordingCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_recording_catalog() -> RecordingCatalog:
+    """Return the shared RecordingCatalog, creating it on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = RecordingCatalog()
+        return _catalog
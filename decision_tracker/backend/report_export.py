@@ -0,0 +1,273 @@
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import textwrap
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Where rendered reports are cached
+DEFAULT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", os.path.join("data", "exports"))
+
+# Rendered reports kept in the cache before the oldest are removed
+EXPORT_CACHE_MAX_FILES = int(os.getenv("EXPORT_CACHE_MAX_FILES", "500"))
+
+# Bump when the output of a renderer changes so stale cache entries are not served
+REPORT_VERSION = "1"
+
+# Media type and file extension of each export format
+EXPORT_FORMATS = {
+    "pdf": ("application/pdf", "pdf"),
+    "md": ("text/markdown; charset=utf-8", "md"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "json": ("application/json", "json"),
+}
+
+# Insights sections in report order: title, main text field and detail fields
+REPORT_SECTIONS = [
+    ("decisionPoints", "Decision Points", "decision", [("timeline", "Timeline"), ("rationale", "Rationale")]),
+    ("risksConcernsRaised", "Risks & Concerns", "description", [("severity", "Severity"), ("mitigation", "Mitigation")]),
+    ("actionItems", "Action Items", "task", [("assignee", "Assignee"), ("dueDate", "Due")]),
+    ("unresolvedQuestions", "Unresolved Questions", "question", [("context", "Context")]),
+]
+
+CSV_COLUMNS = ["task_id", "filename", "section", "index", "text", "timeline", "rationale", "severity",
+               "mitigation", "assignee", "dueDate", "context", "itemId"]
+
+
+def _item_parts(item, field: str, details: List[Tuple[str, str]]) -> Tuple[str, List[Tuple[str, str]]]:
+    """Split an insight item into its main text and the detail fields it has."""
+    if not isinstance(item, dict):
+        return str(item), []
+    return str(item.get(field, "")), [(label, str(item[key])) for key, label in details if item.get(key)]
+
+
+def _meeting_title(meeting: Dict) -> str:
+    title = meeting.get("filename") or meeting.get("task_id") or "Meeting"
+    if meeting.get("meeting_time"):
+        title += " — " + datetime.fromtimestamp(meeting["meeting_time"]).strftime("%Y-%m-%d %H:%M")
+    return title
+
+
+def report_lines(meetings: List[Dict]) -> List[Tuple[str, str]]:
+    """
+    Lay out meetings as (style, text) lines shared by the text renderers.
+
+    Styles are "title", "heading", "subheading", "text", "item" and "detail".
+    """
+    lines = [("title", "Meeting Decision Insights")]
+    for meeting in meetings:
+        insights = meeting.get("insights") or {}
+        if len(meetings) > 1:
+            lines.append(("heading", _meeting_title(meeting)))
+        lines.append(("subheading", "Executive Summary"))
+        lines.append(("text", str(insights.get("executiveSummary") or "No summary available.")))
+
+        for section, title, field, details in REPORT_SECTIONS:
+            items = insights.get(section) or []
+            if not items:
+                continue
+            lines.append(("subheading", title))
+            for index, item in enumerate(items):
+                text, parts = _item_parts(item, field, details)
+                lines.append(("item", f"{index + 1}. {text}"))
+                lines.extend(("detail", f"{label}: {value}") for label, value in parts)
+    return lines
+
+
+def render_markdown(meetings: List[Dict]) -> bytes:
+    prefixes = {"title": "# ", "heading": "## ", "subheading": "### " if len(meetings) > 1 else "## "}
+    out = []
+    for style, text in report_lines(meetings):
+        if style in prefixes:
+            out.extend([prefixes[style] + text, ""])
+        elif style == "detail":
+            out.append(f"   - {text}")
+        else:
+            out.append(text)
+            if style == "text":
+                out.append("")
+    return ("\n".join(out).rstrip() + "\n").encode("utf-8")
+
+
+def render_csv(meetings: List[Dict]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for meeting in meetings:
+        insights = meeting.get("insights") or {}
+        base = {"task_id": meeting.get("task_id"), "filename": meeting.get("filename")}
+        writer.writerow({**base, "section": "executiveSummary", "text": insights.get("executiveSummary", "")})
+        for section, _, field, _ in REPORT_SECTIONS:
+            for index, item in enumerate(insights.get(section) or []):
+                row = dict(item) if isinstance(item, dict) else {}
+                writer.writerow({**row, **base, "section": section, "index": index,
+                                 "text": row.get(field, "") if row else str(item)})
+    # BOM so spreadsheet applications detect UTF-8
+    return ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+
+def render_json(meetings: List[Dict]) -> bytes:
+    payload = meetings[0] if len(meetings) == 1 else {"meetings": meetings}
+    return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _pdf_escape(text: str) -> bytes:
+    encoded = text.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def render_pdf(meetings: List[Dict]) -> bytes:
+    """
+    Render a plain A4 text report as PDF using the standard Helvetica fonts,
+    so no PDF library is needed.
+    """
+    width, height, margin = 595, 842, 50
+    # font, size, leading, space before, indent
+    styles = {
+        "title": ("F2", 18, 24, 0, 0),
+        "heading": ("F2", 14, 20, 12, 0),
+        "subheading": ("F2", 12, 17, 8, 0),
+        "text": ("F1", 10, 14, 0, 0),
+        "item": ("F1", 10, 14, 2, 0),
+        "detail": ("F1", 9, 12, 0, 14),
+    }
+
+    pages: List[List[bytes]] = [[]]
+    y = height - margin
+    for style, text in report_lines(meetings):
+        font, size, leading, space, indent = styles[style]
+        # Helvetica averages about half an em per character
+        chars = max(20, int((width - 2 * margin - indent) / (size * 0.5)))
+        y -= space
+        for line in textwrap.wrap(text, chars) or [""]:
+            if y - leading < margin:
+                pages.append([])
+                y = height - margin
+            y -= leading
+            x = (width - len(line) * size * 0.5) / 2 if style == "title" else margin + indent
+            pages[-1].append(b"BT /%s %d Tf %.1f %.1f Td (%s) Tj ET" % (
+                font.encode(), size, x, y, _pdf_escape(line)))
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    page_refs = []
+    for commands in pages:
+        stream = b"\n".join(commands)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>" % (width, height, len(objects))
+        )
+        page_refs.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(page_refs), len(page_refs))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+RENDERERS: Dict[str, Callable[[List[Dict]], bytes]] = {
+    "pdf": render_pdf,
+    "md": render_markdown,
+    "csv": render_csv,
+    "json": render_json,
+}
+
+
+def report_key(meetings: List[Dict], fmt: str) -> str:
+    """Hash of the report content, used as cache key and ETag."""
+    canonical = json.dumps([REPORT_VERSION, fmt, meetings], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ReportExporter:
+    """
+    Renders reports on a background worker and caches them on disk.
+
+    Reports are keyed by the hash of their content, so an unchanged meeting
+    is rendered once no matter how often it is exported, and concurrent
+    requests for the same report share a single render.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_workers: int = 1):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+
+    def path_for(self, key: str, fmt: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{EXPORT_FORMATS[fmt][1]}")
+
+    def export(self, meetings: List[Dict], fmt: str, key: Optional[str] = None) -> Future:
+        """
+        Get the path of a rendered report, rendering it if needed.
+
+        Args:
+            meetings: Dicts with task_id, filename, meeting_time and insights
+            fmt: One of EXPORT_FORMATS
+            key: Precomputed report_key of the same meetings and format
+
+        Returns:
+            A future resolving to the path of the cached report
+        """
+        key = key or report_key(meetings, fmt)
+        path = self.path_for(key, fmt)
+
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            if os.path.exists(path):
+                future: Future = Future()
+                future.set_result(path)
+                return future
+            future = self._executor.submit(self._render, meetings, fmt, path)
+            self._pending[key] = future
+
+        future.add_done_callback(lambda _: self._finish(key))
+        return future
+
+    def _finish(self, key: str):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _render(self, meetings: List[Dict], fmt: str, path: str) -> str:
+        data = RENDERERS[fmt](meetings)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        logger.info(f"Rendered {fmt} report of {len(meetings)} meeting(s): {len(data)} bytes")
+        self._prune()
+        return path
+
+    def _prune(self):
+        """Remove the least recently written reports beyond the cache limit."""
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.is_file() and not e.name.endswith(".tmp")]
+            if len(entries) <= EXPORT_CACHE_MAX_FILES:
+                return
+            entries.sort(key=lambda e: e.stat().st_mtime)
+            for entry in entries[:len(entries) - EXPORT_CACHE_MAX_FILES]:
+                os.remove(entry.path)
+        except OSError as e:
+            logger.warning(f"Failed to prune export cache: {str(e)}")
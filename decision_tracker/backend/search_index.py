@@ -0,0 +1,248 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default location of the search database
+DEFAULT_DB_PATH = os.getenv("SEARCH_DB_PATH", os.path.join("data", "search.db"))
+
+# Insights sections that are indexed, with the document kind they are
+# stored under and the fields joined into the searchable text
+INDEXED_SECTIONS = {
+    "decisionPoints": ("decision", ["decision", "timeline", "rationale"]),
+    "risksConcernsRaised": ("risk", ["description", "severity", "mitigation"]),
+    "actionItems": ("action", ["task", "assignee", "dueDate"]),
+    "unresolvedQuestions": ("question", ["question", "context"]),
+}
+
+DOCUMENT_KINDS = ("summary", "decision", "risk", "action", "question", "segment")
+
+# Multiplier applied to the bm25 score of each document kind so extracted
+# insights rank above raw transcript segments that mention the same words
+_KIND_BOOST = {"decision": 1.5, "action": 1.4, "risk": 1.3, "question": 1.2, "summary": 1.1, "segment": 1.0}
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _item_text(item: Any, fields: List[str]) -> str:
+    if not isinstance(item, dict):
+        return str(item)
+    return " — ".join(str(item[f]) for f in fields if item.get(f))
+
+
+def build_match_query(query: str, match_all: bool = True) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word is quoted so punctuation in user input can never be parsed
+    as FTS5 syntax; the last word also matches as a prefix.
+    """
+    terms = _TERM_RE.findall(query)
+    if not terms:
+        return None
+    quoted = [f'"{t}"' for t in terms[:-1]] + [f'"{terms[-1]}" *']
+    return (" AND " if match_all else " OR ").join(quoted)
+
+
+class SearchIndex:
+    """
+    Full-text index of insights and transcripts across all meetings.
+
+    Documents live in a plain table indexed by task so a meeting can be
+    re-indexed cheaply; an external-content FTS5 table kept in sync by
+    triggers provides ranked search over them.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meetings (
+                task_id TEXT PRIMARY KEY,
+                filename TEXT,
+                meeting_time REAL,
+                indexed_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                task_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                ref INTEGER,
+                start REAL,
+                end REAL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS documents_task ON documents (task_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                text, content='documents', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+                INSERT INTO documents_fts (rowid, text) VALUES (new.id, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+                INSERT INTO documents_fts (documents_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+        """)
+        logger.info(f"Search index opened at {os.path.abspath(db_path)}")
+
+    def index_meeting(self, task_id: str, insights: Dict[str, Any], segments: Optional[List[Dict]] = None,
+                      spans: Optional[List[Dict]] = None, filename: Optional[str] = None,
+                      meeting_time: Optional[float] = None):
+        """
+        Add a meeting to the index, replacing anything indexed for it before.
+
+        Args:
+            task_id: ID of the task the insights belong to
+            insights: Validated insights of the meeting
+            segments: Optional transcript segments to index as well
+            spans: Optional insight spans giving items a time range
+            filename: Original filename of the recording
+            meeting_time: Unix time of the meeting
+        """
+        span_lookup = {(s["section"], s["index"]): s for s in spans or []}
+        rows = []
+
+        summary = insights.get("executiveSummary")
+        if summary:
+            rows.append((task_id, "summary", 0, None, None, str(summary)))
+
+        for section, (kind, fields) in INDEXED_SECTIONS.items():
+            for index, item in enumerate(insights.get(section) or []):
+                text = _item_text(item, fields)
+                if not text:
+                    continue
+                span = span_lookup.get((section, index), {})
+                rows.append((task_id, kind, index, span.get("start"), span.get("end"), text))
+
+        for index, segment in enumerate(segments or []):
+            if segment.get("text"):
+                rows.append((task_id, "segment", index, segment["start"], segment["end"], segment["text"]))
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM documents WHERE task_id = ?", (task_id,))
+            self._conn.executemany(
+                "INSERT INTO documents (task_id, kind, ref, start, end, text) VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meetings VALUES (?, ?, ?, ?)",
+                (task_id, filename, meeting_time, time.time())
+            )
+        logger.info(f"Indexed {len(rows)} documents for task {task_id}")
+
+    def search(self, query: str, kinds: Optional[List[str]] = None, task_id: Optional[str] = None,
+               limit: int = 20, offset: int = 0) -> List[Dict]:
+        """
+        Search all indexed meetings.
+
+        All words must match; if nothing does, any word may match instead.
+
+        Args:
+            query: Free-text query
+            kinds: Optional document kinds to restrict the search to
+            task_id: Optional task to restrict the search to
+            limit: Maximum number of hits
+            offset: Number of hits to skip
+
+        Returns:
+            Hits ordered by relevance
+        """
+        for match_all in (True, False):
+            match = build_match_query(query, match_all)
+            if match is None:
+                return []
+            hits = self._search(match, kinds, task_id, limit, offset)
+            if hits or offset:
+                return hits
+        return []
+
+    def _search(self, match: str, kinds: Optional[List[str]], task_id: Optional[str],
+                limit: int, offset: int) -> List[Dict]:
+        boost = " ".join(f"WHEN '{kind}' THEN {weight}" for kind, weight in _KIND_BOOST.items())
+        sql = f"""
+            SELECT d.task_id, d.kind, d.ref, d.start, d.end, d.text,
+                   snippet(documents_fts, 0, '[', ']', '…', 16),
+                   bm25(documents_fts) * CASE d.kind {boost} ELSE 1.0 END AS score,
+                   m.filename, m.meeting_time
+            FROM documents_fts
+            JOIN documents d ON d.id = documents_fts.rowid
+            LEFT JOIN meetings m ON m.task_id = d.task_id
+            WHERE documents_fts MATCH ?
+        """
+        params: List[Any] = [match]
+        if kinds:
+            sql += f" AND d.kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        if task_id:
+            sql += " AND d.task_id = ?"
+            params.append(task_id)
+        sql += " ORDER BY score LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        return [
+            {
+                "task_id": r[0], "kind": r[1], "ref": r[2], "start": r[3], "end": r[4], "text": r[5],
+                "snippet": r[6], "score": round(-r[7], 4), "filename": r[8], "meeting_time": r[9],
+            }
+            for r in rows
+        ]
+
+    def meeting_count(self) -> int:
+        """Return the number of indexed meetings."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+
+    def import_insights_file(self, path: str) -> str:
+        """
+        Index a saved insights JSON file.
+
+        Accepts both bare insights and the {"task_id", "timestamp",
+        "filename", "insights"} wrapper written by the frontend.
+
+        Returns:
+            The task ID the file was indexed under
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        insights = data.get("insights", data)
+        task_id = data.get("task_id") or os.path.splitext(os.path.basename(path))[0]
+        meeting_time = os.path.getmtime(path)
+        if data.get("timestamp"):
+            try:
+                from datetime import datetime
+                meeting_time = datetime.fromisoformat(data["timestamp"]).timestamp()
+            except ValueError:
+                pass
+
+        self.index_meeting(task_id, insights, filename=data.get("filename"), meeting_time=meeting_time)
+        return task_id
+
+
+if __name__ == "__main__":
+    # Backfill the index from saved insights files:
+    #   python search_index.py ../../meeting_insights_*.json latest_insights.json
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    index = SearchIndex()
+    for path in sys.argv[1:]:
+        try:
+            print(f"Indexed {path} as {index.import_insights_file(path)}")
+        except Exception as e:
+            print(f"Failed to index {path}: {e}")
+    print(f"{index.meeting_count()} meetings indexed")
@@ -11,6 +11,8 @@ from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 import re
 
+from meet_bot import wait_for_meeting_end
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -306,11 +308,11 @@ async def join_google_meet_direct(meet_code, duration_seconds=60):
             browser.save_screenshot("meet_after_join.png")
             logger.info("Saved screenshot after clicking join")
             
-            # Stay in the meeting for the specified duration
-            logger.info(f"Staying in the meeting for {duration_seconds} seconds")
-            await asyncio.sleep(duration_seconds)
+            # Stay until the meeting ends, at most for the specified duration
+            logger.info(f"Staying in the meeting for up to {duration_seconds} seconds")
+            reason = await asyncio.to_thread(wait_for_meeting_end, browser, duration_seconds)
             
-            logger.info("Successfully stayed in Google Meet for the specified duration")
+            logger.info(f"Left Google Meet: {reason or 'duration elapsed'}")
             return True
         else:
             # Try using JavaScript to find and click any join button
@@ -352,9 +354,10 @@ async def join_google_meet_direct(meet_code, duration_seconds=60):
                 
                 if result and "Found and clicked" in result:
                     logger.info("Join button clicked via JavaScript")
-                    # Stay in the meeting for the specified duration
-                    logger.info(f"Staying in the meeting for {duration_seconds} seconds")
-                    await asyncio.sleep(duration_seconds)
+                    # Stay until the meeting ends, at most for the specified duration
+                    logger.info(f"Staying in the meeting for up to {duration_seconds} seconds")
+                    reason = await asyncio.to_thread(wait_for_meeting_end, browser, duration_seconds)
+                    logger.info(f"Left Google Meet: {reason or 'duration elapsed'}")
                     return True
                 else:
                     logger.error("Could not find join button with any method")
@@ -449,7 +452,8 @@ async def main():
                 
                 if join_button_found:
                     print("Successfully joined the meeting!")
-                    await asyncio.sleep(60)  # Stay in the meeting for 1 minute
+                    # Stay until the meeting ends, at most for 1 minute
+                    await asyncio.to_thread(wait_for_meeting_end, browser, 60)
                     print("Google Meet session completed successfully.")
                 else:
                     print("Could not find join button after login.")
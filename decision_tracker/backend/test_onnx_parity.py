@@ -0,0 +1,119 @@
+"""
+Check that the ONNX Runtime Whisper engine matches PyTorch Whisper.
+
+Usage:
+    python test_onnx_parity.py meeting.mp3 [--model base] [--language en] [--seconds 300]
+                               [--max-wer 0.1] [--fp32]
+
+Both engines transcribe the same decoded audio with greedy decoding (the
+"fast" preset). The table shows the wall time and real-time factor of
+each engine, the speedup of ONNX Runtime and the word error rate of the
+ONNX transcript measured against the PyTorch one. The script exits with
+status 1 when that error rate is above --max-wer, so it can gate a switch
+to WHISPER_ENGINE=onnx or a new export.
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+
+from audio_io import SAMPLE_RATE, load_audio
+from onnx_whisper import DEFAULT_MODEL_DIR, HF_WHISPER_MODELS, load_model
+from whisper_options import TRANSCRIBE_PRESETS, TranscribeOptions
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def normalize_words(text: str):
+    return re.findall(r"[\w']+", text.lower())
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level edit distance between two transcripts, relative to the reference length."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def run_parity(audio_path: str, model_name: str, language=None, seconds: float = 300, int8: bool = True):
+    """
+    Transcribe a recording with both engines.
+
+    Returns:
+        Dict with "duration", "wer" and per engine ("torch", "onnx") the
+        "seconds", "rtf", "words" and "segments" of its run
+    """
+    import whisper
+
+    audio = load_audio(audio_path)
+    if seconds:
+        audio = audio[:int(seconds * SAMPLE_RATE)]
+    duration = len(audio) / SAMPLE_RATE
+    logger.info(f"Decoded {duration:.1f} seconds of audio")
+
+    options = TRANSCRIBE_PRESETS["fast"].merged(TranscribeOptions(language=language, fp16=False)).to_whisper()
+    models = {
+        "torch": whisper.load_model(model_name, download_root=DEFAULT_MODEL_DIR),
+        "onnx": load_model(model_name, DEFAULT_MODEL_DIR, int8=int8),
+    }
+
+    runs = {}
+    for engine, model in models.items():
+        # Warm-up so neither engine pays for lazy initialisation
+        model.transcribe(audio[:SAMPLE_RATE * 5], **options)
+        start = time.perf_counter()
+        result = model.transcribe(audio, **options)
+        elapsed = time.perf_counter() - start
+        runs[engine] = {
+            "text": result["text"],
+            "seconds": elapsed,
+            "rtf": elapsed / duration if duration else 0.0,
+            "words": len(normalize_words(result["text"])),
+            "segments": len(result.get("segments", [])),
+        }
+        logger.info(f"{engine}: {elapsed:.2f}s")
+
+    return {"duration": duration, "wer": word_error_rate(runs["torch"]["text"], runs["onnx"]["text"]), **runs}
+
+
+def print_table(report, model_name: str, int8: bool):
+    print(f"\nWhisper model: {model_name} ({'int8' if int8 else 'fp32'} ONNX export), "
+          f"{report['duration']:.1f} s of audio")
+    print(f"{'engine':<8} {'seconds':>9} {'rtf':>7} {'speedup':>8} {'words':>7} {'segments':>9}")
+    for engine in ("torch", "onnx"):
+        r = report[engine]
+        print(f"{engine:<8} {r['seconds']:>9.2f} {r['rtf']:>7.3f} {report['torch']['seconds'] / r['seconds']:>7.2f}x "
+              f"{r['words']:>7} {r['segments']:>9}")
+    print(f"WER of ONNX against PyTorch: {report['wer']:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ONNX Runtime and PyTorch Whisper transcripts")
+    parser.add_argument("audio", help="Recording to transcribe")
+    parser.add_argument("--model", default=os.getenv("WHISPER_MODEL", "base"), choices=list(HF_WHISPER_MODELS),
+                        help="Whisper model size")
+    parser.add_argument("--language", default=None, help="Language hint")
+    parser.add_argument("--seconds", type=float, default=300, help="Audio to compare (0 for all of it)")
+    parser.add_argument("--max-wer", type=float, default=0.1, help="Highest word error rate that passes")
+    parser.add_argument("--fp32", action="store_true", help="Compare the float32 export instead of int8")
+    args = parser.parse_args()
+
+    report = run_parity(args.audio, args.model, args.language, args.seconds, int8=not args.fp32)
+    print_table(report, args.model, not args.fp32)
+    if report["wer"] > args.max_wer:
+        print(f"FAILED: WER {report['wer']:.3f} is above {args.max_wer}")
+        sys.exit(1)
+    print("OK")
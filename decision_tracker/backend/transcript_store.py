@@ -0,0 +1,297 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default location of the transcript database
+DEFAULT_DB_PATH = os.getenv("TRANSCRIPT_DB_PATH", os.path.join("data", "transcripts.db"))
+
+# Field holding the main text of an item in each insights section
+INSIGHT_TEXT_FIELDS = {
+    "decisionPoints": "decision",
+    "risksConcernsRaised": "description",
+    "actionItems": "task",
+    "unresolvedQuestions": "question",
+}
+
+# Maximum number of consecutive segments an insight can be mapped onto
+_MAX_SPAN_SEGMENTS = 3
+
+# Score an extra segment must add before a window is widened to include it
+_SPAN_WIDEN_PENALTY = 0.25
+
+# Short function words that carry no signal when matching items to segments
+_STOP_WORDS = {
+    "the", "and", "for", "with", "that", "this", "will", "are", "was", "were", "have",
+    "has", "had", "from", "into", "our", "your", "their", "they", "them", "then", "than",
+    "should", "would", "could", "can", "been", "being", "about", "also", "just", "all",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9$%']+")
+
+
+def _tokens(text: str) -> set:
+    return {w for w in _WORD_RE.findall(text.lower()) if len(w) > 2 and w not in _STOP_WORDS}
+
+
+def compact_segments(whisper_segments: List[Dict], offset: float = 0.0) -> List[Dict]:
+    """
+    Reduce Whisper's segment dicts to the fields kept in the segment table.
+
+    Args:
+        whisper_segments: The "segments" list of a Whisper transcribe() result
+        offset: Seconds added to every timestamp (start of the transcribed
+            chunk within the recording)
+
+    Returns:
+        Segments with start, end, text, avg_logprob and, when Whisper
+        produced them, words as [word, start, end] triples
+    """
+    segments = []
+    for segment in whisper_segments:
+        compact = {
+            "start": round(float(segment["start"]) + offset, 2),
+            "end": round(float(segment["end"]) + offset, 2),
+            "text": segment["text"].strip(),
+            "avg_logprob": round(float(segment.get("avg_logprob", 0.0)), 3),
+        }
+        if segment.get("words"):
+            compact["words"] = [
+                [w["word"].strip(), round(float(w["start"]) + offset, 2), round(float(w["end"]) + offset, 2)]
+                for w in segment["words"]
+            ]
+        segments.append(compact)
+    return segments
+
+
+def map_insights_to_segments(insights: Dict[str, Any], segments: List[Dict]) -> List[Dict]:
+    """
+    Find the time range of the transcript each insight item came from.
+
+    Every item is matched against windows of up to three consecutive
+    segments by the share of its content words they contain. Wider windows
+    are penalised so an item is only spread over several segments when
+    they each contribute to the match.
+
+    Args:
+        insights: Validated insights returned by the agent
+        segments: Segment table of the same meeting
+
+    Returns:
+        One span per matched item with section, index, start, end and score
+    """
+    segment_tokens = [_tokens(segment["text"]) for segment in segments]
+    spans = []
+
+    for section, field in INSIGHT_TEXT_FIELDS.items():
+        for index, item in enumerate(insights.get(section) or []):
+            text = item.get(field, "") if isinstance(item, dict) else str(item)
+            item_tokens = _tokens(text)
+            if not item_tokens:
+                continue
+
+            best = None
+            for first in range(len(segments)):
+                window = set()
+                for last in range(first, min(first + _MAX_SPAN_SEGMENTS, len(segments))):
+                    window |= segment_tokens[last]
+                    score = len(item_tokens & window) / len(item_tokens)
+                    adjusted = score - _SPAN_WIDEN_PENALTY * (last - first)
+                    if score > 0 and (best is None or adjusted > best[0]):
+                        best = (adjusted, score, first, last)
+
+            if best:
+                _, score, first, last = best
+                spans.append({
+                    "section": section,
+                    "index": index,
+                    "start": segments[first]["start"],
+                    "end": segments[last]["end"],
+                    "first_segment": first,
+                    "last_segment": last,
+                    "score": round(score, 3),
+                })
+
+    return spans
+
+
+class TranscriptStore:
+    """
+    SQLite-backed store for transcript segment tables.
+
+    Segments are stored one row per segment with an index on start time, so
+    a time slice of a long meeting is read without loading the whole
+    transcript. Insight spans map insight items to time ranges.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                task_id TEXT PRIMARY KEY,
+                language TEXT,
+                duration REAL,
+                segment_count INTEGER,
+                created_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS segments (
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                start REAL NOT NULL,
+                end REAL NOT NULL,
+                text TEXT NOT NULL,
+                avg_logprob REAL,
+                words TEXT,
+                speaker TEXT,
+                PRIMARY KEY (task_id, idx)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS segments_time ON segments (task_id, start);
+            CREATE TABLE IF NOT EXISTS insight_spans (
+                task_id TEXT NOT NULL,
+                section TEXT NOT NULL,
+                item_index INTEGER NOT NULL,
+                start REAL NOT NULL,
+                end REAL NOT NULL,
+                first_segment INTEGER NOT NULL,
+                last_segment INTEGER NOT NULL,
+                score REAL,
+                PRIMARY KEY (task_id, section, item_index)
+            ) WITHOUT ROWID;
+        """)
+        # Databases created before speaker diarization lack the speaker column
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(segments)")}
+        if "speaker" not in columns:
+            self._conn.execute("ALTER TABLE segments ADD COLUMN speaker TEXT")
+        logger.info(f"Transcript store opened at {os.path.abspath(db_path)}")
+
+    def save_transcript(self, task_id: str, segments: List[Dict], language: Optional[str] = None):
+        """Store (or replace) the segment table of a task."""
+        rows = [
+            (task_id, idx, s["start"], s["end"], s["text"], s.get("avg_logprob"),
+             json.dumps(s["words"], separators=(",", ":")) if s.get("words") else None,
+             s.get("speaker"))
+            for idx, s in enumerate(segments)
+        ]
+        duration = segments[-1]["end"] if segments else 0.0
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM segments WHERE task_id = ?", (task_id,))
+            self._conn.executemany(
+                "INSERT INTO segments (task_id, idx, start, end, text, avg_logprob, words, speaker) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?)",
+                (task_id, language, duration, len(segments), time.time())
+            )
+        logger.info(f"Stored {len(segments)} transcript segments for task {task_id}")
+
+    def save_insight_spans(self, task_id: str, spans: List[Dict]):
+        """Store (or replace) the insight-to-time-range index of a task."""
+        rows = [
+            (task_id, s["section"], s["index"], s["start"], s["end"],
+             s["first_segment"], s["last_segment"], s["score"])
+            for s in spans
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM insight_spans WHERE task_id = ?", (task_id,))
+            self._conn.executemany("INSERT INTO insight_spans VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def get_transcript_info(self, task_id: str) -> Optional[Dict]:
+        """Return language, duration and segment count of a stored transcript."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT language, duration, segment_count FROM transcripts WHERE task_id = ?", (task_id,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"language": row[0], "duration": row[1], "segment_count": row[2]}
+
+    def get_segments(self, task_id: str, start: Optional[float] = None, end: Optional[float] = None,
+                     include_words: bool = False) -> List[Dict]:
+        """
+        Return the segments of a task overlapping a time range.
+
+        Args:
+            task_id: ID of the task
+            start: Start of the range in seconds (None for the beginning)
+            end: End of the range in seconds (None for the end)
+            include_words: Whether to include word timestamps
+
+        Returns:
+            Segments ordered by start time
+        """
+        query = "SELECT idx, start, end, text, avg_logprob, words, speaker FROM segments WHERE task_id = ?"
+        params: List[Any] = [task_id]
+        if end is not None:
+            query += " AND start < ?"
+            params.append(end)
+        if start is not None:
+            query += " AND end > ?"
+            params.append(start)
+        query += " ORDER BY start"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        segments = []
+        for idx, seg_start, seg_end, text, avg_logprob, words, speaker in rows:
+            segment = {"index": idx, "start": seg_start, "end": seg_end, "text": text, "avg_logprob": avg_logprob}
+            if speaker:
+                segment["speaker"] = speaker
+            if include_words and words:
+                segment["words"] = json.loads(words)
+            segments.append(segment)
+        return segments
+
+    def get_insight_spans(self, task_id: str) -> List[Dict]:
+        """Return the time range of every mapped insight item of a task."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT section, item_index, start, end, first_segment, last_segment, score "
+                "FROM insight_spans WHERE task_id = ? ORDER BY start",
+                (task_id,)
+            ).fetchall()
+        return [
+            {"section": r[0], "index": r[1], "start": r[2], "end": r[3],
+             "first_segment": r[4], "last_segment": r[5], "score": r[6]}
+            for r in rows
+        ]
+
+    def delete_before(self, cutoff: float) -> Tuple[int, int]:
+        """
+        Delete transcripts stored before a timestamp, with their segments and spans.
+
+        Returns:
+            Number of transcripts deleted and the approximate bytes of text freed
+        """
+        with self._lock, self._conn:
+            task_ids = [r[0] for r in self._conn.execute(
+                "SELECT task_id FROM transcripts WHERE created_at < ?", (cutoff,)
+            ).fetchall()]
+            freed = 0
+            for task_id in task_ids:
+                freed += self._conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(text) + COALESCE(LENGTH(words), 0)), 0) FROM segments "
+                    "WHERE task_id = ?", (task_id,)
+                ).fetchone()[0]
+                self._conn.execute("DELETE FROM segments WHERE task_id = ?", (task_id,))
+                self._conn.execute("DELETE FROM insight_spans WHERE task_id = ?", (task_id,))
+                self._conn.execute("DELETE FROM transcripts WHERE task_id = ?", (task_id,))
+        if task_ids:
+            logger.info(f"Deleted {len(task_ids)} transcripts stored before {cutoff:.0f}")
+        return len(task_ids), freed
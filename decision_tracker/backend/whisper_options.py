@@ -0,0 +1,128 @@
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pydantic import BaseModel, Field, field_validator
+
+logger = logging.getLogger(__name__)
+
+
+class TranscribeOptions(BaseModel):
+    """
+    Whisper decoding options.
+
+    Fields left as None keep the value of the layer below (preset, then
+    Whisper's own default), so options can be stacked: preset, global
+    configuration, per-request overrides.
+    """
+
+    # Name of a TRANSCRIBE_PRESETS entry to start from
+    preset: Optional[str] = None
+    # Spoken language ("en", "de", ...); skips Whisper's language detection
+    language: Optional[str] = None
+    beam_size: Optional[int] = Field(None, ge=1, le=10)
+    best_of: Optional[int] = Field(None, ge=1, le=10)
+    # None uses fp16 on CUDA and fp32 on CPU (avoids Whisper's fallback warning)
+    fp16: Optional[bool] = None
+    # One temperature, or a schedule tried in order when a pass fails the
+    # compression-ratio / log-probability checks
+    temperature: Optional[Union[float, Tuple[float, ...]]] = None
+    condition_on_previous_text: Optional[bool] = None
+    no_speech_threshold: Optional[float] = Field(None, ge=0.0, le=1.0)
+    initial_prompt: Optional[str] = None
+    # Domain terms (names, products, jargon) added to the initial prompt
+    vocabulary: List[str] = []
+
+    @field_validator("preset")
+    @classmethod
+    def _known_preset(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None and value not in TRANSCRIBE_PRESETS:
+            raise ValueError(f"Unknown preset '{value}'. Use one of: {', '.join(TRANSCRIBE_PRESETS)}")
+        return value
+
+    def merged(self, override: Optional["TranscribeOptions"]) -> "TranscribeOptions":
+        """Return a copy with every field set in override replacing this one's."""
+        if override is None:
+            return self
+        values = self.model_dump(exclude_none=True)
+        values.update(override.model_dump(exclude_none=True, exclude={"vocabulary"}))
+        values["vocabulary"] = list(dict.fromkeys(self.vocabulary + override.vocabulary))
+        return TranscribeOptions(**values)
+
+    def to_whisper(self) -> Dict[str, Any]:
+        """Keyword arguments for whisper's transcribe()."""
+        kwargs = self.model_dump(exclude_none=True, exclude={"preset", "vocabulary"})
+
+        if self.vocabulary:
+            glossary = "Glossary: " + ", ".join(self.vocabulary) + "."
+            kwargs["initial_prompt"] = f"{self.initial_prompt} {glossary}" if self.initial_prompt else glossary
+
+        if self.fp16 is None:
+            kwargs["fp16"] = _cuda_available()
+        return kwargs
+
+
+def _cuda_available() -> bool:
+    try:
+        import torch
+
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+
+# Named starting points, from fastest to most accurate
+TRANSCRIBE_PRESETS: Dict[str, TranscribeOptions] = {
+    # One greedy pass: no fallback re-decodes, no conditioning on previous
+    # text (which can cause slow repetition loops)
+    "fast": TranscribeOptions(temperature=0.0, condition_on_previous_text=False),
+    # Small beam with a short fallback schedule
+    "balanced": TranscribeOptions(beam_size=3, best_of=3, temperature=(0.0, 0.4, 0.8),
+                                  condition_on_previous_text=False),
+    # Whisper's reference beam search and temperature schedule, still
+    # without conditioning on previous text
+    "accurate": TranscribeOptions(beam_size=5, best_of=5, temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+                                  condition_on_previous_text=False),
+}
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def _env_bool(name: str) -> Optional[bool]:
+    value = os.getenv(name)
+    return value.lower() == "true" if value else None
+
+
+# Preset forced for every job; unset lets the model policy decide
+WHISPER_PRESET = os.getenv("WHISPER_PRESET") or None
+
+# Options applied to every job on top of the preset
+DEFAULT_TRANSCRIBE_OPTIONS = TranscribeOptions(
+    preset=WHISPER_PRESET,
+    language=os.getenv("WHISPER_LANGUAGE") or None,
+    fp16=_env_bool("WHISPER_FP16"),
+    no_speech_threshold=_env_float("WHISPER_NO_SPEECH_THRESHOLD"),
+    initial_prompt=os.getenv("WHISPER_INITIAL_PROMPT") or None,
+    vocabulary=[term.strip() for term in os.getenv("WHISPER_VOCABULARY", "").split(",") if term.strip()],
+)
+
+
+def resolve_options(policy_preset: str,
+                    request: Optional[TranscribeOptions] = None) -> Tuple[str, TranscribeOptions]:
+    """
+    Build the options for one job.
+
+    The preset comes from the request, else WHISPER_PRESET, else the model
+    policy. Global options are applied on top of it and the request's own
+    fields on top of those.
+
+    Returns:
+        The preset used and the combined options
+    """
+    preset = (request.preset if request else None) or WHISPER_PRESET or policy_preset
+    options = TRANSCRIBE_PRESETS[preset].merged(DEFAULT_TRANSCRIBE_OPTIONS).merged(request)
+    options.preset = preset
+    return preset, options
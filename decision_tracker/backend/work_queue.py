@@ -0,0 +1,277 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# "sqlite" hands processing to worker processes (python worker.py) through
+# a durable queue; empty runs it on the API's own worker pool
+WORK_QUEUE = os.getenv("WORK_QUEUE", "").lower()
+
+# Default location of the queue database; workers on other hosts must see
+# the same file (and the rest of data/ and uploads/) on shared storage
+DEFAULT_DB_PATH = os.getenv("WORK_QUEUE_DB_PATH", os.path.join("data", "work_queue.db"))
+
+# A job whose worker sends no heartbeat for this long is handed to another worker
+WORK_QUEUE_VISIBILITY_TIMEOUT = float(os.getenv("WORK_QUEUE_VISIBILITY_TIMEOUT", "120"))
+
+# Deliveries of a job before it is marked failed
+WORK_QUEUE_MAX_ATTEMPTS = int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "3"))
+
+# Finished jobs are kept this long after the API has picked up their results
+WORK_QUEUE_RETENTION_HOURS = float(os.getenv("WORK_QUEUE_RETENTION_HOURS", "24"))
+
+JOB_STATES = ("queued", "running", "completed", "failed")
+
+
+class WorkQueue:
+    """
+    Durable SQLite job queue shared by the API and worker processes.
+
+    Delivery is at-least-once: a worker claims a job for a visibility
+    timeout and extends it with heartbeats. If the worker dies, the job
+    becomes visible again and is claimed by another worker, up to
+    WORK_QUEUE_MAX_ATTEMPTS deliveries. The first reported result wins, so
+    a job that was delivered twice is still only completed once.
+
+    Jobs are keyed by task ID; enqueueing an ID that already exists does
+    nothing. Results stay unacknowledged until the API has applied them to
+    its task store, so none are lost across an API restart.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, visibility_timeout: float = WORK_QUEUE_VISIBILITY_TIMEOUT,
+                 max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                task_id TEXT PRIMARY KEY,
+                task TEXT NOT NULL,
+                options TEXT,
+                state TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                visible_at REAL NOT NULL,
+                worker_id TEXT,
+                heartbeat_at REAL,
+                enqueued_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                result TEXT,
+                acknowledged INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (state, visible_at);
+            CREATE INDEX IF NOT EXISTS jobs_results ON jobs (acknowledged, state);
+            CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY,
+                host TEXT,
+                pid INTEGER,
+                started_at REAL,
+                heartbeat_at REAL,
+                task_id TEXT
+            );
+        """)
+        logger.info(f"Work queue opened at {os.path.abspath(db_path)}")
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two processes
+        # can never claim the same job
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def enqueue(self, task_id: str, task: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Queue a processing job.
+
+        Args:
+            task_id: ID of the task; also the job's idempotency key
+            task: JSON-serializable task fields the worker needs
+            options: Per-request Whisper options (TranscribeOptions dump)
+
+        Returns:
+            False if a job with this ID already exists
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (task_id, task, options, visible_at, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+                (task_id, json.dumps(task, default=str), json.dumps(options) if options is not None else None,
+                 now, now)
+            )
+        return cursor.rowcount == 1
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest visible job, including ones whose worker stopped sending heartbeats.
+
+        Returns:
+            The job ("task_id", "task", "options", "attempts"), or None if there is none
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            # Jobs that ran out of deliveries fail instead of looping forever
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', finished_at = ?, result = ? "
+                "WHERE state = 'running' AND visible_at <= ? AND attempts >= ?",
+                (now, json.dumps({"status": "failed", "error": "Worker stopped responding", "end_time": now}),
+                 now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT task_id, task, options, attempts FROM jobs "
+                "WHERE state IN ('queued', 'running') AND visible_at <= ? ORDER BY enqueued_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1, visible_at = ?, worker_id = ?, "
+                "heartbeat_at = ?, started_at = COALESCE(started_at, ?) WHERE task_id = ?",
+                (now + self.visibility_timeout, worker_id, now, now, row[0])
+            )
+            conn.execute("UPDATE workers SET task_id = ?, heartbeat_at = ? WHERE worker_id = ?", (row[0], now, worker_id))
+        if row[3]:
+            logger.warning(f"Job {row[0]} redelivered to {worker_id} (attempt {row[3] + 1})")
+        return {
+            "task_id": row[0], "task": json.loads(row[1]), "options": json.loads(row[2]) if row[2] else None,
+            "attempts": row[3] + 1,
+        }
+
+    def heartbeat(self, task_id: str, worker_id: str) -> bool:
+        """
+        Extend a claimed job's visibility timeout.
+
+        Returns:
+            False if the job is no longer held by this worker
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET visible_at = ?, heartbeat_at = ? WHERE task_id = ? AND worker_id = ? "
+                "AND state = 'running'",
+                (now + self.visibility_timeout, now, task_id, worker_id)
+            )
+            conn.execute("UPDATE workers SET heartbeat_at = ? WHERE worker_id = ?", (now, worker_id))
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Store the result of a job ("status" is "completed" or "failed").
+
+        Returns:
+            False if another delivery of the job already reported a result
+        """
+        state = "completed" if result.get("status") == "completed" else "failed"
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = ?, finished_at = ?, result = ?, worker_id = ? "
+                "WHERE task_id = ? AND state IN ('queued', 'running')",
+                (state, now, json.dumps(result, default=str), worker_id, task_id)
+            )
+            conn.execute("UPDATE workers SET task_id = NULL, heartbeat_at = ? WHERE worker_id = ?", (now, worker_id))
+        return cursor.rowcount == 1
+
+    def release(self, task_id: str, worker_id: str):
+        """Hand a claimed job back without counting the delivery (worker shutting down)."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = 'queued', attempts = MAX(attempts - 1, 0), visible_at = ?, worker_id = NULL "
+                "WHERE task_id = ? AND worker_id = ? AND state = 'running'",
+                (time.time(), task_id, worker_id)
+            )
+
+    def unacknowledged_results(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Finished jobs whose results the API has not applied yet."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_id, task, result FROM jobs WHERE acknowledged = 0 AND state IN ('completed', 'failed') "
+                "ORDER BY finished_at LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [{"task_id": r[0], "task": json.loads(r[1]), "result": json.loads(r[2])} for r in rows]
+
+    def acknowledge(self, task_ids: List[str]):
+        """Mark results as applied and drop acknowledged jobs past their retention."""
+        if not task_ids:
+            return
+        placeholders = ", ".join("?" for _ in task_ids)
+        with self._transaction() as conn:
+            conn.execute(f"UPDATE jobs SET acknowledged = 1 WHERE task_id IN ({placeholders})", task_ids)
+            conn.execute(
+                "DELETE FROM jobs WHERE acknowledged = 1 AND finished_at < ?",
+                (time.time() - WORK_QUEUE_RETENTION_HOURS * 3600,)
+            )
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Jobs that are queued or running."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_id, task, state FROM jobs WHERE state IN ('queued', 'running') ORDER BY enqueued_at"
+            ).fetchall()
+        return [{"task_id": r[0], "task": json.loads(r[1]), "state": r[2]} for r in rows]
+
+    def register_worker(self, worker_id: str):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers VALUES (?, ?, ?, ?, ?, NULL)",
+                (worker_id, socket.gethostname(), os.getpid(), time.time(), time.time())
+            )
+
+    def unregister_worker(self, worker_id: str):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+            oldest = self._conn.execute("SELECT MIN(enqueued_at) FROM jobs WHERE state = 'queued'").fetchone()[0]
+            workers = self._conn.execute(
+                "SELECT worker_id, host, pid, heartbeat_at, task_id FROM workers ORDER BY worker_id"
+            ).fetchall()
+        return {
+            "jobs": {state: counts.get(state, 0) for state in JOB_STATES},
+            "oldestQueuedSeconds": round(now - oldest, 1) if oldest else None,
+            "workers": [
+                {"workerId": w[0], "host": w[1], "pid": w[2], "taskId": w[4],
+                 "alive": now - (w[3] or 0) < self.visibility_timeout}
+                for w in workers
+            ],
+        }
+
+
+_work_queue: Optional[WorkQueue] = None
+_work_queue_lock = threading.Lock()
+
+
+def get_work_queue() -> Optional[WorkQueue]:
+    """Return the shared work queue, or None when processing runs in the API process."""
+    global _work_queue
+    if WORK_QUEUE != "sqlite":
+        if WORK_QUEUE:
+            logger.warning(f"Unknown WORK_QUEUE '{WORK_QUEUE}', processing in the API process")
+        return None
+    with _work_queue_lock:
+        if _work_queue is None:
+            _work_queue = WorkQueue()
+        return _work_queue
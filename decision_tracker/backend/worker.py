@@ -0,0 +1,154 @@
+"""
+Processing worker for the durable work queue.
+
+Usage:
+    WORK_QUEUE=sqlite python worker.py [--concurrency 1] [--worker-id ID]
+
+Run the API with WORK_QUEUE=sqlite as well; it then only queues jobs and
+any number of workers, on this host or others sharing data/, uploads/ and
+the recordings directory, process them. Each worker claims a job, sends a
+heartbeat every third of the visibility timeout while the pipeline runs
+and stores the task's outcome in the queue for the API to pick up.
+
+SIGINT/SIGTERM stop claiming new jobs; running jobs finish first. A
+second signal hands the running jobs back to the queue and exits.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("worker")
+
+# Seconds between polls of an empty queue
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "2"))
+
+# Task fields reported back to the API when a job finishes
+RESULT_FIELDS = ("status", "error", "end_time", "transcription")
+
+
+class Worker:
+    """Claims jobs from the work queue and runs the processing pipeline on them."""
+
+    def __init__(self, worker_id: str, concurrency: int = 1):
+        # The pipeline and its stores live in the API module
+        import app
+        from work_queue import get_work_queue
+
+        self.app = app
+        self.queue = get_work_queue()
+        if self.queue is None:
+            raise SystemExit("Set WORK_QUEUE=sqlite for the worker and the API")
+        self.worker_id = worker_id
+        self.concurrency = max(1, concurrency)
+        self._stop = threading.Event()
+        self._running = {}
+        self._running_lock = threading.Lock()
+
+    def run(self):
+        self.queue.register_worker(self.worker_id)
+        logger.info(f"Worker {self.worker_id} started with {self.concurrency} slot(s)")
+        threads = [
+            threading.Thread(target=self._slot, name=f"worker-{i}", daemon=True) for i in range(self.concurrency)
+        ]
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="worker-heartbeat", daemon=True)
+        for thread in threads + [heartbeat]:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        finally:
+            self._stop.set()
+            self.queue.unregister_worker(self.worker_id)
+            logger.info(f"Worker {self.worker_id} stopped")
+
+    def stop(self, force: bool = False):
+        if force:
+            with self._running_lock:
+                for task_id in list(self._running):
+                    self.queue.release(task_id, self.worker_id)
+                    logger.info(f"Released job {task_id}")
+            os._exit(1)
+        logger.info("Stopping after the running jobs finish")
+        self._stop.set()
+
+    def _slot(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(self.worker_id)
+            except Exception as e:
+                logger.error(f"Failed to claim a job: {str(e)}")
+                job = None
+            if job is None:
+                self._stop.wait(WORKER_POLL_INTERVAL)
+                continue
+            self._process(job)
+
+    def _process(self, job):
+        task_id = job["task_id"]
+        task = dict(job["task"], status="processing")
+        options = job["options"]
+        if options is not None:
+            options = self.app.TranscribeOptions(**options)
+            task["transcribe_options"] = options
+
+        logger.info(f"Claimed job {task_id} (attempt {job['attempts']})")
+        with self._running_lock:
+            self._running[task_id] = task
+        self.app.processing_tasks[task_id] = task
+        try:
+            self.app.run_processing_task(task_id, task["file_path"], options)
+        except Exception as e:
+            logger.error(f"Job {task_id} crashed: {str(e)}", exc_info=True)
+            task.update(status="failed", error=f"Error processing audio file: {str(e)}")
+        finally:
+            with self._running_lock:
+                self._running.pop(task_id, None)
+            self.app.processing_tasks.pop(task_id, None)
+
+        result = {field: task.get(field) for field in RESULT_FIELDS if task.get(field) is not None}
+        if not self.queue.complete(task_id, self.worker_id, result):
+            logger.warning(f"Job {task_id} was already finished by another delivery; result dropped")
+        logger.info(f"Job {task_id} {task['status']}")
+
+    def _heartbeat_loop(self):
+        # Keeps going after stop() until the running jobs are done
+        while not self._stop.is_set() or self._running:
+            time.sleep(self.queue.visibility_timeout / 3)
+            with self._running_lock:
+                task_ids = list(self._running)
+            for task_id in task_ids:
+                try:
+                    if not self.queue.heartbeat(task_id, self.worker_id):
+                        logger.warning(f"Lost the lease on job {task_id}; it may run twice")
+                except Exception as e:
+                    logger.error(f"Heartbeat for job {task_id} failed: {str(e)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process jobs from the Decision Tracker work queue")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", "1")),
+                        help="Jobs processed at the same time")
+    parser.add_argument("--worker-id", default=os.getenv("WORKER_ID"),
+                        help="Name of this worker (defaults to host and a random suffix)")
+    args = parser.parse_args()
+
+    worker = Worker(args.worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}", args.concurrency)
+    signals = []
+
+    def _on_signal(signum, frame):
+        signals.append(signum)
+        worker.stop(force=len(signals) > 1)
+
+    signal.signal(signal.SIGINT, _on_signal)
+    signal.signal(signal.SIGTERM, _on_signal)
+    worker.run()
@@ -12,6 +12,16 @@ interface AudioUploaderProps {
 // Use development API URL when running locally, otherwise use the /api prefix
 const API_URL = import.meta.env.DEV ? 'http://localhost:8000' : '/api';
 
+// crypto.randomUUID only exists in secure contexts (HTTPS or localhost);
+// getRandomValues is available everywhere
+const newUploadKey = (): string => {
+  if (typeof crypto.randomUUID === 'function') {
+    return crypto.randomUUID();
+  }
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  return Array.from(bytes, byte => byte.toString(16).padStart(2, '0')).join('');
+};
+
 const AudioUploader: React.FC<AudioUploaderProps> = ({ 
   status, 
   setStatus,
@@ -26,6 +36,8 @@ const AudioUploader: React.FC<AudioUploaderProps> = ({
   const waveformRef = useRef<HTMLDivElement>(null);
   const wavesurferRef = useRef<WaveSurfer | null>(null);
   const pollingIntervalRef = useRef<number | null>(null);
+  // One key per selected file, so retries of the same upload reuse its task
+  const uploadKeyRef = useRef<string | null>(null);
   
   // Clean up polling interval on unmount
   useEffect(() => {
@@ -122,13 +134,14 @@ const AudioUploader: React.FC<AudioUploaderProps> = ({
     // Reset error message
     setErrorMessage(null);
     
-    // Validate file type
-    if (!file.name.toLowerCase().endsWith('.mp3')) {
-      setErrorMessage('Please upload an MP3 file');
+    // Validate file type (the backend detects the exact format from the content)
+    if (file.type && !file.type.startsWith('audio/') && !file.type.startsWith('video/')) {
+      setErrorMessage('Please upload an audio or video recording');
       return;
     }
     
     setSelectedFile(file);
+    uploadKeyRef.current = newUploadKey();
   };
   
   const handleUpload = async () => {
@@ -144,7 +157,8 @@ const AudioUploader: React.FC<AudioUploaderProps> = ({
       // Upload the audio file
       const response = await axios.post(`${API_URL}/upload-audio`, formData, {
         headers: {
-          'Content-Type': 'multipart/form-data'
+          'Content-Type': 'multipart/form-data',
+          ...(uploadKeyRef.current ? { 'Idempotency-Key': uploadKeyRef.current } : {})
         }
       });
       
@@ -180,7 +194,8 @@ const AudioUploader: React.FC<AudioUploaderProps> = ({
           // Done polling
           window.clearInterval(intervalId);
         } else if (taskStatus === 'failed') {
-          // Task failed
+          // Task failed; a new key lets the same file be processed again
+          uploadKeyRef.current = newUploadKey();
           setStatus('error');
           setErrorMessage(response.data.error || 'Processing failed. Please try again.');
           window.clearInterval(intervalId);
@@ -243,13 +258,13 @@ const AudioUploader: React.FC<AudioUploaderProps> = ({
                 browse
               </button>
             </p>
-            <p className="text-xs text-gray-400">MP3 format only</p>
+            <p className="text-xs text-gray-400">MP3, WAV, M4A, WebM, Opus, FLAC or MP4</p>
             
             <input
               type="file"
               className="hidden"
               ref={fileInputRef}
-              accept=".mp3"
+              accept="audio/*,video/*"
               onChange={handleFileInputChange}
             />
           </div>
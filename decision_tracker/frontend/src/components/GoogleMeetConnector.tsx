@@ -137,9 +137,9 @@ const GoogleMeetConnector: React.FC<GoogleMeetConnectorProps> = ({
       {success && (
         <div className="bg-green-100 border border-green-400 text-green-700 px-4 py-3 rounded mb-4 animate-fade-in">
           <p className="font-bold">Success!</p>
-          <p>Google Meet is opening in a new window. Check your taskbar for the Chrome browser window.</p>
+          <p>The meeting bot is joining in the background. The recording will be saved to the audio folder when the meeting ends.</p>
           <p className="mt-2 font-medium">Audio recording has started automatically. The recording will stop and be saved when the meeting ends or when you exit the meeting.</p>
-          <p className="mt-2 text-sm font-bold">Important: The recording will be saved to the audio folder. You must manually upload it to process the audio for insights.</p>
+          <p className="mt-2 text-sm font-bold">Processing starts automatically once the recording is saved; no upload is needed.</p>
         </div>
       )}
       
@@ -1,22 +1,29 @@
-export interface ActionItem {
+// Fields added by the backend when an item is linked to earlier meetings
+export interface TrackedItem {
+  itemId?: string;
+  recurring?: boolean;
+  occurrences?: number;
+}
+
+export interface ActionItem extends TrackedItem {
   task: string;
   assignee: string;
   dueDate?: string;
 }
 
-export interface DecisionPoint {
+export interface DecisionPoint extends TrackedItem {
   decision: string;
   timeline?: string;
   rationale?: string;
 }
 
-export interface RiskConcern {
+export interface RiskConcern extends TrackedItem {
   description: string;
   severity?: string;
   mitigation?: string;
 }
 
-export interface UnresolvedQuestion {
+export interface UnresolvedQuestion extends TrackedItem {
   question: string;
   context?: string;
 }